@@ -4,43 +4,48 @@ verlte() {
     [  "$1" = "`echo -e "$1\n$2" | sort -V | head -n1`" ]
 }
 
+function dr-source-env-file {
+  local l
+  while IFS= read -r l || [[ -n "$l" ]]; do
+    [[ -z "${l//[[:space:]]/}" || "$l" =~ ^[[:space:]]*# ]] && continue
+    eval "export $l"
+  done < "$1"
+}
+
 function dr-update-env {
 
-  if [[ -f "$DIR/system.env" ]]
+  if [[ ! -f "$DIR/system.env" ]]
   then
-    LINES=$(grep -v '^#' $DIR/system.env)
-    for l in $LINES; do
-      env_var=$(echo $l | cut -f1 -d\=)
-      env_val=$(echo $l | cut -f2 -d\=)
-      eval "export $env_var=$env_val"
-    done
-  else
     echo "File system.env does not exist."
     return 1
   fi
 
-  if [[ -f "$DR_CONFIG" ]]
+  if [[ ! -f "$DR_CONFIG" ]]
   then
-    LINES=$(grep -v '^#' $DR_CONFIG)
-    for l in $LINES; do
-      env_var=$(echo $l | cut -f1 -d\=)
-      env_val=$(echo $l | cut -f2 -d\=)
-      eval "export $env_var=$env_val"
-    done
-  else
     echo "File run.env does not exist."
     return 1
   fi
 
+  # Source the rendered system.env + run.env; render again only if either is newer.
+  local ENV_CACHE="$DIR/tmp/env/${DR_CONFIG//\//_}.sh"
+  if [[ "$ENV_CACHE" -nt "$DIR/system.env" && "$ENV_CACHE" -nt "$DR_CONFIG" ]] || \
+     python3 $DIR/utils/env-render.py -o "$ENV_CACHE" "$DIR/system.env" "$DR_CONFIG"
+  then
+    source "$ENV_CACHE"
+  else
+    dr-source-env-file "$DIR/system.env"
+    dr-source-env-file "$DR_CONFIG"
+  fi
+
   if [[ -z "${DR_RUN_ID}" ]]; then
     export DR_RUN_ID=0
   fi
 
   if [[ "${DR_DOCKER_STYLE,,}" == "swarm" ]];
   then
-    export DR_ROBOMAKER_TRAIN_PORT=$(expr 8080 + $DR_RUN_ID)
-    export DR_ROBOMAKER_EVAL_PORT=$(expr 8180 + $DR_RUN_ID)
-    export DR_ROBOMAKER_GUI_PORT=$(expr 5900 + $DR_RUN_ID)
+    export DR_ROBOMAKER_TRAIN_PORT=$((8080 + DR_RUN_ID))
+    export DR_ROBOMAKER_EVAL_PORT=$((8180 + DR_RUN_ID))
+    export DR_ROBOMAKER_GUI_PORT=$((5900 + DR_RUN_ID))
   else
     export DR_ROBOMAKER_TRAIN_PORT="8080-8089"
     export DR_ROBOMAKER_EVAL_PORT="8080-8089"
@@ -4,6 +4,29 @@ function dr-upload-custom-files {
   eval CUSTOM_TARGET=$(echo s3://$DR_LOCAL_S3_BUCKET/$DR_LOCAL_S3_CUSTOM_FILES_PREFIX/)
   echo "Uploading files to $CUSTOM_TARGET"
   aws $DR_LOCAL_PROFILE_ENDPOINT_URL s3 sync $DR_DIR/custom_files/ $CUSTOM_TARGET
+  # Wrapped or bundled reward functions go to a key only the simulation reads;
+  # DR_LOCAL_S3_REWARD_KEY keeps the original, which is copied into the model.
+  local SIMULATION_REWARD_KEY=${DR_LOCAL_S3_SIMULATION_REWARD_KEY:-${DR_LOCAL_S3_REWARD_KEY%.py}_simulation.py}
+  local PROFILE_ARGS
+  if [[ "${DR_TRAIN_DEBUG_REWARD,,}" == "true" || "${DR_EVAL_DEBUG_REWARD,,}" == "true" ]]; then
+    echo "Uploading reward function wrapped with the step profiler for the simulation"
+    PROFILE_ARGS=""
+  elif python3 ${DR_DIR}/utils/reward-profile.py --uses-trackgeom $DR_DIR/custom_files/reward_function.py 2> /dev/null; then
+    echo "Uploading reward function bundled with drfc.trackgeom for the simulation"
+    PROFILE_ARGS="--no-profiler"
+  else
+    aws $DR_LOCAL_PROFILE_ENDPOINT_URL s3 rm s3://$DR_LOCAL_S3_BUCKET/$SIMULATION_REWARD_KEY > /dev/null
+    return 0
+  fi
+  local REWARD_FILE=$DR_DIR/tmp/reward_function.$DR_RUN_ID.py
+  mkdir -p $DR_DIR/tmp
+  if python3 ${DR_DIR}/utils/reward-profile.py $PROFILE_ARGS $DR_DIR/custom_files/reward_function.py -o $REWARD_FILE; then
+    aws $DR_LOCAL_PROFILE_ENDPOINT_URL s3 cp $REWARD_FILE s3://$DR_LOCAL_S3_BUCKET/$SIMULATION_REWARD_KEY
+  else
+    echo "WARNING: Bundling failed, the simulation uses the reward function as is."
+    aws $DR_LOCAL_PROFILE_ENDPOINT_URL s3 rm s3://$DR_LOCAL_S3_BUCKET/$SIMULATION_REWARD_KEY > /dev/null
+  fi
+  rm -f $REWARD_FILE
 }
 
 function dr-upload-model {
@@ -54,6 +77,10 @@ function dr-start-evaluation {
   $DR_DIR/scripts/evaluation/start.sh "$@"
 }
 
+function dr-evaluate-batch {
+  dr-update-env && python3 ${DR_DIR}/utils/eval-batch.py "$@"
+}
+
 function dr-stop-evaluation {
   ROBOMAKER_COMMAND="" bash -c "cd $DR_DIR/scripts/evaluation && ./stop.sh"
 }
@@ -272,6 +299,38 @@ function dr-get-robomaker-stats {
   fi
 }
 
+function dr-monitor-training {
+  dr-update-env && python3 ${DR_DIR}/utils/training-monitor.py "$@"
+}
+
+function dr-plan-workers {
+  dr-update-env && python3 ${DR_DIR}/utils/worker-placement.py "$@"
+}
+
+function dr-wipe-prefix {
+  dr-update-env && python3 ${DR_DIR}/utils/wipe-prefix.py "$@"
+}
+
+function dr-prune-checkpoints {
+  dr-update-env && python3 ${DR_DIR}/utils/checkpoint-retention.py "$@"
+}
+
+function dr-watch-training {
+  dr-update-env && python3 ${DR_DIR}/utils/training-policy.py "$@"
+}
+
+function dr-tail-metrics {
+  dr-update-env && python3 ${DR_DIR}/utils/metrics-tail.py "$@"
+}
+
+function dr-ingest-simtrace {
+  python3 ${DR_DIR}/utils/simtrace-ingest.py "$@"
+}
+
+function dr-logs-all {
+  python3 ${DR_DIR}/utils/log-aggregate.py "$@"
+}
+
 function dr-logs-loganalysis {
   eval LOG_ANALYSIS_ID=$(docker ps | awk ' /loganalysis/ { print $1 }')
   if [ -n "$LOG_ANALYSIS_ID" ]; then
@@ -291,6 +350,18 @@ function dr-url-loganalysis {
   fi
 }
 
+function dr-benchmark-reward {
+  python3 ${DR_DIR}/utils/reward-benchmark.py "$@"
+}
+
+function dr-profile-reward {
+  python3 ${DR_DIR}/utils/reward-profile.py "$@"
+}
+
+function dr-rescore-reward {
+  python3 ${DR_DIR}/utils/reward-rescore.py "$@"
+}
+
 function dr-view-stream {
   ${DR_DIR}/utils/start-local-browser.sh "$@"
 }
@@ -0,0 +1,7 @@
+"""
+Shared Python helpers for the Deepracer-for-Cloud scripts.
+
+The scripts in scripts/ and utils/ add the lib/ directory to sys.path and
+import the modules they need from here. Heavy dependencies (boto3, yaml)
+are imported lazily so that importing a module stays cheap.
+"""
@@ -0,0 +1,267 @@
+"""
+Local cache of the checkpoints available under <prefix>/model/.
+
+The cache is built once from deepracer_checkpoints.json and a paginated
+listing of the model folder, stored in $DR_DIR/tmp/checkpoints/ and then
+refreshed incrementally with StartAfter. Lookups by number, step, 'best'
+or 'last' are dictionary lookups.
+"""
+
+import json
+import os
+import re
+
+CHECKPOINT_RE = re.compile(r'^([0-9]+)_Step-([0-9]+)\.ckpt\.index$')
+PINNED_FILE = 'pinned_checkpoints.json'
+DELETE_BATCH = 1000
+
+
+def checkpoint_arg(value):
+    """Returns 'best', 'last' or the checkpoint number; raises ValueError for anything else."""
+    if value in ('best', 'last'):
+        return value
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValueError("Checkpoint must be 'best', 'last' or a number, not {!r}.".format(value))
+
+
+def checkpoint_number(name):
+    """'12_Step-3456.ckpt' -> 12"""
+    return int(name.split('_')[0])
+
+
+def retained(numbers, keep_last=5, keep_every=0):
+    """
+    Returns the checkpoint numbers a retention policy keeps: the newest
+    keep_last and, if keep_every is set, every keep_every-th checkpoint.
+    The best checkpoint and pinned ones are protected by CheckpointIndex.delete.
+    """
+    numbers = sorted(numbers)
+    keep = set(numbers[-keep_last:]) if keep_last > 0 else set()
+    if keep_every > 0:
+        keep.update(n for n in numbers if n % keep_every == 0)
+    return keep
+
+
+class CheckpointIndex:
+
+    def __init__(self, s3_client, bucket, prefix, cache_dir=None):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.prefix = prefix.rstrip('/')
+        self.model_prefix = '{}/model/'.format(self.prefix)
+
+        if cache_dir is None:
+            cache_dir = os.path.join(os.environ.get('DR_DIR', '.'), 'tmp', 'checkpoints')
+        self.cache_file = os.path.join(cache_dir, bucket, self.prefix.replace('/', '__') + '.json')
+
+        self.checkpoints = {}
+        self.steps = {}
+        self.index = {}
+        self.last_key = None
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.cache_file) as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.checkpoints = {int(n): c for n, c in cache['checkpoints'].items()}
+        self.steps = {c['step']: n for n, c in self.checkpoints.items()}
+        self.index = cache.get('index', {})
+        self.last_key = cache.get('last_key')
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+        tmp_file = self.cache_file + '.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump({'checkpoints': self.checkpoints, 'index': self.index, 'last_key': self.last_key}, f)
+        os.replace(tmp_file, self.cache_file)
+
+    def clear(self):
+        self.checkpoints = {}
+        self.steps = {}
+        self.index = {}
+        self.last_key = None
+
+    def forget(self, numbers):
+        """Removes checkpoints (e.g. deleted by retention) from the cache."""
+        for n in numbers:
+            c = self.checkpoints.pop(n, None)
+            if c is not None:
+                self.steps.pop(c['step'], None)
+
+    def _add(self, key, modified=None):
+        m = CHECKPOINT_RE.match(key[len(self.model_prefix):])
+        if not m:
+            return False
+        n, step = int(m.group(1)), int(m.group(2))
+        self.checkpoints[n] = {'name': '{}_Step-{}.ckpt'.format(n, step), 'step': step}
+        if modified is not None:
+            self.checkpoints[n]['time'] = int(modified.timestamp() * 1000)
+        self.steps[step] = n
+        return True
+
+    def _list(self, start_after=None):
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        kwargs = {'Bucket': self.bucket, 'Prefix': self.model_prefix}
+        if start_after:
+            kwargs['StartAfter'] = start_after
+        for page in paginator.paginate(**kwargs):
+            for o in page.get('Contents', []):
+                name = o['Key'][len(self.model_prefix):]
+                if start_after and not name[:1].isdigit():
+                    # Past the numbered checkpoint files (model_N.pb etc.)
+                    return
+                self._add(o['Key'], o.get('LastModified'))
+
+    def _exists(self, key):
+        from botocore.exceptions import ClientError
+        from drfc.s3 import not_found
+        try:
+            self.s3_client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except ClientError as e:
+            if not_found(e):
+                return False
+            raise
+
+    def _stale(self):
+        """
+        True if the cache no longer matches the prefix: a checkpoint named in
+        deepracer_checkpoints.json is cached under another step, or is older
+        than the cached ones but not cached, or the newest cached checkpoint
+        is gone (the prefix was wiped and training restarted).
+        """
+        known = max(self.checkpoints)
+        for which, c in self.index.items():
+            if not isinstance(c, dict) or not c.get('name'):
+                continue
+            n = checkpoint_number(c['name'])
+            cached = self.checkpoints.get(n)
+            if cached is not None and cached['name'] != c['name']:
+                return True
+            if cached is None and n < known:
+                return True
+            if which == 'last_checkpoint' and len(str(n)) != len(str(known)):
+                return True
+        return not self._exists(self.last_key)
+
+    def refresh(self):
+        """
+        Re-reads deepracer_checkpoints.json and lists only the objects after
+        the newest cached checkpoint. A full listing is done if the cache is
+        empty, if the checkpoint number gains a digit (keys then sort before
+        the last known key) or if the cache is stale (see _stale).
+        """
+        from botocore.exceptions import ClientError
+        try:
+            body = self.s3_client.get_object(Bucket=self.bucket, Key=self.model_prefix + 'deepracer_checkpoints.json')['Body']
+            self.index = json.loads(body.read())
+        except ClientError:
+            self.index = {}
+
+        known = max(self.checkpoints) if self.checkpoints else None
+        full = (known is None or self.last_key is None or len(str(known + 1)) != len(str(known))
+                or self._stale())
+
+        if full:
+            index = self.index
+            self.clear()
+            self.index = index
+            self._list()
+        else:
+            self._list(self.last_key)
+
+        if self.checkpoints:
+            # Any numbered key sorting after the newest checkpoint is newer.
+            self.last_key = '{}{}.index'.format(self.model_prefix, self.checkpoints[max(self.checkpoints)]['name'])
+        self.save()
+        return self
+
+    def get(self, which):
+        """
+        Returns the checkpoint name ('N_Step-S.ckpt') for 'best', 'last' or a
+        checkpoint number; None if it is not known. Raises ValueError for
+        anything else.
+        """
+        which = checkpoint_arg(which)
+        if which in ('best', 'last'):
+            return (self.index.get('{}_checkpoint'.format(which)) or {}).get('name')
+        c = self.checkpoints.get(which)
+        return c['name'] if c else None
+
+    def by_step(self, step):
+        try:
+            step = int(step)
+        except (TypeError, ValueError):
+            raise ValueError("Step must be a number, not {!r}.".format(step))
+        n = self.steps.get(step)
+        return self.checkpoints[n]['name'] if n is not None else None
+
+    def numbers(self):
+        return sorted(self.checkpoints)
+
+    def times(self):
+        """Returns {number: time the checkpoint was written, in ms} of the checkpoints listed with one."""
+        return {n: c['time'] for n, c in self.checkpoints.items() if 'time' in c}
+
+    def referenced(self):
+        """Returns the checkpoint numbers named in deepracer_checkpoints.json."""
+        return {checkpoint_number(c['name']) for c in self.index.values() if isinstance(c, dict) and c.get('name')}
+
+    def read_pinned(self):
+        """Returns the checkpoint numbers pinned in <prefix>/pinned_checkpoints.json."""
+        from botocore.exceptions import ClientError
+        try:
+            body = self.s3_client.get_object(Bucket=self.bucket, Key='{}/{}'.format(self.prefix, PINNED_FILE))['Body']
+            return set(json.loads(body.read()).get('pinned', []))
+        except (ClientError, ValueError):
+            return set()
+
+    def write_pinned(self, numbers):
+        body = json.dumps({'pinned': sorted(numbers)}).encode('utf-8')
+        self.s3_client.put_object(Bucket=self.bucket, Key='{}/{}'.format(self.prefix, PINNED_FILE), Body=body)
+
+    def keys(self, numbers):
+        """Returns all keys of the given checkpoints: N_Step-S.ckpt.* and model_N.pb."""
+        numbers = set(numbers)
+        keys = []
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.model_prefix):
+            for o in page.get('Contents', []):
+                name = o['Key'][len(self.model_prefix):]
+                if name.startswith('model_') and name.endswith('.pb'):
+                    n = name[len('model_'):-len('.pb')]
+                else:
+                    n = name.split('_Step-', 1)[0] if '_Step-' in name else None
+                if n is not None and n.isdigit() and int(n) in numbers:
+                    keys.append(o['Key'])
+        return keys
+
+    def delete(self, numbers, dry_run=False):
+        """
+        Deletes the files of the given checkpoints with DeleteObjects, 1000
+        keys per call. Checkpoints referenced by deepracer_checkpoints.json or
+        pinned are never deleted. Returns the deleted checkpoint numbers.
+        """
+        numbers = set(numbers) - self.referenced() - self.read_pinned()
+        if not numbers:
+            return []
+        keys = self.keys(numbers)
+        for i in range(0, len(keys), DELETE_BATCH):
+            batch = keys[i:i + DELETE_BATCH]
+            if dry_run:
+                for key in batch:
+                    print('(dryrun) delete: s3://{}/{}'.format(self.bucket, key))
+                continue
+            response = self.s3_client.delete_objects(
+                Bucket=self.bucket, Delete={'Objects': [{'Key': k} for k in batch], 'Quiet': True})
+            for error in response.get('Errors', []):
+                print('WARNING: Could not delete {}: {}'.format(error['Key'], error.get('Message')))
+        if not dry_run:
+            self.forget(numbers)
+            self.save()
+        return sorted(numbers)
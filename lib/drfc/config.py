@@ -0,0 +1,352 @@
+"""
+Builds the Robomaker parameter files (training, evaluation and upload)
+from the DR_* environment variables.
+
+All three variants are rendered from one DeepRacerConfig object, so the
+shared car / race-type settings are read once and cannot drift apart.
+"""
+
+import os
+import time
+from datetime import datetime
+
+
+def str2bool(v):
+    return str(v).lower() in ("yes", "true", "t", "1")
+
+
+class RaceType:
+    """
+    Race-type specific section of the parameter file. Each entry in FIELDS
+    maps a parameter key to its DR_* variable and default.
+    """
+
+    NAME = None
+    FIELDS = ()
+
+    def keys(self):
+        return [k for k, _, _ in self.FIELDS]
+
+    def apply(self, env, params):
+        for key, var, default in self.FIELDS:
+            params[key] = env.get(var, default)
+        return params
+
+
+class TimeTrial(RaceType):
+    NAME = 'TIME_TRIAL'
+
+
+class ObjectAvoidance(RaceType):
+    NAME = 'OBJECT_AVOIDANCE'
+    FIELDS = (
+        ('NUMBER_OF_OBSTACLES', 'DR_OA_NUMBER_OF_OBSTACLES', '6'),
+        ('MIN_DISTANCE_BETWEEN_OBSTACLES', 'DR_OA_MIN_DISTANCE_BETWEEN_OBSTACLES', '2.0'),
+        ('RANDOMIZE_OBSTACLE_LOCATIONS', 'DR_OA_RANDOMIZE_OBSTACLE_LOCATIONS', 'True'),
+        ('IS_OBSTACLE_BOT_CAR', 'DR_OA_IS_OBSTACLE_BOT_CAR', 'false'),
+        ('OBSTACLE_TYPE', 'DR_OA_OBSTACLE_TYPE', 'box_obstacle'),
+    )
+
+    def keys(self):
+        return super().keys() + ['OBJECT_POSITIONS']
+
+    def apply(self, env, params):
+        super().apply(env, params)
+        object_position_str = env.get('DR_OA_OBJECT_POSITIONS', "").replace('"', '')
+        if object_position_str != "":
+            object_positions = object_position_str.split(";")
+            params['OBJECT_POSITIONS'] = object_positions
+            params['NUMBER_OF_OBSTACLES'] = str(len(object_positions))
+        return params
+
+
+class HeadToBot(RaceType):
+    NAME = 'HEAD_TO_BOT'
+    FIELDS = (
+        ('IS_LANE_CHANGE', 'DR_H2B_IS_LANE_CHANGE', 'False'),
+        ('LOWER_LANE_CHANGE_TIME', 'DR_H2B_LOWER_LANE_CHANGE_TIME', '3.0'),
+        ('UPPER_LANE_CHANGE_TIME', 'DR_H2B_UPPER_LANE_CHANGE_TIME', '5.0'),
+        ('LANE_CHANGE_DISTANCE', 'DR_H2B_LANE_CHANGE_DISTANCE', '1.0'),
+        ('NUMBER_OF_BOT_CARS', 'DR_H2B_NUMBER_OF_BOT_CARS', '0'),
+        ('MIN_DISTANCE_BETWEEN_BOT_CARS', 'DR_H2B_MIN_DISTANCE_BETWEEN_BOT_CARS', '2.0'),
+        ('RANDOMIZE_BOT_CAR_LOCATIONS', 'DR_H2B_RANDOMIZE_BOT_CAR_LOCATIONS', 'False'),
+        ('BOT_CAR_SPEED', 'DR_H2B_BOT_CAR_SPEED', '0.2'),
+        ('PENALTY_SECONDS', 'DR_H2B_BOT_CAR_PENALTY', '2.0'),
+    )
+
+
+class HeadToModel(RaceType):
+    """
+    Head-to-model only changes the evaluation file, where a second racer
+    is appended to the per-racer lists. See DeepRacerConfig.evaluation().
+    """
+    NAME = 'HEAD_TO_MODEL'
+
+
+RACE_TYPES = {r.NAME: r for r in (TimeTrial(), ObjectAvoidance(), HeadToBot(), HeadToModel())}
+
+
+def race_type(name):
+    return RACE_TYPES.get(name, RACE_TYPES['TIME_TRIAL'])
+
+
+# Keys that a worker-N.env may change in a multi-config training.
+WORKER_FIELDS = (
+    ('WORLD_NAME', 'DR_WORLD_NAME', 'LGSWide'),
+    ('RACE_TYPE', 'DR_RACE_TYPE', 'TIME_TRIAL'),
+    ('CAR_COLOR', 'DR_CAR_COLOR', 'Red'),
+    ('ALTERNATE_DRIVING_DIRECTION', 'DR_TRAIN_ALTERNATE_DRIVING_DIRECTION', 'false'),
+    ('CHANGE_START_POSITION', 'DR_TRAIN_CHANGE_START_POSITION', 'true'),
+    ('ROUND_ROBIN_ADVANCE_DIST', 'DR_TRAIN_ROUND_ROBIN_ADVANCE_DIST', '0.05'),
+    ('ENABLE_DOMAIN_RANDOMIZATION', 'DR_ENABLE_DOMAIN_RANDOMIZATION', 'false'),
+    ('START_POSITION_OFFSET', 'DR_TRAIN_START_POSITION_OFFSET', '0.00'),
+    ('REVERSE_DIR', 'DR_TRAIN_REVERSE_DIRECTION', False),
+)
+
+
+class DeepRacerConfig:
+    """
+    Reads the DR_* variables from env (defaults to os.environ) once and
+    renders the parameter dicts for the different job types.
+    """
+
+    def __init__(self, env=None):
+        self.env = dict(os.environ if env is None else env)
+        e = self.env
+
+        self.region = e.get('DR_AWS_APP_REGION', 'us-east-1')
+        self.bucket = e.get('DR_LOCAL_S3_BUCKET', 'bucket')
+        self.model_prefix = e.get('DR_LOCAL_S3_MODEL_PREFIX', 'rl-deepracer-sagemaker')
+        self.metrics_prefix = e.get('DR_LOCAL_S3_METRICS_PREFIX', None)
+        self.race_type = e.get('DR_RACE_TYPE', 'TIME_TRIAL')
+
+    def car(self):
+        """
+        Car and race settings shared by the training and upload files. The
+        car color only applies to the deepracer body shell.
+        """
+        e = self.env
+        params = {}
+        params['BODY_SHELL_TYPE'] = e.get('DR_CAR_BODY_SHELL_TYPE', 'deepracer')
+        if params['BODY_SHELL_TYPE'] == 'deepracer':
+            params['CAR_COLOR'] = e.get('DR_CAR_COLOR', 'Red')
+        params['CAR_NAME'] = e.get('DR_CAR_NAME', 'MyCar')
+        params['RACE_TYPE'] = self.race_type
+        params['WORLD_NAME'] = e.get('DR_WORLD_NAME', 'LGSWide')
+        params['DISPLAY_NAME'] = e.get('DR_DISPLAY_NAME', 'racer1')
+        params['RACER_NAME'] = e.get('DR_RACER_NAME', 'racer1')
+
+        params['ALTERNATE_DRIVING_DIRECTION'] = e.get('DR_TRAIN_ALTERNATE_DRIVING_DIRECTION', e.get('DR_ALTERNATE_DRIVING_DIRECTION', 'false'))
+        params['CHANGE_START_POSITION'] = e.get('DR_TRAIN_CHANGE_START_POSITION', e.get('DR_CHANGE_START_POSITION', 'true'))
+        params['ROUND_ROBIN_ADVANCE_DIST'] = e.get('DR_TRAIN_ROUND_ROBIN_ADVANCE_DIST', '0.05')
+        params['START_POSITION_OFFSET'] = e.get('DR_TRAIN_START_POSITION_OFFSET', '0.00')
+        params['ENABLE_DOMAIN_RANDOMIZATION'] = e.get('DR_ENABLE_DOMAIN_RANDOMIZATION', 'false')
+        params['MIN_EVAL_TRIALS'] = e.get('DR_TRAIN_MIN_EVAL_TRIALS', '5')
+        return params
+
+    def training(self):
+        e = self.env
+        params = {}
+        params['AWS_REGION'] = self.region
+        params['JOB_TYPE'] = 'TRAINING'
+        params['KINESIS_VIDEO_STREAM_NAME'] = e.get('DR_KINESIS_STREAM_NAME', '')
+        params['METRICS_S3_BUCKET'] = self.bucket
+        if self.metrics_prefix is not None:
+            params['METRICS_S3_OBJECT_KEY'] = '{}/TrainingMetrics.json'.format(self.metrics_prefix)
+        else:
+            params['METRICS_S3_OBJECT_KEY'] = 'DeepRacer-Metrics/TrainingMetrics-{}.json'.format(str(round(time.time())))
+        params['MODEL_METADATA_FILE_S3_KEY'] = e.get('DR_LOCAL_S3_MODEL_METADATA_KEY', 'custom_files/model_metadata.json')
+        params['REWARD_FILE_S3_KEY'] = e.get('DR_LOCAL_S3_REWARD_KEY', 'custom_files/reward_function.py')
+        params['ROBOMAKER_SIMULATION_JOB_ACCOUNT_ID'] = 'Dummy'
+        params['NUM_WORKERS'] = e.get('DR_WORKERS', 1)
+        params['SAGEMAKER_SHARED_S3_BUCKET'] = self.bucket
+        params['SAGEMAKER_SHARED_S3_PREFIX'] = self.model_prefix
+        params['SIMTRACE_S3_BUCKET'] = self.bucket
+        params['SIMTRACE_S3_PREFIX'] = self.model_prefix
+        params['TRAINING_JOB_ARN'] = 'arn:Dummy'
+
+        params.update(self.car())
+        params['CAR_COLOR'] = e.get('DR_CAR_COLOR', 'Red')
+        params['REVERSE_DIR'] = e.get('DR_TRAIN_REVERSE_DIRECTION', False)
+        params['CAMERA_MAIN_ENABLE'] = e.get('DR_CAMERA_MAIN_ENABLE', 'True')
+        params['CAMERA_SUB_ENABLE'] = e.get('DR_CAMERA_SUB_ENABLE', 'True')
+        params['BEST_MODEL_METRIC'] = e.get('DR_TRAIN_BEST_MODEL_METRIC', 'progress')
+
+        return race_type(self.race_type).apply(e, params)
+
+    def training_worker(self, base, worker_env):
+        """
+        Returns the training parameters for a multi-config worker. base is
+        the result of training(); worker_env holds the variables read from
+        worker-N.env, which override the ones from run.env.
+        """
+        e = dict(self.env)
+        e.update(worker_env)
+
+        params = dict(base)
+        for key, var, default in WORKER_FIELDS:
+            params[key] = e.get(var, default)
+        for r in RACE_TYPES.values():
+            for key in r.keys():
+                params.pop(key, None)
+        params = race_type(params['RACE_TYPE']).apply(e, params)
+        params['MULTI_CONFIG'] = self.env.get('DR_TRAIN_MULTI_CONFIG', 'False')
+        return params
+
+    def evaluation(self, eval_time=None):
+        e = self.env
+        if eval_time is None:
+            # Set by the batch evaluation scheduler to keep parallel runs apart.
+            eval_time = e.get('DR_EVAL_TIME') or datetime.now().strftime('%Y%m%d%H%M%S')
+
+        params = {}
+        for key in ('CAR_COLOR', 'BODY_SHELL_TYPE', 'RACER_NAME', 'DISPLAY_NAME', 'MODEL_S3_PREFIX', 'MODEL_S3_BUCKET',
+                    'SIMTRACE_S3_PREFIX', 'SIMTRACE_S3_BUCKET', 'KINESIS_VIDEO_STREAM_NAME', 'METRICS_S3_BUCKET',
+                    'METRICS_S3_OBJECT_KEY', 'MP4_S3_BUCKET', 'MP4_S3_OBJECT_PREFIX'):
+            params[key] = []
+
+        # Basic configuration; including all buckets etc.
+        params['AWS_REGION'] = self.region
+        params['JOB_TYPE'] = 'EVALUATION'
+        params['KINESIS_VIDEO_STREAM_NAME'] = e.get('DR_KINESIS_STREAM_NAME', '')
+        params['ROBOMAKER_SIMULATION_JOB_ACCOUNT_ID'] = 'Dummy'
+
+        params['MODEL_S3_PREFIX'].append(self.model_prefix)
+        params['MODEL_S3_BUCKET'].append(self.bucket)
+        params['SIMTRACE_S3_BUCKET'].append(self.bucket)
+        params['SIMTRACE_S3_PREFIX'].append('{}/evaluation-{}'.format(self.model_prefix, eval_time))
+
+        # Metrics
+        params['METRICS_S3_BUCKET'].append(self.bucket)
+        if self.metrics_prefix is not None:
+            params['METRICS_S3_OBJECT_KEY'].append('{}/EvaluationMetrics-{}.json'.format(self.metrics_prefix, eval_time))
+        else:
+            params['METRICS_S3_OBJECT_KEY'].append('DeepRacer-Metrics/EvaluationMetrics-{}.json'.format(eval_time))
+
+        # MP4 configuration / sav
+        save_mp4 = str2bool(e.get("DR_EVAL_SAVE_MP4", "False"))
+        if save_mp4:
+            params['MP4_S3_BUCKET'].append(self.bucket)
+            params['MP4_S3_OBJECT_PREFIX'].append('{}/{}'.format(e.get('DR_LOCAL_S3_MODEL_PREFIX', 'bucket'), 'mp4'))
+
+        # Checkpoint
+        params['EVAL_CHECKPOINT'] = e.get('DR_EVAL_CHECKPOINT', 'last')
+
+        # Car and training
+        body_shell_type = e.get('DR_CAR_BODY_SHELL_TYPE', 'deepracer')
+        params['BODY_SHELL_TYPE'].append(body_shell_type)
+        if body_shell_type == 'deepracer':
+            params['CAR_COLOR'].append(e.get('DR_CAR_COLOR', 'Red'))
+        params['DISPLAY_NAME'].append(e.get('DR_DISPLAY_NAME', 'racer1'))
+        params['RACER_NAME'].append(e.get('DR_RACER_NAME', 'racer1'))
+
+        params['RACE_TYPE'] = self.race_type
+        params['WORLD_NAME'] = e.get('DR_WORLD_NAME', 'LGSWide')
+        params['NUMBER_OF_TRIALS'] = e.get('DR_EVAL_NUMBER_OF_TRIALS', '5')
+        params['ENABLE_DOMAIN_RANDOMIZATION'] = e.get('DR_ENABLE_DOMAIN_RANDOMIZATION', 'false')
+        params['RESET_BEHIND_DIST'] = e.get('DR_EVAL_RESET_BEHIND_DIST', '1.0')
+
+        params['IS_CONTINUOUS'] = e.get('DR_EVAL_IS_CONTINUOUS', 'True')
+        params['NUMBER_OF_RESETS'] = e.get('DR_EVAL_MAX_RESETS', '0')
+
+        params['OFF_TRACK_PENALTY'] = e.get('DR_EVAL_OFF_TRACK_PENALTY', '5.0')
+        params['COLLISION_PENALTY'] = e.get('DR_COLLISION_PENALTY', '5.0')
+
+        params['CAMERA_MAIN_ENABLE'] = e.get('DR_CAMERA_MAIN_ENABLE', 'True')
+        params['CAMERA_SUB_ENABLE'] = e.get('DR_CAMERA_SUB_ENABLE', 'True')
+        params['REVERSE_DIR'] = e.get('DR_EVAL_REVERSE_DIRECTION', False)
+
+        race_type(self.race_type).apply(e, params)
+
+        # Head to Model
+        if self.race_type == 'HEAD_TO_MODEL':
+            opp_prefix = e.get('DR_EVAL_OPP_S3_MODEL_PREFIX', 'rl-deepracer-sagemaker')
+            params['MODEL_S3_PREFIX'].append(opp_prefix)
+            params['MODEL_S3_BUCKET'].append(self.bucket)
+            params['SIMTRACE_S3_BUCKET'].append(self.bucket)
+            params['SIMTRACE_S3_PREFIX'].append(opp_prefix)
+
+            # Metrics
+            params['METRICS_S3_BUCKET'].append(self.bucket)
+            opp_metrics_prefix = e.get('DR_EVAL_OPP_S3_METRICS_PREFIX', '{}/{}'.format(opp_prefix, 'metrics'))
+            params['METRICS_S3_OBJECT_KEY'].append('{}/EvaluationMetrics-{}.json'.format(opp_metrics_prefix, eval_time))
+
+            # MP4 configuration / sav
+            if save_mp4:
+                params['MP4_S3_BUCKET'].append(self.bucket)
+                params['MP4_S3_OBJECT_PREFIX'].append('{}/{}'.format(e.get('DR_EVAL_OPP_MODEL_PREFIX', 'bucket'), 'mp4'))
+
+            # Car and training
+            params['DISPLAY_NAME'].append(e.get('DR_EVAL_OPP_DISPLAY_NAME', 'racer1'))
+            params['RACER_NAME'].append(e.get('DR_EVAL_OPP_RACER_NAME', 'racer1'))
+
+            params['BODY_SHELL_TYPE'].append(e.get('DR_EVAL_OPP_CAR_BODY_SHELL_TYPE', 'deepracer'))
+            params['VIDEO_JOB_TYPE'] = 'EVALUATION'
+            params['CAR_COLOR'] = ['Purple', 'Orange']
+            params['MODEL_NAME'] = params['DISPLAY_NAME']
+
+        return params
+
+    def upload(self, target_bucket=None, target_prefix=None):
+        """Parameter file that accompanies a model uploaded to the DeepRacer console."""
+        e = self.env
+        if target_bucket is None:
+            target_bucket = e.get('TARGET_S3_BUCKET', 'bucket')
+        if target_prefix is None:
+            target_prefix = e.get('TARGET_S3_PREFIX', 'rl-deepracer-sagemaker')
+
+        params = {}
+        params['AWS_REGION'] = self.region
+        params['JOB_TYPE'] = 'TRAINING'
+        params['METRICS_S3_BUCKET'] = target_bucket
+        params['METRICS_S3_OBJECT_KEY'] = "{}/TrainingMetrics.json".format(target_prefix)
+        params['MODEL_METADATA_FILE_S3_KEY'] = "{}/model/model_metadata.json".format(target_prefix)
+        params['REWARD_FILE_S3_KEY'] = "{}/reward_function.py".format(target_prefix)
+        params['SAGEMAKER_SHARED_S3_BUCKET'] = target_bucket
+        params['SAGEMAKER_SHARED_S3_PREFIX'] = target_prefix
+
+        params.update(self.car())
+        return race_type(self.race_type).apply(e, params)
+
+
+def dump(params, stream=None):
+    """Serializes params in the format expected by the Robomaker container."""
+    import yaml
+    return yaml.dump(params, stream, default_flow_style=False, default_style='\'', explicit_start=True)
+
+
+def save_local(params, name, env=os.environ):
+    """
+    Writes a copy of params into $DR_DIR/tmp if DR_SAVE_PARAMS_FILE is True.
+    The file name is unique, so parallel runs do not overwrite each other.
+    Returns the path, or None if no copy was requested.
+    """
+    if not str2bool(env.get('DR_SAVE_PARAMS_FILE', 'False')):
+        return None
+
+    import tempfile
+    tmp_dir = os.path.join(env.get('DR_DIR', '.'), 'tmp')
+    os.makedirs(tmp_dir, exist_ok=True)
+    fd, path = tempfile.mkstemp(prefix='{}-{}-'.format(name, datetime.now().strftime('%Y%m%d%H%M%S')),
+                                suffix='.yaml', dir=tmp_dir)
+    with os.fdopen(fd, 'w') as yaml_file:
+        dump(params, yaml_file)
+    return path
+
+
+def yaml_key(prefix, name):
+    return os.path.normpath(os.path.join(prefix, name))
+
+
+def simulation_reward_key(env=os.environ):
+    """
+    Key of the reward function as wrapped for the simulation by
+    dr-upload-custom-files; the model keeps DR_LOCAL_S3_REWARD_KEY.
+    """
+    reward_key = env.get('DR_LOCAL_S3_REWARD_KEY', 'custom_files/reward_function.py')
+    return env.get('DR_LOCAL_S3_SIMULATION_REWARD_KEY') or os.path.splitext(reward_key)[0] + '_simulation.py'
+
+
+def worker_yaml_name(yaml_name, worker):
+    """training_params.yaml -> training_params_<worker>.yaml"""
+    return yaml_name.split('.')[0] + "_%d.yaml" % worker
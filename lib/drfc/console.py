@@ -0,0 +1,120 @@
+"""
+Lookups against the AWS DeepRacer console API.
+
+Model name -> ARN and leaderboard GUID -> ARN mappings are kept in a JSON
+cache in $DR_DIR/tmp/console/, one file per profile. Entries older than the
+TTL are refreshed, and a name that is not in the cache triggers one full
+paginated listing before the lookup gives up, so new models and boards are
+found without waiting for the TTL. Cached models can still be deleted or
+re-created in the console; callers that need certainty look up fresh, and
+callers that hit an error with a cached ARN forget it.
+"""
+
+import json
+import os
+import time
+
+DEFAULT_TTL = 24 * 3600
+
+
+def deepracer_client(profile=None, region='us-east-1'):
+    """Returns a DeepRacer console client, as provided by deepracer-utils."""
+    import boto3
+    from deepracer import boto3_enhancer
+
+    if profile:
+        session = boto3.session.Session(region_name=region, profile_name=profile)
+    else:
+        session = boto3.session.Session(region_name=region)
+    return boto3_enhancer.deepracer_client(session=session)
+
+
+def leaderboard_guid(guid_or_arn):
+    """Returns the GUID of a leaderboard given either its GUID or ARN."""
+    return guid_or_arn.rsplit('/', 1)[-1]
+
+
+class ConsoleLookup:
+
+    def __init__(self, dr, profile=None, cache_dir=None, ttl=DEFAULT_TTL):
+        self.dr = dr
+        self.ttl = ttl
+        if cache_dir is None:
+            cache_dir = os.path.join(os.environ.get('DR_DIR', '.'), 'tmp', 'console')
+        self.cache_file = os.path.join(cache_dir, '{}.json'.format(profile or 'default'))
+        self.cache = {'models': {}, 'leaderboards': {}, 'updated': {}}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.cache_file) as f:
+                self.cache.update(json.load(f))
+        except (OSError, ValueError):
+            pass
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+        tmp_file = self.cache_file + '.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump(self.cache, f)
+        os.replace(tmp_file, self.cache_file)
+
+    def _expired(self, kind):
+        return time.time() - self.cache['updated'].get(kind, 0) > self.ttl
+
+    def _pages(self, method, key, **kwargs):
+        response = method(MaxResults=50, **kwargs)
+        yield response[key]
+        while 'NextToken' in response:
+            response = method(MaxResults=50, NextToken=response['NextToken'], **kwargs)
+            yield response[key]
+
+    def refresh_models(self):
+        models = {}
+        for page in self._pages(self.dr.list_models, 'Models', ModelType='REINFORCEMENT_LEARNING'):
+            for m in page:
+                models[m['ModelName']] = m['ModelArn']
+        self.cache['models'] = models
+        self.cache['updated']['models'] = time.time()
+        self.save()
+
+    def refresh_leaderboards(self):
+        leaderboards = {}
+        for page in self._pages(self.dr.list_leaderboards, 'Leaderboards'):
+            for b in page:
+                leaderboards[leaderboard_guid(b['Arn'])] = b['Arn']
+        self.cache['leaderboards'] = leaderboards
+        self.cache['updated']['leaderboards'] = time.time()
+        self.save()
+
+    def _lookup(self, kind, name, refresh):
+        if self._expired(kind):
+            refresh()
+        elif name not in self.cache[kind]:
+            # A miss may just be a new entry; re-list once.
+            refresh()
+        return self.cache[kind].get(name)
+
+    def model_arn(self, model_name, fresh=False):
+        """
+        Returns the ARN of the model with the given name, or None. With
+        fresh, the models are listed again even if the cache is current.
+        """
+        if fresh:
+            self.refresh_models()
+            return self.cache['models'].get(model_name)
+        return self._lookup('models', model_name, self.refresh_models)
+
+    def leaderboard_arn(self, guid_or_arn):
+        """Returns the ARN of the leaderboard with the given GUID (or ARN), or None."""
+        return self._lookup('leaderboards', leaderboard_guid(guid_or_arn), self.refresh_leaderboards)
+
+    def forget_model(self, model_name):
+        """Drops a cached model ARN that turned out to be stale, e.g. after a failed call."""
+        if self.cache['models'].pop(model_name, None) is not None:
+            self.save()
+
+    def add_model(self, model_name, model_arn):
+        """Records a model created by this process (e.g. by import_model)."""
+        self.cache['models'][model_name] = model_arn
+        self.save()
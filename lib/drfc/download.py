@@ -0,0 +1,122 @@
+"""
+HTTP downloads of leaderboard assets (Robomaker logs, videos).
+
+A file is written to '<name>.part' and only renamed to its final name once
+its size matches the size announced by the server, so an existing final
+file is always complete. An interrupted download is resumed from the end
+of the .part file with a Range request, also by a later run.
+"""
+
+import os
+import shutil
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class IncompleteDownload(Exception):
+    pass
+
+
+def expected_size(response, offset):
+    """Returns the full size of the object from Content-Range or Content-Length, or None."""
+    content_range = response.headers.get('Content-Range')
+    if content_range and '/' in content_range:
+        total = content_range.rsplit('/', 1)[1]
+        return int(total) if total.isdigit() else None
+    length = response.headers.get('Content-Length')
+    if length is None:
+        return None
+    return int(length) + (offset if response.status == 206 else 0)
+
+
+def download(url, path, retries=3, timeout=60):
+    """
+    Downloads url to path unless path exists. Returns True if the file was
+    downloaded, raises IncompleteDownload if it could not be completed.
+    """
+    if os.path.isfile(path):
+        return False
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    part = path + '.part'
+
+    for attempt in range(retries):
+        offset = os.path.getsize(part) if os.path.isfile(part) else 0
+        request = urllib.request.Request(url)
+        if offset:
+            request.add_header('Range', 'bytes={}-'.format(offset))
+        try:
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                if offset and response.status != 206:
+                    # Server ignored the range; start over.
+                    offset = 0
+                size = expected_size(response, offset)
+                with open(part, 'ab' if offset else 'wb') as f:
+                    shutil.copyfileobj(response, f, CHUNK_SIZE)
+        except urllib.error.HTTPError as e:
+            if e.code != 416 or not offset:
+                raise
+            # Range not satisfiable: the .part file is complete, or stale.
+            size = expected_size(e, 0)
+            if size is None:
+                os.remove(part)
+                continue
+        except OSError:
+            if attempt == retries - 1:
+                raise
+            continue
+
+        actual = os.path.getsize(part)
+        if size is None or actual == size:
+            os.replace(part, path)
+            return True
+        if actual > size:
+            os.remove(part)
+
+    raise IncompleteDownload('{}: download incomplete after {} attempts'.format(path, retries))
+
+
+class Downloader:
+    """
+    Runs downloads on a bounded thread pool. submit() may be called from
+    several threads (e.g. the daemon workers of submit-monitor.py); the
+    futures are only touched under self.lock.
+    """
+
+    def __init__(self, max_workers=4, verbose=True):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.verbose = verbose
+        self.lock = threading.Lock()
+        self.futures = {}
+
+    def _download(self, url, path):
+        if self.verbose:
+            print('Downloading {}'.format(os.path.basename(path)))
+        try:
+            return download(url, path)
+        except (OSError, IncompleteDownload) as e:
+            print('WARNING: Download of {} failed: {}'.format(os.path.basename(path), e))
+            return False
+
+    def submit(self, url, path):
+        """Queues a download, unless path exists or is already being downloaded."""
+        with self.lock:
+            self.futures = {p: f for p, f in self.futures.items() if not f.done()}
+            if os.path.isfile(path) or path in self.futures:
+                return None
+            future = self.executor.submit(self._download, url, path)
+            self.futures[path] = future
+            return future
+
+    def wait(self):
+        """Waits for all queued downloads; returns the number of files downloaded."""
+        with self.lock:
+            futures, self.futures = self.futures, {}
+        return sum(1 for f in futures.values() if f.result())
+
+    def close(self):
+        self.wait()
+        self.executor.shutdown()
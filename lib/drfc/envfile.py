@@ -0,0 +1,128 @@
+"""
+Parser for the KEY=value files (system.env, run.env, worker-N.env).
+
+A line is `KEY=value` or `export KEY=value`; blank lines and lines starting
+with # are skipped. The value is read as bash would: 'single quotes' are
+literal, "double quotes" and unquoted text expand $VAR and ${VAR}, a
+backslash escapes the next character, and unquoted text ends at the first
+blank (anything after it, e.g. a # comment, is ignored). Values may
+contain '='.
+
+read_env() returns the expanded values for Python. render() turns the
+files into a shell script of `export KEY="..."` lines that keeps the
+references as ${VAR}, so that bash expands them in the same order when the
+script is sourced; dr-update-env caches that script in $DR_DIR/tmp/env and
+only renders it again when system.env or the run.env are newer.
+"""
+
+import os
+import re
+
+_KEY_RE = re.compile(r'(?:export\s+)?([A-Za-z_][A-Za-z0-9_]*)=')
+_NAME_RE = re.compile(r'[A-Za-z_][A-Za-z0-9_]*')
+
+
+def _variable(raw, i):
+    """Parses a reference at raw[i] == '$'. Returns (name or None, next index)."""
+    if raw.startswith('${', i):
+        end = raw.find('}', i + 2)
+        if end > 0 and _NAME_RE.fullmatch(raw[i + 2:end]):
+            return raw[i + 2:end], end + 1
+        raise ValueError('bad substitution in {!r}'.format(raw))
+    m = _NAME_RE.match(raw, i + 1)
+    if m:
+        return m.group(0), m.end()
+    return None, i + 1
+
+
+def parse_value(raw):
+    """Returns the value as a list of ('text', str) and ('var', name) parts."""
+    parts = []
+
+    def text(s):
+        if parts and parts[-1][0] == 'text':
+            parts[-1] = ('text', parts[-1][1] + s)
+        elif s:
+            parts.append(('text', s))
+
+    i = 0
+    quote = None
+    while i < len(raw):
+        c = raw[i]
+        if quote == "'":
+            end = raw.find("'", i)
+            if end < 0:
+                raise ValueError('unterminated quote in {!r}'.format(raw))
+            text(raw[i:end])
+            quote = None
+            i = end + 1
+        elif c == '\\' and i + 1 < len(raw) and (quote is None or raw[i + 1] in '"\\$`'):
+            text(raw[i + 1])
+            i += 2
+        elif c == '$':
+            name, i = _variable(raw, i)
+            if name:
+                parts.append(('var', name))
+            else:
+                text('$')
+        elif c == '"':
+            quote = None if quote == '"' else '"'
+            i += 1
+        elif c == "'" and quote is None:
+            quote = "'"
+            i += 1
+        elif c in ' \t' and quote is None:
+            break
+        else:
+            text(c)
+            i += 1
+    if quote:
+        raise ValueError('unterminated quote in {!r}'.format(raw))
+    return parts
+
+
+def parse(path):
+    """Yields (key, parts) for every assignment in the file."""
+    with open(path) as f:
+        for n, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            m = _KEY_RE.match(line)
+            if not m:
+                raise ValueError('{}:{}: expected KEY=value, got {!r}'.format(path, n, line))
+            try:
+                yield m.group(1), parse_value(line[m.end():])
+            except ValueError as e:
+                raise ValueError('{}:{}: {}'.format(path, n, e))
+
+
+def expand(parts, env):
+    return ''.join(v if kind == 'text' else env.get(v, '') for kind, v in parts)
+
+
+def read_env(path, env=None):
+    """
+    Returns {key: value} of the file, in file order. References are
+    expanded from the earlier lines of the file, then from env (defaults
+    to os.environ).
+    """
+    scope = dict(os.environ if env is None else env)
+    values = {}
+    for key, parts in parse(path):
+        values[key] = scope[key] = expand(parts, scope)
+    return values
+
+
+def _quote(s):
+    return s.replace('\\', '\\\\').replace('"', '\\"').replace('$', '\\$').replace('`', '\\`')
+
+
+def render(paths):
+    """Returns a shell script that exports the variables of all files, in order."""
+    lines = ['# Rendered from {}; do not edit.'.format(' '.join(paths))]
+    for path in paths:
+        for key, parts in parse(path):
+            value = ''.join(_quote(v) if kind == 'text' else '${' + v + '}' for kind, v in parts)
+            lines.append('export {}="{}"'.format(key, value))
+    return '\n'.join(lines) + '\n'
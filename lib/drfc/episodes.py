@@ -0,0 +1,168 @@
+"""
+Episode index over the simtrace store written by drfc.simtrace.
+
+Next to every ingested partition file two NumPy files are written:
+
+    _<phase>.steps.npy     float64 matrix of the STEP_COLUMNS, one row per step
+    _<phase>.episodes.npy  (episode, start_row, stop_row) per episode
+
+The leading underscore makes Arrow's dataset discovery skip them.
+
+EpisodeIndex merges the per-partition episode tables into one index in
+<store>/_episode_index.npy and opens the step matrices memory-mapped, so
+that fetching a single episode only reads that episode's rows. Runs and
+step matrix paths are stored in the index as ids into the string table
+<store>/_episode_index.json; runs are numbered in sorted order, so the
+index sorted by its key fields is also sorted by run name, and an episode
+is found by binary search over the key fields.
+"""
+
+import glob
+import json
+import os
+
+import numpy as np
+
+STEP_COLUMNS = ('episode', 'steps', 'X', 'Y', 'yaw', 'steer', 'throttle', 'action', 'reward',
+                'progress', 'closest_waypoint', 'track_len', 'tstamp')
+
+INDEX_FILE = '_episode_index.npy'
+STRINGS_FILE = '_episode_index.json'
+KEY_FIELDS = ('run', 'worker', 'iteration', 'phase', 'episode')
+KEY_DTYPE = np.dtype([('run', 'i4'), ('worker', 'i4'), ('iteration', 'i4'), ('phase', 'U10'), ('episode', 'i8')])
+INDEX_DTYPE = np.dtype(KEY_DTYPE.descr + [('start', 'i8'), ('stop', 'i8'), ('path', 'i4')])
+
+
+def _column(table, name):
+    if name not in table.column_names:
+        return np.full(table.num_rows, np.nan)
+    try:
+        return np.asarray(table.column(name).to_numpy(zero_copy_only=False), dtype=float)
+    except (TypeError, ValueError):
+        return np.full(table.num_rows, np.nan)
+
+
+def write_partition(table, path):
+    """Writes the step matrix and episode table for one ingested partition file."""
+    directory, name = os.path.split(path)
+    base = os.path.join(directory, '_' + os.path.splitext(name)[0])
+    steps = np.stack([_column(table, c) for c in STEP_COLUMNS], axis=1)
+    np.save(base + '.steps.npy', steps)
+
+    episode = steps[:, 0]
+    if len(episode):
+        bounds = np.flatnonzero(np.diff(episode)) + 1
+        starts = np.concatenate([[0], bounds])
+        stops = np.concatenate([bounds, [len(episode)]])
+        table = np.stack([episode[starts].astype(np.int64), starts, stops], axis=1)
+    else:
+        table = np.empty((0, 3), dtype=np.int64)
+    np.save(base + '.episodes.npy', table)
+
+
+def _partition_keys(path, store):
+    """Extracts run, worker, iteration and phase from a partition path."""
+    parts = dict(p.split('=', 1) for p in os.path.relpath(path, store).split(os.sep)[:-1])
+    phase = os.path.basename(path).lstrip('_').split('.')[0]
+    return parts['run'].replace('__', '/'), int(parts['worker']), int(parts['iteration']), phase
+
+
+def build_index(store):
+    """
+    (Re)builds <store>/_episode_index.npy and its string table from the
+    per-partition episode tables. Returns (index, strings).
+    """
+    partitions = []
+    for path in sorted(glob.glob(os.path.join(store, 'run=*', 'worker=*', 'iteration=*', '_*.episodes.npy'))):
+        steps_path = path.replace('.episodes.npy', '.steps.npy')
+        partitions.append((_partition_keys(path, store), os.path.relpath(steps_path, store), np.load(path)))
+
+    runs = sorted({keys[0] for keys, _, _ in partitions})
+    run_ids = {run: i for i, run in enumerate(runs)}
+    strings = {'runs': runs, 'paths': [rel_path for _, rel_path, _ in partitions]}
+
+    index = np.empty(sum(len(table) for _, _, table in partitions), dtype=INDEX_DTYPE)
+    row = 0
+    for path_id, ((run, worker, iteration, phase), _, table) in enumerate(partitions):
+        rows = index[row:row + len(table)]
+        rows['run'], rows['worker'], rows['iteration'], rows['phase'] = run_ids[run], worker, iteration, phase
+        rows['episode'], rows['start'], rows['stop'] = table[:, 0], table[:, 1], table[:, 2]
+        rows['path'] = path_id
+        row += len(table)
+    index.sort(order=list(KEY_FIELDS))
+
+    tmp_path = os.path.join(store, STRINGS_FILE + '.tmp')
+    with open(tmp_path, 'w') as f:
+        json.dump(strings, f)
+    os.replace(tmp_path, os.path.join(store, STRINGS_FILE))
+    tmp_path = os.path.join(store, INDEX_FILE + '.tmp.npy')
+    np.save(tmp_path, index)
+    os.replace(tmp_path, os.path.join(store, INDEX_FILE))
+    return index, strings
+
+
+class EpisodeIndex:
+
+    def __init__(self, store):
+        self.store = store
+        index_path = os.path.join(store, INDEX_FILE)
+        strings_path = os.path.join(store, STRINGS_FILE)
+        state_path = os.path.join(store, '_ingest_state.json')
+        index = None
+        if os.path.isfile(index_path) and not \
+                (os.path.isfile(state_path) and os.path.getmtime(state_path) > os.path.getmtime(index_path)):
+            try:
+                index = np.load(index_path)
+                with open(strings_path) as f:
+                    strings = json.load(f)
+            except (OSError, ValueError):
+                index = None
+            if index is not None and index.dtype != INDEX_DTYPE:
+                index = None  # written by an older version
+        if index is None:
+            index, strings = build_index(store)
+
+        self.index = index
+        self.runs = strings['runs']
+        self.paths = strings['paths']
+        self._run_ids = {run: i for i, run in enumerate(self.runs)}
+        self._keys = np.empty(len(index), dtype=KEY_DTYPE)
+        for field in KEY_FIELDS:
+            self._keys[field] = index[field]
+        self._mmaps = {}
+
+    def __len__(self):
+        return len(self.index)
+
+    def _steps(self, rel_path):
+        if rel_path not in self._mmaps:
+            self._mmaps[rel_path] = np.load(os.path.join(self.store, rel_path), mmap_mode='r')
+        return self._mmaps[rel_path]
+
+    def run_name(self, row):
+        return self.runs[row['run']]
+
+    def episodes(self, run=None, worker=None, iteration=None, phase=None):
+        """Returns the index rows matching the given filters; runs are ids, see run_name()."""
+        if run is not None:
+            run = self._run_ids.get(run, -1)
+        mask = np.ones(len(self.index), dtype=bool)
+        for field, value in (('run', run), ('worker', worker), ('iteration', iteration), ('phase', phase)):
+            if value is not None:
+                mask &= self.index[field] == value
+        return self.index[mask]
+
+    def get(self, run, worker, iteration, episode, phase='training', columns=None):
+        """
+        Returns the steps of one episode as a read-only view into the
+        memory-mapped step matrix, optionally limited to some columns.
+        """
+        key = np.array((self._run_ids.get(run, -1), worker, iteration, phase, episode), dtype=KEY_DTYPE)
+        i = int(np.searchsorted(self._keys, key))
+        if i == len(self._keys) or self._keys[i] != key:
+            raise KeyError((run, worker, iteration, phase, episode))
+        r = self.index[i]
+        steps = self._steps(self.paths[r['path']])[r['start']:r['stop']]
+        if columns is not None:
+            steps = steps[:, [STEP_COLUMNS.index(c) for c in columns]]
+        return steps
@@ -0,0 +1,162 @@
+"""
+Batch evaluation of many (model prefix, checkpoint, world, reverse) jobs.
+
+Every job runs scripts/evaluation/start.sh with its own environment: the
+job's DR_* settings, a DR_RUN_ID from a pool of `parallel` ids (so the
+stacks are named deepracer-eval-<id>), a params file name and DR_EVAL_TIME
+unique to the job (so the parameter files and EvaluationMetrics-*.json of
+parallel jobs do not clash). A job is finished once its metrics file holds
+a record for every trial, or its Robomaker container is gone; the stack is
+then removed with scripts/evaluation/stop.sh and the next job takes its id.
+"""
+
+import itertools
+import json
+import os
+import queue
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from drfc import throughput
+
+
+def matrix(prefixes, checkpoints=('last',), worlds=(None,), reverse=(False,)):
+    """Returns the cross product of the given values as a list of jobs."""
+    return [{'prefix': p, 'checkpoint': str(c), 'world': w, 'reverse': r}
+            for p, c, w, r in itertools.product(prefixes, checkpoints, worlds, reverse)]
+
+
+def read_jobs(path):
+    """Reads '<model prefix> <checkpoint> <world> [reverse]' lines, ignoring blank lines and comments."""
+    jobs = []
+    with open(path) as f:
+        for line in f:
+            fields = line.split('#', 1)[0].split()
+            if not fields:
+                continue
+            if len(fields) < 3:
+                raise ValueError("Expected '<model prefix> <checkpoint> <world> [reverse]', got '{}'".format(line.strip()))
+            reverse = len(fields) > 3 and fields[3].lower() in ('reverse', 'true', '1')
+            jobs.append({'prefix': fields[0], 'checkpoint': fields[1], 'world': fields[2], 'reverse': reverse})
+    return jobs
+
+
+def job_name(job):
+    return '{}-{}-{}{}'.format(job['prefix'].replace('/', '_'), job['checkpoint'], job['world'],
+                               '-reverse' if job['reverse'] else '')
+
+
+def job_env(env, job, run_id, eval_time):
+    e = dict(env)
+    e['DR_RUN_ID'] = str(run_id)
+    e['DR_LOCAL_S3_MODEL_PREFIX'] = job['prefix']
+    e['DR_LOCAL_S3_METRICS_PREFIX'] = '{}/metrics'.format(job['prefix'])
+    e['DR_EVAL_CHECKPOINT'] = job['checkpoint']
+    if job['world']:
+        e['DR_WORLD_NAME'] = job['world']
+    e['DR_EVAL_REVERSE_DIRECTION'] = str(bool(job['reverse']))
+    e['DR_EVAL_TIME'] = eval_time
+    e['DR_LOCAL_S3_EVAL_PARAMS_FILE'] = 'eval_params-{}.yaml'.format(eval_time)
+    if e.get('DR_DOCKER_STYLE', '').lower() == 'swarm':
+        e['DR_ROBOMAKER_EVAL_PORT'] = str(8180 + run_id)
+        e['DR_ROBOMAKER_GUI_PORT'] = str(5900 + run_id)
+    return e
+
+
+def summarize(records):
+    """Returns the aggregates of the trial records of an EvaluationMetrics file."""
+    trials = [r for r in records if 'trial' in r]
+    completed = [r for r in trials if r.get('episode_status') == 'Lap complete']
+    laps = [r['elapsed_time_in_milliseconds'] for r in completed if 'elapsed_time_in_milliseconds' in r]
+    return {
+        'trials': len(trials),
+        'completed': len(completed),
+        'mean_progress': round(sum(float(r.get('completion_percentage', 0)) for r in trials) / len(trials), 2) if trials else None,
+        'mean_lap_ms': round(sum(laps) / len(laps)) if laps else None,
+        'best_lap_ms': min(laps) if laps else None,
+        'off_track': sum(int(r.get('off_track_count', 0)) for r in trials),
+        'crashes': sum(int(r.get('crash_count', 0)) for r in trials),
+    }
+
+
+class EvalScheduler:
+
+    def __init__(self, s3_client, env, parallel=2, first_run_id=10, poll=30, timeout=3600, dry_run=False):
+        self.s3_client = s3_client
+        self.env = dict(env)
+        self.bucket = env.get('DR_LOCAL_S3_BUCKET', 'bucket')
+        self.trials = int(env.get('DR_EVAL_NUMBER_OF_TRIALS', '5'))
+        self.parallel = parallel
+        self.poll = poll
+        self.timeout = timeout
+        self.dry_run = dry_run
+        self.run_ids = queue.Queue()
+        for run_id in range(first_run_id, first_run_id + parallel):
+            self.run_ids.put(run_id)
+        self.lock = threading.Lock()
+        self.counter = 0
+
+    def _script(self, name, env, *args):
+        path = os.path.join(env['DR_DIR'], 'scripts', 'evaluation', name)
+        return subprocess.run([path] + list(args), cwd=os.path.dirname(path), env=env,
+                              stdout=subprocess.PIPE, stderr=subprocess.STDOUT, check=False)
+
+    def _eval_time(self):
+        with self.lock:
+            self.counter += 1
+            return '{}-{:03d}'.format(datetime.now().strftime('%Y%m%d%H%M%S'), self.counter)
+
+    def _metrics(self, key):
+        from botocore.exceptions import ClientError
+        try:
+            body = self.s3_client.get_object(Bucket=self.bucket, Key=key)['Body'].read()
+            return json.loads(body).get('metrics', [])
+        except (ClientError, ValueError):
+            return []
+
+    def _running(self, run_id):
+        out = throughput.docker('ps', '--filter', 'name=deepracer-eval-{}_robomaker'.format(run_id), '--format', '{{.ID}}')
+        return bool(out.strip())
+
+    def run_job(self, job):
+        run_id = self.run_ids.get()
+        try:
+            eval_time = self._eval_time()
+            env = job_env(self.env, job, run_id, eval_time)
+            key = '{}/EvaluationMetrics-{}.json'.format(env['DR_LOCAL_S3_METRICS_PREFIX'], eval_time)
+            print('Starting {} as deepracer-eval-{}'.format(job_name(job), run_id))
+            if self.dry_run:
+                return dict(job, run_id=run_id, metrics_key=key, **summarize([]))
+
+            result = self._script('start.sh', env, '-q')
+            if result.returncode != 0:
+                print('ERROR: {} did not start:\n{}'.format(job_name(job), result.stdout.decode('utf-8', 'replace')))
+                return dict(job, run_id=run_id, metrics_key=key, error='start failed', **summarize([]))
+
+            deadline = time.time() + self.timeout
+            started = False
+            records = []
+            while time.time() < deadline:
+                time.sleep(self.poll)
+                records = self._metrics(key)
+                if len([r for r in records if 'trial' in r]) >= self.trials:
+                    break
+                running = self._running(run_id)
+                started = started or running
+                if started and not running:
+                    break
+
+            self._script('stop.sh', env)
+            summary = summarize(self._metrics(key) or records)
+            print('Finished {}: {} of {} trials completed'.format(job_name(job), summary['completed'], summary['trials']))
+            return dict(job, run_id=run_id, metrics_key=key, **summary)
+        finally:
+            self.run_ids.put(run_id)
+
+    def run(self, jobs):
+        """Runs all jobs, at most `parallel` at a time. Returns one result per job, in order."""
+        with ThreadPoolExecutor(max_workers=self.parallel) as executor:
+            return list(executor.map(self.run_job, jobs))
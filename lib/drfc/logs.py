@@ -0,0 +1,206 @@
+"""
+Aggregated logs of all containers of a training or evaluation stack.
+
+Every source (a container followed with `docker logs -f`, or a recorded
+log file) is read by its own thread. Lines are tagged with the source name
+(sagemaker, robomaker-1, ...), kept in a per-source ring buffer of the
+most recent lines, and passed on only if they match the filters; a match
+can be shown with the lines that preceded it from the ring buffer. The
+output goes to the terminal and optionally to a file that is rotated at
+a size limit, the rotated files being gzip-compressed.
+"""
+
+import collections
+import gzip
+import os
+import queue
+import re
+import shutil
+import subprocess
+import sys
+import threading
+
+from drfc import throughput
+
+FILTERS = {
+    'errors': r'(?i)\b(error|exception|traceback|fatal|killed)\b',
+    'rtf': throughput.TIME_RE.pattern,
+    'episodes': r'SIM_TRACE_LOG|Training> |Evaluation> ',
+}
+
+LogLine = collections.namedtuple('LogLine', 'source text context')
+
+
+class DockerLogSource:
+
+    def __init__(self, name, container, since='5m', follow=True):
+        self.name = name
+        self.container = container
+        self.since = since
+        self.follow = follow
+        self.process = None
+
+    def lines(self):
+        args = ['docker', 'logs']
+        if self.follow:
+            args.append('-f')
+        if self.since:
+            args.extend(['--since', self.since])
+        self.process = subprocess.Popen(args + [self.container], stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        for line in self.process.stdout:
+            yield line.decode('utf-8', 'replace').rstrip('\n')
+        self.process.wait()
+
+    def close(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+
+
+class FileLogSource:
+    """A recorded log, e.g. the output of `docker logs` saved to a file."""
+
+    def __init__(self, name, path):
+        self.name = name
+        self.path = path
+
+    def lines(self):
+        with open(self.path, errors='replace') as f:
+            for line in f:
+                yield line.rstrip('\n')
+
+    def close(self):
+        pass
+
+
+def sagemaker_container(model_prefix):
+    """
+    Returns the id of the Sagemaker container training model_prefix, found
+    through the compose file Sagemaker writes below /tmp/sagemaker, or None.
+    """
+    out = throughput.docker('ps', '--format', '{{.ID}} {{.Names}} {{.Image}}')
+    candidates = [line.split()[:2] for line in out.splitlines() if 'sagemaker' in line.split(' ', 2)[-1]]
+    for cid, name in candidates:
+        m = re.match(r'(.*)_(algo.*)_.', name)
+        if not m:
+            continue
+        for dirpath, _, filenames in os.walk('/tmp/sagemaker'):
+            if m.group(1) in dirpath and 'docker-compose.yaml' in filenames:
+                try:
+                    with open(os.path.join(dirpath, 'docker-compose.yaml')) as f:
+                        if model_prefix in f.read():
+                            return cid
+                except OSError:
+                    pass
+    return candidates[0][0] if len(candidates) == 1 else None
+
+
+def stack_sources(run_id, model_prefix=None, evaluation=False, since='5m', follow=True):
+    """Returns the sources of the Sagemaker container (training only) and all Robomaker workers."""
+    sources = []
+    if not evaluation and model_prefix:
+        cid = sagemaker_container(model_prefix)
+        if cid:
+            sources.append(DockerLogSource('sagemaker', cid, since, follow))
+    for worker, cid in sorted(throughput.robomaker_containers(run_id, evaluation).items()):
+        sources.append(DockerLogSource('robomaker-{}'.format(worker), cid, since, follow))
+    return sources
+
+
+def expected_sources(workers, model_prefix=None, evaluation=False):
+    """Returns the source names stack_sources() yields once the whole stack is up."""
+    names = ['robomaker-{}'.format(i) for i in range(1, workers + 1)]
+    if not evaluation and model_prefix:
+        names.insert(0, 'sagemaker')
+    return names
+
+
+class RotatingWriter:
+    """Appends lines to path; at max_bytes it becomes path.1.gz, keeping `backups` compressed files."""
+
+    def __init__(self, path, max_bytes=50 * 1024 * 1024, backups=5):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.file = open(path, 'a')
+
+    def write(self, line):
+        self.file.write(line + '\n')
+        if self.file.tell() >= self.max_bytes:
+            self.rotate()
+
+    def rotate(self):
+        self.file.close()
+        for i in range(self.backups - 1, 0, -1):
+            older = '{}.{}.gz'.format(self.path, i)
+            if os.path.exists(older):
+                os.replace(older, '{}.{}.gz'.format(self.path, i + 1))
+        if self.backups > 0:
+            with open(self.path, 'rb') as src, gzip.open('{}.1.gz'.format(self.path), 'wb') as dst:
+                shutil.copyfileobj(src, dst)
+        self.file = open(self.path, 'w')
+
+    def close(self):
+        self.file.close()
+
+
+class LogAggregator:
+
+    def __init__(self, sources, include=(), exclude=(), buffer_lines=1000, context=0):
+        self.sources = sources
+        self.include = [re.compile(FILTERS.get(p, p)) for p in include]
+        self.exclude = [re.compile(FILTERS.get(p, p)) for p in exclude]
+        self.context = context
+        self.buffers = {s.name: collections.deque(maxlen=buffer_lines) for s in sources}
+        self.queue = queue.Queue(maxsize=10000)
+
+    def matches(self, text):
+        if any(p.search(text) for p in self.exclude):
+            return False
+        return not self.include or any(p.search(text) for p in self.include)
+
+    def _read(self, source):
+        buffer = self.buffers[source.name]
+        try:
+            for text in source.lines():
+                if self.matches(text):
+                    context = list(buffer)[-self.context:] if self.context else []
+                    self.queue.put(LogLine(source.name, text, context))
+                buffer.append(text)
+        finally:
+            self.queue.put(None)
+
+    def recent(self, name, n=None):
+        """Returns the last n (default all buffered) lines of a source, filtered or not."""
+        lines = list(self.buffers[name])
+        return lines[-n:] if n else lines
+
+    def run(self, out=sys.stdout, writer=None):
+        """Reads all sources until they end or the user interrupts. Returns the number of lines shown."""
+        threads = [threading.Thread(target=self._read, args=(s,), daemon=True) for s in self.sources]
+        for t in threads:
+            t.start()
+        width = max([len(s.name) for s in self.sources] + [0])
+        running = len(threads)
+        shown = 0
+        try:
+            while running:
+                line = self.queue.get()
+                if line is None:
+                    running -= 1
+                    continue
+                for text in line.context + [line.text]:
+                    tagged = '{:<{}} | {}'.format(line.source, width, text)
+                    out.write(tagged + '\n')
+                    if writer:
+                        writer.write(tagged)
+                if line.context:
+                    out.write('--\n')
+                shown += 1
+                out.flush()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            for s in self.sources:
+                s.close()
+        return shown
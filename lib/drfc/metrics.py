@@ -0,0 +1,242 @@
+"""
+Incremental reading of the TrainingMetrics JSON files.
+
+Robomaker rewrites TrainingMetrics.json after every episode, but only ever
+appends to its "metrics" list, so the bytes up to the last record already
+read do not change. MetricsTailer fetches the file from that offset (with a
+Range GET, or a seek in a local copy), parses the complete records that
+follow and folds them into per-iteration aggregates. The last bytes before
+the offset are fetched again and compared; if they differ, or the file got
+shorter, the file was restarted and is read from the beginning.
+
+An iteration is a run of training episodes, closed by the evaluation
+episodes that follow it.
+"""
+
+import json
+import os
+import re
+
+CHECK_BYTES = 16
+METRICS_FILE_RE = re.compile(r'TrainingMetrics(?:_(?P<worker>[0-9]+))?\.json$')
+_decoder = json.JSONDecoder()
+
+
+class S3Source:
+
+    def __init__(self, s3_client, bucket, key):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.key = key
+
+    def read(self, offset):
+        """Returns the bytes from offset to the end of the object, b'' if there are none."""
+        from botocore.exceptions import ClientError
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket, Key=self.key, Range='bytes={}-'.format(offset))
+        except ClientError as e:
+            if e.response.get('Error', {}).get('Code') in ('InvalidRange', 'NoSuchKey', '416'):
+                return b''
+            raise
+        return response['Body'].read()
+
+
+class FileSource:
+
+    def __init__(self, path):
+        self.path = path
+
+    def read(self, offset):
+        try:
+            with open(self.path, 'rb') as f:
+                f.seek(offset)
+                return f.read()
+        except OSError:
+            return b''
+
+
+def parse_records(text, first=False):
+    """
+    Parses the complete JSON objects of the metrics list in text; if first
+    is set, text is the start of the file. Returns the records and the
+    position after the last one.
+    """
+    records = []
+    pos = 0
+    if first:
+        start = text.find('[')
+        if start < 0:
+            return records, 0
+        pos = start + 1
+    while True:
+        while pos < len(text) and text[pos] in ' \t\r\n,':
+            pos += 1
+        if pos >= len(text) or text[pos] != '{':
+            return records, pos
+        try:
+            record, end = _decoder.raw_decode(text, pos)
+        except ValueError:
+            # Incomplete record; read again on the next poll.
+            return records, pos
+        records.append(record)
+        pos = end
+
+
+class IterationStats:
+    """Rolling aggregates of a worker's episodes, per iteration."""
+
+    def __init__(self):
+        self.iterations = []
+        self.phase = None
+
+    def add(self, record):
+        phase = record.get('phase')
+        if phase == 'training' and self.phase != 'training':
+            self.iterations.append({
+                'iteration': len(self.iterations) + 1,
+                'start_time': record.get('start_time'),
+                'training': {'episodes': 0, 'progress': 0.0, 'completed': 0, 'reward': 0.0},
+                'evaluation': {'episodes': 0, 'progress': 0.0, 'completed': 0, 'reward': 0.0},
+            })
+        self.phase = phase
+        if not self.iterations or phase not in ('training', 'evaluation'):
+            return
+        current = self.iterations[-1]
+        if phase == 'evaluation' and 'evaluation_start' not in current:
+            current['evaluation_start'] = record.get('start_time')
+        totals = current[phase]
+        totals['episodes'] += 1
+        totals['progress'] += float(record.get('completion_percentage', 0))
+        totals['completed'] += 1 if record.get('episode_status') == 'Lap complete' else 0
+        totals['reward'] += float(record.get('reward_score', 0))
+        current['end_time'] = record.get('metric_time')
+
+    def summary(self, last=None):
+        """Returns mean progress, completion rate and mean reward per phase for each iteration."""
+        result = []
+        for it in self.iterations[-last:] if last else self.iterations:
+            entry = {'iteration': it['iteration'], 'start_time': it['start_time'], 'end_time': it.get('end_time')}
+            for phase in ('training', 'evaluation'):
+                totals = it[phase]
+                n = totals['episodes']
+                entry[phase] = {
+                    'episodes': n,
+                    'mean_progress': round(totals['progress'] / n, 2) if n else None,
+                    'completion_rate': round(totals['completed'] / n, 3) if n else None,
+                    'mean_reward': round(totals['reward'] / n, 3) if n else None,
+                }
+            result.append(entry)
+        return result
+
+    def to_json(self):
+        return {'iterations': self.iterations, 'phase': self.phase}
+
+    @classmethod
+    def from_json(cls, data):
+        stats = cls()
+        stats.iterations = data.get('iterations', [])
+        stats.phase = data.get('phase')
+        return stats
+
+
+class MetricsTailer:
+
+    def __init__(self, source, state_file=None):
+        self.source = source
+        self.state_file = state_file
+        self.offset = 0
+        self.check = ''
+        self.records = 0
+        self.stats = IterationStats()
+        self._load()
+
+    def _load(self):
+        if not self.state_file:
+            return
+        try:
+            with open(self.state_file) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.offset = state['offset']
+        self.check = state['check']
+        self.records = state['records']
+        self.stats = IterationStats.from_json(state['stats'])
+
+    def save(self):
+        if not self.state_file:
+            return
+        os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+        tmp_file = self.state_file + '.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump({'offset': self.offset, 'check': self.check, 'records': self.records,
+                       'stats': self.stats.to_json()}, f)
+        os.replace(tmp_file, self.state_file)
+
+    def reset(self):
+        self.offset = 0
+        self.check = ''
+        self.records = 0
+        self.stats = IterationStats()
+
+    def poll(self):
+        """Reads and aggregates the records added since the last poll. Returns them."""
+        start = max(0, self.offset - CHECK_BYTES)
+        data = self.source.read(start)
+        if self.offset and data[:self.offset - start].hex() != self.check:
+            self.reset()
+            start = 0
+            data = self.source.read(0)
+
+        text = data[self.offset - start:].decode('utf-8', 'replace')
+        records, pos = parse_records(text, first=self.offset == 0)
+        if records:
+            for record in records:
+                self.stats.add(record)
+            self.records += len(records)
+            self.offset += len(text[:pos].encode('utf-8'))
+            self.check = data[max(0, self.offset - start - CHECK_BYTES):self.offset - start].hex()
+            self.save()
+        return records
+
+
+def metrics_worker(key):
+    """Returns the worker (counted from 1) of a TrainingMetrics file name, or None."""
+    m = METRICS_FILE_RE.search(key)
+    return int(m.group('worker') or 0) + 1 if m else None
+
+
+def state_file(bucket, key, state_dir=None):
+    if state_dir is None:
+        state_dir = os.path.join(os.environ.get('DR_DIR', '.'), 'tmp', 'metrics')
+    return os.path.join(state_dir, bucket, key.replace('/', '__'))
+
+
+class PrefixTailer:
+    """Tails the TrainingMetrics files of all workers below a metrics prefix."""
+
+    def __init__(self, s3_client, bucket, prefix, state_dir=None, persist=True):
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.prefix = prefix.rstrip('/') + '/'
+        self.state_dir = state_dir
+        self.persist = persist
+        self.etags = {}
+        self.tailers = {}
+
+    def poll(self):
+        """Returns {worker: new records} for the files that changed since the last poll."""
+        changed = {}
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self.prefix + 'TrainingMetrics'):
+            for o in page.get('Contents', []):
+                worker = metrics_worker(o['Key'])
+                if worker is None or self.etags.get(o['Key']) == o['ETag']:
+                    continue
+                if worker not in self.tailers:
+                    self.tailers[worker] = MetricsTailer(
+                        S3Source(self.s3_client, self.bucket, o['Key']),
+                        state_file(self.bucket, o['Key'], self.state_dir) if self.persist else None)
+                changed[worker] = self.tailers[worker].poll()
+                self.etags[o['Key']] = o['ETag']
+        return changed
@@ -0,0 +1,178 @@
+"""
+Deduplicated model downloads into the local bucket.
+
+Models of a chain (model-1, model-2, ...) share their metadata,
+hyperparameters and the checkpoints they inherited. Every object that
+ModelDownload puts into the local bucket is recorded in a manifest,
+$DR_DIR/tmp/manifests/<bucket>.json, under the ETag and size of its source.
+A later download of the same content copies that local object server-side
+(CopyObject) instead of fetching it again; all other objects are streamed
+from the source straight into the local bucket, without a copy on the
+host. Objects already in the target with the same ETag and size are
+skipped.
+
+A manifest entry is only used after a HEAD request shows that the local
+object still has the recorded ETag; stale entries are dropped.
+"""
+
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from drfc.transfer import transfer_config
+
+
+def manifest_dir():
+    return os.path.join(os.environ.get('DR_DIR', '.'), 'tmp', 'manifests')
+
+
+def source_id(etag, size):
+    return '{}:{}'.format(etag.strip('"'), size)
+
+
+class LocalManifest:
+    """Maps the (ETag, size) of source objects to their copies in one local bucket."""
+
+    def __init__(self, bucket, root=None):
+        self.path = os.path.join(root or manifest_dir(), '{}.json'.format(bucket))
+        self.lock = threading.Lock()
+        try:
+            with open(self.path) as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_file = self.path + '.tmp'
+        with self.lock:
+            with open(tmp_file, 'w') as f:
+                json.dump(self.entries, f, indent=1, sort_keys=True)
+        os.replace(tmp_file, self.path)
+
+    def lookup(self, etag, size):
+        """Returns {'key', 'etag'} of the local copy of a source object, or None."""
+        with self.lock:
+            return self.entries.get(source_id(etag, size))
+
+    def add(self, etag, size, key, local_etag):
+        with self.lock:
+            self.entries[source_id(etag, size)] = {'key': key, 'etag': local_etag.strip('"')}
+
+    def drop(self, etag, size):
+        with self.lock:
+            self.entries.pop(source_id(etag, size), None)
+
+    def forget_prefix(self, prefix):
+        """Drops the entries of local objects below prefix (e.g. after a wipe); returns how many."""
+        prefix = prefix.strip('/') + '/'
+        with self.lock:
+            stale = [s for s, e in self.entries.items() if e['key'].startswith(prefix)]
+            for s in stale:
+                del self.entries[s]
+        if stale:
+            self.save()
+        return len(stale)
+
+
+def list_objects(s3_client, bucket, prefix):
+    """Returns {key relative to prefix: (etag, size)}."""
+    prefix = prefix.rstrip('/') + '/'
+    objects = {}
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        for o in page.get('Contents', []):
+            objects[o['Key'][len(prefix):]] = (o['ETag'].strip('"'), o['Size'])
+    return objects
+
+
+class ModelDownload:
+    """Copies a model prefix from a remote bucket into the local one, reusing local copies of its files."""
+
+    def __init__(self, source_client, target_client, manifest=None, dry_run=False, max_concurrency=10):
+        self.source = source_client
+        self.target = target_client
+        self.manifest = manifest
+        self.dry_run = dry_run
+        self.max_concurrency = max_concurrency
+        self.config = transfer_config(max_concurrency)
+        self.counts = {'skipped': 0, 'copied': 0, 'downloaded': 0}
+
+    def _local_etag(self, bucket, key):
+        """Returns the ETag of a local object, or None if it does not exist."""
+        from botocore.exceptions import ClientError
+        from drfc.s3 import not_found
+        try:
+            return self.target.head_object(Bucket=bucket, Key=key)['ETag'].strip('"')
+        except ClientError as e:
+            if not_found(e):
+                return None
+            raise
+
+    def _local_copy(self, bucket, etag, size):
+        """Returns the key of a local object with the content of a source object, or None."""
+        entry = self.manifest.lookup(etag, size)
+        if entry is None:
+            return None
+        if self._local_etag(bucket, entry['key']) != entry['etag']:
+            self.manifest.drop(etag, size)
+            return None
+        return entry['key']
+
+    def run(self, src_bucket, src_prefix, dst_bucket, dst_prefix, delete=False):
+        """
+        Copies the objects that differ from the target and records them in
+        the manifest of dst_bucket. Returns the counts of skipped, copied
+        (server-side, from another local prefix) and downloaded objects.
+        """
+        if self.manifest is None:
+            self.manifest = LocalManifest(dst_bucket)
+        source = list_objects(self.source, src_bucket, src_prefix)
+        target = list_objects(self.target, dst_bucket, dst_prefix)
+        dst_prefix = dst_prefix.rstrip('/') + '/'
+
+        def copy(rel):
+            etag, size = source[rel]
+            dst_key = dst_prefix + rel
+            if target.get(rel) == (etag, size):
+                self.manifest.add(etag, size, dst_key, etag)
+                action = 'skipped'
+            else:
+                local_key = self._local_copy(dst_bucket, etag, size)
+                if local_key == dst_key:
+                    # Same content, stored under another ETag (e.g. multipart).
+                    action = 'skipped'
+                elif local_key:
+                    action = 'copied'
+                    if not self.dry_run:
+                        self.target.copy({'Bucket': dst_bucket, 'Key': local_key}, dst_bucket, dst_key,
+                                         Config=self.config)
+                else:
+                    action = 'downloaded'
+                    if not self.dry_run:
+                        body = self.source.get_object(Bucket=src_bucket, Key=src_prefix.rstrip('/') + '/' + rel)['Body']
+                        self.target.upload_fileobj(body, dst_bucket, dst_key, Config=self.config)
+                if action != 'skipped' and not self.dry_run:
+                    local_etag = self._local_etag(dst_bucket, dst_key)
+                    if local_etag is not None:
+                        self.manifest.add(etag, size, dst_key, local_etag)
+            print('{}{}: {}'.format('(dryrun) ' if self.dry_run else '', action, rel))
+            return action
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            for action in executor.map(copy, sorted(source)):
+                self.counts[action] += 1
+
+        stale = [dst_prefix + rel for rel in target if rel not in source]
+        if delete and stale:
+            for key in stale:
+                print('{}delete: s3://{}/{}'.format('(dryrun) ' if self.dry_run else '', dst_bucket, key))
+            if not self.dry_run:
+                for i in range(0, len(stale), 1000):
+                    self.target.delete_objects(Bucket=dst_bucket, Delete={
+                        'Objects': [{'Key': k} for k in stale[i:i + 1000]], 'Quiet': True})
+
+        if not self.dry_run:
+            self.manifest.save()
+        return self.counts
@@ -0,0 +1,194 @@
+"""
+CPU and memory placement of the Sagemaker and Robomaker containers.
+
+The host topology is read from sysfs: the CPUs of every NUMA node, grouped
+into physical cores (a core and its hyper-threads stay together). Sagemaker
+gets the first cores of node 0, and every Robomaker worker gets its own set
+of whole cores within a single node, so that no two Gazebo instances share
+a core or a memory controller.
+
+The Robomaker replicas are one scaled compose / swarm service and cannot be
+given different cpusets in a compose file, so the plan is applied to the
+running containers with `docker update`. Memory limits are only applied on
+request: they are planned from MemTotal, never below the memory a worker
+needs, and never below what a container already uses.
+"""
+
+import glob
+import math
+import os
+import re
+import subprocess
+
+GB = 1024 ** 3
+
+
+def parse_cpulist(text):
+    """'0-3,8,10-11' -> [0, 1, 2, 3, 8, 10, 11]"""
+    cpus = []
+    for part in text.strip().split(','):
+        if not part:
+            continue
+        if '-' in part:
+            lo, hi = part.split('-')
+            cpus.extend(range(int(lo), int(hi) + 1))
+        else:
+            cpus.append(int(part))
+    return cpus
+
+
+def format_cpulist(cpus):
+    return ','.join(str(c) for c in sorted(cpus))
+
+
+def _read(path, default=''):
+    try:
+        with open(path) as f:
+            return f.read()
+    except OSError:
+        return default
+
+
+def read_topology(sys_dir='/sys/devices/system'):
+    """
+    Returns a list of NUMA nodes, each a list of physical cores, each a
+    sorted list of its logical CPUs. Without NUMA information all online
+    CPUs form one node.
+    """
+    nodes = []
+    node_dirs = sorted(glob.glob(os.path.join(sys_dir, 'node', 'node[0-9]*')),
+                       key=lambda d: int(re.sub(r'\D', '', os.path.basename(d))))
+    node_cpus = [parse_cpulist(_read(os.path.join(d, 'cpulist'))) for d in node_dirs]
+    node_cpus = [cpus for cpus in node_cpus if cpus]
+    if not node_cpus:
+        node_cpus = [parse_cpulist(_read(os.path.join(sys_dir, 'cpu', 'online'), '0-{}'.format(os.cpu_count() - 1)))]
+
+    for cpus in node_cpus:
+        cores = {}
+        for cpu in cpus:
+            siblings = _read(os.path.join(sys_dir, 'cpu', 'cpu{}'.format(cpu), 'topology', 'thread_siblings_list'))
+            key = tuple(c for c in parse_cpulist(siblings) if c in cpus) if siblings.strip() else (cpu,)
+            cores[key] = sorted(key)
+        nodes.append(sorted(cores.values()))
+    return nodes
+
+
+def _meminfo(meminfo):
+    values = {}
+    for line in _read(meminfo).splitlines():
+        fields = line.split()
+        if len(fields) >= 2:
+            values[fields[0].rstrip(':')] = int(fields[1]) * 1024
+    return values
+
+
+def available_memory(meminfo='/proc/meminfo'):
+    """Returns MemAvailable (or MemTotal) in bytes."""
+    values = _meminfo(meminfo)
+    return values.get('MemAvailable', values.get('MemTotal', 0))
+
+
+def total_memory(meminfo='/proc/meminfo'):
+    """Returns MemTotal in bytes; unlike MemAvailable it does not depend on what is running."""
+    return _meminfo(meminfo).get('MemTotal', 0)
+
+
+def max_workers(nodes, memory, sagemaker_cores=4, target_rtf=1.0, rtf_per_core=0.5, worker_memory=3 * GB,
+                reserve_memory=4 * GB):
+    """
+    Returns (workers, cores per worker): how many Robomaker workers reach
+    target_rtf, given that one physical core delivers rtf_per_core (measure
+    it with dr-monitor-training), after reserving cores and memory for
+    Sagemaker and the host.
+    """
+    cores_per_worker = max(1, int(math.ceil(target_rtf / rtf_per_core)))
+    free = [len(cores) for cores in nodes]
+    free[0] = max(0, free[0] - sagemaker_cores)
+    by_cores = sum(n // cores_per_worker for n in free)
+    by_memory = max(0, int((memory - reserve_memory) // worker_memory))
+    return min(by_cores, by_memory), cores_per_worker
+
+
+def plan(nodes, workers, cores_per_worker, memory, sagemaker_cores=4, worker_memory=3 * GB, reserve_memory=4 * GB):
+    """
+    Returns {'sagemaker': {...}, 'robomaker': [{...} per worker]}, each with
+    'cpuset' and 'memory' (bytes). Workers are spread over the nodes in turn.
+    memory is the host's total memory; no worker gets less than
+    worker_memory. Raises ValueError if the host has too few cores.
+    """
+    free = [list(cores) for cores in nodes]
+    sagemaker = [c for core in free[0][:sagemaker_cores] for c in core]
+    free[0] = free[0][sagemaker_cores:]
+
+    robomaker = []
+    node = 0
+    for _ in range(workers):
+        for _ in range(len(free)):
+            if len(free[node]) >= cores_per_worker:
+                break
+            node = (node + 1) % len(free)
+        if len(free[node]) < cores_per_worker:
+            raise ValueError('Not enough free cores for {} workers with {} cores each.'.format(workers, cores_per_worker))
+        cores, free[node] = free[node][:cores_per_worker], free[node][cores_per_worker:]
+        robomaker.append({'node': node, 'cpuset': format_cpulist(c for core in cores for c in core)})
+        node = (node + 1) % len(free)
+
+    # Sagemaker gets two shares of the memory, every worker one.
+    share = max(worker_memory, int((memory - reserve_memory) / (workers + 2)))
+    for r in robomaker:
+        r['memory'] = share
+    return {
+        'sagemaker': {'node': 0, 'cpuset': format_cpulist(sagemaker), 'memory': 2 * share},
+        'robomaker': robomaker,
+    }
+
+
+def parse_size(text):
+    """'1.5GiB' or '512MB' (as printed by docker stats) -> bytes"""
+    m = re.match(r'\s*([0-9.]+)\s*([kKMGT]?i?B)\s*$', text)
+    if not m:
+        raise ValueError('Cannot parse size {!r}.'.format(text))
+    unit = m.group(2)
+    base = 1024 if 'i' in unit else 1000
+    prefix = unit[:-1].rstrip('i').upper()
+    return int(float(m.group(1)) * base ** ('KMGT'.index(prefix) + 1 if prefix else 0))
+
+
+def memory_usage(container):
+    """Returns the memory a running container uses in bytes, or None if unknown."""
+    result = subprocess.run(['docker', 'stats', '--no-stream', '--format', '{{.MemUsage}}', container],
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=False)
+    try:
+        return parse_size(result.stdout.decode('utf-8', 'replace').split('/')[0])
+    except ValueError:
+        return None
+
+
+def docker_update(container, cpuset, memory=None):
+    """
+    Pins a running container to cpuset and, if memory is given, limits its
+    memory (without swap) to at least one GB above its current usage.
+    Returns the memory limit set (0 for none), or None if the update failed.
+    """
+    args = ['docker', 'update', '--cpuset-cpus', cpuset]
+    if memory:
+        usage = memory_usage(container)
+        if usage is None:
+            print('WARNING: Could not read the memory usage of {}; not limiting its memory.'.format(container))
+            memory = 0
+        else:
+            memory = max(memory, usage + GB)
+            args += ['--memory', str(memory), '--memory-swap', str(memory)]
+    result = subprocess.run(args + [container], stdout=subprocess.PIPE, stderr=subprocess.STDOUT, check=False)
+    if result.returncode != 0:
+        print('WARNING: Could not pin {}: {}'.format(container, result.stdout.decode('utf-8', 'replace').strip()))
+        return None
+    return memory or 0
+
+
+def sagemaker_containers():
+    """Returns the ids of the running Sagemaker containers."""
+    result = subprocess.run(['docker', 'ps', '--format', '{{.ID}} {{.Image}}'],
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, check=False)
+    return [line.split()[0] for line in result.stdout.decode('utf-8', 'replace').splitlines()
+            if 'sagemaker' in line.split(' ', 1)[-1]]
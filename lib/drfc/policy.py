@@ -0,0 +1,158 @@
+"""
+Early stopping and checkpoint selection driven by the live training metrics.
+
+The evaluation episodes that follow each training iteration score the
+checkpoint written by that iteration, by mean progress or mean reward
+(as DR_TRAIN_BEST_MODEL_METRIC). That checkpoint is found by time: it is
+the one written between the start of the iteration and the start of its
+evaluation. Counting checkpoints by position is not safe, as a policy
+started mid-run no longer sees the checkpoints that Sagemaker or
+retention already removed. An iteration whose checkpoint is gone stays
+unmapped and is neither pinned nor pruned; if an iteration matches more
+than one checkpoint, the mapping is ambiguous and nothing is pruned. The
+mapping is kept in a state file.
+
+PlateauPolicy keeps the scores; the run has plateaued once the best score
+has not improved by more than min_delta for `patience` scored iterations.
+The checkpoints of the `keep_best` best iterations are pinned, all others
+except the newest `keep_last` may be pruned.
+"""
+
+import json
+import os
+
+# Allowed difference between the clocks of Robomaker and the object store, in ms.
+CLOCK_SLACK = 5000
+
+
+def state_file(bucket, prefix, state_dir=None):
+    if state_dir is None:
+        state_dir = os.path.join(os.environ.get('DR_DIR', '.'), 'tmp', 'policy')
+    return os.path.join(state_dir, bucket, prefix.rstrip('/').replace('/', '__') + '.json')
+
+
+def merge_iterations(tailers):
+    """
+    Returns {iteration: {'episodes': n, 'progress': sum, 'reward': sum,
+    'window': (start, evaluation start) or None}} of the evaluation episodes
+    of all workers, for the iterations that are complete on every worker (a
+    later iteration has started). The window spans all workers, in ms.
+    """
+    merged = {}
+    complete = None
+    for tailer in tailers.values():
+        iterations = tailer.stats.iterations
+        complete = len(iterations) - 1 if complete is None else min(complete, len(iterations) - 1)
+        for it in iterations:
+            totals = merged.setdefault(it['iteration'], {'episodes': 0, 'progress': 0.0, 'reward': 0.0, 'times': []})
+            for k in ('episodes', 'progress', 'reward'):
+                totals[k] += it['evaluation'][k]
+            totals['times'].append((it.get('start_time'), it.get('evaluation_start')))
+    for totals in merged.values():
+        times = totals.pop('times')
+        known = all(start is not None and end is not None for start, end in times)
+        totals['window'] = (min(t[0] for t in times), max(t[1] for t in times)) if known else None
+    return {i: t for i, t in merged.items() if complete is not None and i <= complete and t['episodes']}
+
+
+class PlateauPolicy:
+
+    def __init__(self, metric='progress', patience=10, min_delta=1.0, min_iterations=5, keep_best=3, keep_last=2,
+                 state_file=None):
+        self.metric = metric
+        self.patience = patience
+        self.min_delta = min_delta
+        self.min_iterations = min_iterations
+        self.keep_best = keep_best
+        self.keep_last = keep_last
+        self.state_file = state_file
+        self.scores = {}
+        self.windows = {}
+        self.checkpoints = {}
+        self.ambiguous = False
+        self._load()
+
+    def _load(self):
+        if not self.state_file:
+            return
+        try:
+            with open(self.state_file) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.checkpoints = {int(i): n for i, n in state.get('checkpoints', {}).items()}
+        self.ambiguous = state.get('ambiguous', False)
+
+    def save(self):
+        if not self.state_file:
+            return
+        os.makedirs(os.path.dirname(self.state_file), exist_ok=True)
+        tmp_file = self.state_file + '.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump({'checkpoints': self.checkpoints, 'ambiguous': self.ambiguous}, f)
+        os.replace(tmp_file, self.state_file)
+
+    def update(self, merged):
+        """Takes the output of merge_iterations; returns the newly scored iterations."""
+        new = []
+        for i, totals in sorted(merged.items()):
+            if i not in self.scores:
+                self.scores[i] = totals[self.metric] / totals['episodes']
+                self.windows[i] = totals.get('window')
+                new.append(i)
+        return new
+
+    def best(self):
+        """Returns the iterations sorted by score, best first."""
+        return sorted(self.scores, key=lambda i: (-self.scores[i], i))
+
+    def plateaued(self):
+        if len(self.scores) < max(self.min_iterations, self.patience + 1):
+            return False
+        best_score = None
+        best_iteration = None
+        for i in sorted(self.scores):
+            if best_score is None or self.scores[i] > best_score + self.min_delta:
+                best_score = self.scores[i]
+                best_iteration = i
+        return max(self.scores) - best_iteration >= self.patience
+
+    def assign(self, checkpoint_times):
+        """
+        Records the checkpoint of every scored iteration not recorded yet:
+        the one in checkpoint_times ({number: time written, in ms}) that was
+        written within the iteration's window. Iterations without a match
+        stay unrecorded; several matches, or a match already recorded for
+        another iteration, set ambiguous. Returns the newly recorded
+        iterations.
+        """
+        recorded = set(self.checkpoints.values())
+        new = []
+        for i in sorted(self.scores):
+            if i in self.checkpoints or self.windows.get(i) is None:
+                continue
+            start, end = self.windows[i]
+            matches = [n for n, t in checkpoint_times.items() if start - CLOCK_SLACK <= t <= end + CLOCK_SLACK]
+            if len(matches) > 1 or (matches and matches[0] in recorded):
+                self.ambiguous = True
+            elif matches:
+                self.checkpoints[i] = matches[0]
+                recorded.add(matches[0])
+                new.append(i)
+        return new
+
+    def select(self, checkpoint_numbers):
+        """
+        Returns (pinned, prunable) sets of checkpoint numbers, by the
+        recorded checkpoints of the scored iterations (see assign()).
+        checkpoint_numbers are the run's current checkpoints. Nothing is
+        prunable once the mapping is ambiguous.
+        """
+        numbers = sorted(checkpoint_numbers)
+        pinned = {self.checkpoints[i] for i in self.best()[:self.keep_best] if i in self.checkpoints}
+        keep = pinned | set(numbers[-self.keep_last:] if self.keep_last else [])
+        # Checkpoints of iterations not scored yet are kept as well.
+        scored = {self.checkpoints[i] for i in self.scores if i in self.checkpoints}
+        if self.ambiguous:
+            return pinned, set()
+        return pinned, (scored & set(numbers)) - keep
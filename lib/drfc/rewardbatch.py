@@ -0,0 +1,139 @@
+"""
+Scores a whole batch of steps with a reward function, e.g. to re-score
+logged simtrace data under a new reward function.
+
+A batch is a dict of NumPy arrays named like the keys of the params dict
+passed to reward_function(params). Per-step values are arrays of length n
+(closest_waypoints has shape (n, 2)); track_width, track_length and
+waypoints are the same for every step.
+
+By default reward_function(params) is called once per step. A reward
+module may also define reward_function_batch(batch), returning an array
+of n rewards; it is only used when asked for (vectorized=True), and its
+results are first compared with reward_function on a sample of the
+steps, so that a batch version that was not kept in sync with
+reward_function is not used silently.
+"""
+
+import importlib.util
+
+import numpy as np
+
+CONSTANT_KEYS = ('track_width', 'track_length', 'waypoints')
+
+
+def load_reward_module(path):
+    spec = importlib.util.spec_from_file_location('reward_function', path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def batch_size(batch):
+    return len(batch['steps'])
+
+
+def rows(batch, defaults=None):
+    """Yields one params dict per step of the batch."""
+    n = batch_size(batch)
+    columns = {}
+    constants = dict(defaults or {})
+    for key, value in batch.items():
+        if key in CONSTANT_KEYS or not isinstance(value, np.ndarray):
+            constants[key] = value.tolist() if isinstance(value, np.ndarray) else value
+        else:
+            columns[key] = value.tolist()
+    if isinstance(constants.get('waypoints'), list):
+        constants['waypoints'] = [tuple(w) for w in constants['waypoints']]
+
+    for i in range(n):
+        params = dict(constants)
+        for key, values in columns.items():
+            params[key] = values[i]
+        yield params
+
+
+def sample(batch, indices):
+    """Returns the batch reduced to the given steps."""
+    n = batch_size(batch)
+    return {key: value[indices] if key not in CONSTANT_KEYS and isinstance(value, np.ndarray) and len(value) == n
+            else value for key, value in batch.items()}
+
+
+def score(module, batch, vectorized=False, check_steps=100):
+    """
+    Returns an array with one reward per step of the batch. With
+    vectorized, uses reward_function_batch; raises ValueError if it is
+    missing or disagrees with reward_function on check_steps steps spread
+    over the batch.
+    """
+    if not vectorized:
+        return score_scalar(module.reward_function, batch)
+
+    batch_function = getattr(module, 'reward_function_batch', None)
+    if batch_function is None:
+        raise ValueError('The reward module does not define reward_function_batch.')
+    rewards = np.asarray(batch_function(batch), dtype=float)
+    if rewards.shape != (batch_size(batch),):
+        raise ValueError('reward_function_batch returned shape {}, expected ({},).'.format(
+            rewards.shape, batch_size(batch)))
+
+    indices = np.unique(np.linspace(0, batch_size(batch) - 1, min(check_steps, batch_size(batch))).astype(int))
+    expected = score_scalar(module.reward_function, sample(batch, indices))
+    differs = ~np.isclose(rewards[indices], expected, rtol=1e-6, atol=1e-9)
+    if differs.any():
+        i = indices[differs][0]
+        raise ValueError('reward_function_batch differs from reward_function at step {}: {} != {}'.format(
+            i, rewards[i], expected[differs][0]))
+    return rewards
+
+
+def score_scalar(reward_function, batch):
+    """Fallback: calls reward_function(params) for every step."""
+    return np.fromiter((reward_function(p) for p in rows(batch)), dtype=float, count=batch_size(batch))
+
+
+def distance_from_center(x, y, waypoints, closest_waypoints):
+    """
+    Distance of (x, y) to the center line segment between the two closest
+    waypoints. Used to rebuild params from simtrace data, which does not
+    log distance_from_center.
+    """
+    waypoints = np.asarray(waypoints, dtype=float)
+    a = waypoints[closest_waypoints[:, 0]]
+    b = waypoints[closest_waypoints[:, 1]]
+    ab = b - a
+    p = np.stack([x, y], axis=1)
+    t = np.clip(np.einsum('ij,ij->i', p - a, ab) / np.maximum(np.einsum('ij,ij->i', ab, ab), 1e-12), 0.0, 1.0)
+    nearest = a + ab * t[:, None]
+    return np.hypot(p[:, 0] - nearest[:, 0], p[:, 1] - nearest[:, 1])
+
+
+def from_simtrace(columns, waypoints, track_width):
+    """
+    Builds a batch from simtrace columns (as read with numpy or pandas).
+    Simtrace only logs the next waypoint; the previous one is derived.
+    """
+    waypoints = np.asarray(waypoints, dtype=float)
+    n_wp = len(waypoints)
+    nxt = np.asarray(columns['closest_waypoint'], dtype=int) % n_wp
+    prev = (nxt - 1) % n_wp
+    closest = np.stack([prev, nxt], axis=1)
+    x = np.asarray(columns['X'], dtype=float)
+    y = np.asarray(columns['Y'], dtype=float)
+
+    return {
+        'x': x,
+        'y': y,
+        'heading': np.asarray(columns['yaw'], dtype=float),
+        'steering_angle': np.asarray(columns['steer'], dtype=float),
+        'speed': np.asarray(columns['throttle'], dtype=float),
+        'steps': np.asarray(columns['steps'], dtype=float),
+        'progress': np.asarray(columns['progress'], dtype=float),
+        'all_wheels_on_track': np.asarray(columns['all_wheels_on_track']).astype(str) == 'True',
+        'closest_waypoints': closest,
+        'distance_from_center': distance_from_center(x, y, waypoints, closest),
+        'track_width': track_width,
+        'track_length': float(np.asarray(columns['track_len'], dtype=float)[0]),
+        'waypoints': waypoints,
+    }
@@ -0,0 +1,166 @@
+"""
+Synthetic input for reward functions, and a small benchmark around them.
+
+Parameters are generated for a track given as a DeepRacer track .npy file
+(rows of center x/y, inner x/y, outer x/y) or, if none is given, for an oval.
+The car follows the center line with a random lateral offset, speed and
+steering angle; episodes restart when the car leaves the track or finishes
+a lap, so progress and steps behave as they do in Robomaker.
+"""
+
+import math
+import time
+import tracemalloc
+
+import numpy as np
+
+from drfc import rewardbatch
+
+STEERING_ANGLES = np.array([-30.0, -15.0, 0.0, 15.0, 30.0])
+SPEEDS = np.array([0.5, 1.0, 2.0, 3.0, 4.0])
+STEPS_PER_SECOND = 15
+
+
+def oval_track(n=120, a=6.0, b=3.0):
+    """Returns closed center line waypoints of an ellipse, shape (n + 1, 2)."""
+    t = np.linspace(0.0, 2 * math.pi, n, endpoint=False)
+    wp = np.stack([a * np.cos(t), b * np.sin(t)], axis=1)
+    return np.vstack([wp, wp[:1]])
+
+
+def load_track(path):
+    """
+    Loads a track .npy file. Returns the center line, shape (n, 2), and
+    the mean track width derived from the inner and outer borders.
+    """
+    track = np.load(path)
+    width = np.mean(np.hypot(track[:, 2] - track[:, 4], track[:, 3] - track[:, 5]))
+    return track[:, 0:2], float(width)
+
+
+def load_reward_function(path):
+    """Imports reward_function from a file, as Robomaker does."""
+    return rewardbatch.load_reward_module(path).reward_function
+
+
+def generate_steps(waypoints, track_width=0.76, n=10000, seed=0):
+    """
+    Generates n consecutive simulation steps for the given center line.
+    Returns a dict of NumPy arrays, one entry per params key that varies.
+    """
+    rng = np.random.default_rng(seed)
+    waypoints = np.asarray(waypoints, dtype=float)
+    seg = np.diff(waypoints, axis=0)
+    seg_len = np.hypot(seg[:, 0], seg[:, 1])
+    cum = np.concatenate([[0.0], np.cumsum(seg_len)])
+    track_length = cum[-1]
+    seg_heading = np.degrees(np.arctan2(seg[:, 1], seg[:, 0]))
+
+    speed = rng.choice(SPEEDS, n)
+    steering = rng.choice(STEERING_ANGLES, n)
+    lateral = np.cumsum(rng.normal(0.0, 0.02, n) + np.radians(steering) * 0.005)
+
+    # Episode boundaries: off track or lap complete
+    steps = np.empty(n)
+    episode_dist = np.empty(n)
+    dist = np.empty(n)
+    offset = np.empty(n)
+    start = rng.uniform(0, track_length)
+    episode_step, travelled, base = 0, 0.0, 0.0
+    for i in range(n):
+        episode_step += 1
+        travelled += speed[i] / STEPS_PER_SECOND
+        off = lateral[i] - base
+        if abs(off) > track_width / 2 + 0.1 or travelled >= track_length:
+            episode_step, travelled, base = 1, 0.0, lateral[i]
+            start = rng.uniform(0, track_length)
+            off = 0.0
+        steps[i] = episode_step
+        episode_dist[i] = travelled
+        dist[i] = (start + travelled) % track_length
+        offset[i] = off
+
+    idx = np.clip(np.searchsorted(cum, dist, side='right') - 1, 0, len(seg_len) - 1)
+    frac = (dist - cum[idx]) / seg_len[idx]
+    pos = waypoints[idx] + seg[idx] * frac[:, None]
+    normal = np.stack([-seg[idx, 1], seg[idx, 0]], axis=1) / seg_len[idx, None]
+    pos = pos + normal * offset[:, None]
+
+    progress = 100.0 * episode_dist / track_length
+
+    return {
+        'x': pos[:, 0],
+        'y': pos[:, 1],
+        'heading': seg_heading[idx] + rng.normal(0.0, 3.0, n),
+        'distance_from_center': np.abs(offset),
+        'is_left_of_center': offset > 0,
+        'is_offtrack': np.abs(offset) > track_width / 2,
+        'all_wheels_on_track': np.abs(offset) < track_width / 2 - 0.1,
+        'speed': speed,
+        'steering_angle': steering,
+        'steps': steps,
+        'progress': np.minimum(progress, 100.0),
+        'closest_waypoints': np.stack([idx, (idx + 1) % (len(waypoints) - 1)], axis=1),
+        'track_length': track_length,
+        'track_width': track_width,
+        'waypoints': waypoints,
+    }
+
+
+PARAMS_DEFAULTS = {
+    'closest_objects': [0, 0],
+    'is_crashed': False,
+    'is_reversed': False,
+    'objects_distance': [],
+    'objects_heading': [],
+    'objects_left_of_center': [],
+    'objects_location': [],
+    'objects_speed': [],
+}
+
+
+def to_params(batch):
+    """Turns the arrays from generate_steps() into a list of params dicts."""
+    params = list(rewardbatch.rows(batch, PARAMS_DEFAULTS))
+    for p in params:
+        p['steps'] = int(p['steps'])
+    return params
+
+
+def benchmark(reward_function, params, warmup=100):
+    """
+    Calls reward_function for each params dict. Returns latency percentiles
+    (microseconds), calls per second, the peak of traced allocations and
+    the number of memory blocks still held by the reward function.
+    """
+    for p in params[:warmup]:
+        reward_function(p)
+
+    latencies = np.empty(len(params))
+    clock = time.perf_counter_ns
+    start = clock()
+    for i, p in enumerate(params):
+        t0 = clock()
+        reward_function(p)
+        latencies[i] = clock() - t0
+    elapsed = (clock() - start) / 1e9
+
+    # Separate pass, as tracing slows down every call.
+    tracemalloc.start()
+    for p in params:
+        reward_function(p)
+    _, peak = tracemalloc.get_traced_memory()
+    blocks = sum(s.count for s in tracemalloc.take_snapshot().statistics('filename'))
+    tracemalloc.stop()
+
+    latencies /= 1000.0
+    return {
+        'calls': len(params),
+        'calls_per_sec': len(params) / elapsed if elapsed > 0 else float('inf'),
+        'p50_us': float(np.percentile(latencies, 50)),
+        'p90_us': float(np.percentile(latencies, 90)),
+        'p99_us': float(np.percentile(latencies, 99)),
+        'max_us': float(latencies.max()),
+        'peak_alloc_bytes': peak,
+        'retained_blocks': blocks,
+    }
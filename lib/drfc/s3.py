@@ -0,0 +1,72 @@
+"""
+S3 session and client handling.
+
+All scripts share one boto3 session and one client per (profile, region,
+endpoint) combination, so that the connection pool is reused.
+"""
+
+import os
+
+_clients = {}
+NOT_FOUND = ('404', 'NoSuchKey', 'NotFound')
+
+
+def local_profile(env=os.environ):
+    """Returns the profile for the local bucket, or None if an IAM role is used."""
+    if env.get('DR_LOCAL_S3_AUTH_MODE', 'profile') == 'profile':
+        return env.get('DR_LOCAL_S3_PROFILE', 'default')
+    return None
+
+
+def client(profile=None, region='us-east-1', endpoint_url=None, max_pool_connections=10):
+    """Returns a cached S3 client for the given profile, region and endpoint."""
+    key = (profile, region, endpoint_url, max_pool_connections)
+    if key not in _clients:
+        import boto3
+        from botocore.config import Config
+
+        session = boto3.session.Session(profile_name=profile)
+        _clients[key] = session.client(
+            's3',
+            region_name=region,
+            endpoint_url=endpoint_url,
+            config=Config(max_pool_connections=max_pool_connections),
+        )
+    return _clients[key]
+
+
+def local_client(env=os.environ, max_pool_connections=10):
+    """Returns the client for the local (minio or S3) bucket configured in run.env / system.env."""
+    return client(
+        profile=local_profile(env),
+        region=env.get('DR_AWS_APP_REGION', 'us-east-1'),
+        endpoint_url=env.get('DR_LOCAL_S3_ENDPOINT_URL', None),
+        max_pool_connections=max_pool_connections,
+    )
+
+
+def not_found(error):
+    """True if a botocore ClientError means that the object does not exist."""
+    return error.response.get('Error', {}).get('Code') in NOT_FOUND
+
+
+def put_if_changed(s3_client, bucket, key, body):
+    """
+    Uploads body (bytes) to bucket/key unless the existing object already
+    has the same content, as compared by its (single part) ETag.
+    Returns True if the object was written.
+    """
+    import hashlib
+    from botocore.exceptions import ClientError
+
+    digest = hashlib.md5(body).hexdigest()
+    try:
+        etag = s3_client.head_object(Bucket=bucket, Key=key)['ETag'].strip('"')
+        if etag == digest:
+            return False
+    except ClientError as e:
+        if not not_found(e):
+            raise
+
+    s3_client.put_object(Bucket=bucket, Key=key, Body=body)
+    return True
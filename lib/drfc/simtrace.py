@@ -0,0 +1,137 @@
+"""
+Incremental ingestion of simtrace CSV files into a columnar dataset.
+
+Every simtrace object found under a prefix is parsed once and written as
+one Parquet (or Arrow IPC) file, partitioned as
+
+    <store>/run=<run>/worker=<worker>/iteration=<iteration>/<phase>.<ext>
+
+Objects are re-ingested only when their ETag changes, as recorded in
+<store>/_ingest_state.json. The per-episode index of drfc.episodes is
+written alongside, under names starting with '_' that Arrow's dataset
+discovery ignores. The store lives in data/analysis by default,
+which the log-analysis container mounts as /workspace/analysis.
+"""
+
+import io
+import json
+import os
+import re
+
+# <run>[/<worker>]/[iteration_data/agent/]<phase>-simtrace/<iteration>-iteration.csv
+SIMTRACE_RE = re.compile(
+    r'^(?P<run>.+?)(?:/(?P<worker>[0-9]+))?/(?:iteration_data/agent/)?'
+    r'(?P<phase>training|evaluation)-simtrace/(?P<iteration>[0-9]+)-iteration\.csv$')
+
+STATE_FILE = '_ingest_state.json'
+
+
+def parse_key(key):
+    """Returns (run, worker, phase, iteration) for a simtrace key, or None."""
+    m = SIMTRACE_RE.match(key)
+    if not m:
+        return None
+    return m.group('run'), int(m.group('worker') or 0), m.group('phase'), int(m.group('iteration'))
+
+
+def default_store(env=os.environ):
+    return os.path.join(env.get('DR_DIR', '.'), 'data', 'analysis', 'simtrace')
+
+
+class SimtraceIngester:
+
+    def __init__(self, s3_client, bucket, store, file_format='parquet'):
+        import pyarrow  # noqa: F401 -- fail early if pyarrow is missing
+
+        self.s3_client = s3_client
+        self.bucket = bucket
+        self.store = store
+        self.file_format = file_format
+        self.state_path = os.path.join(store, STATE_FILE)
+        try:
+            with open(self.state_path) as f:
+                self.state = json.load(f)
+        except (OSError, ValueError):
+            self.state = {}
+
+    def _save_state(self):
+        os.makedirs(self.store, exist_ok=True)
+        tmp_path = self.state_path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def pending(self, prefix):
+        """Lists simtrace objects under prefix that are new or have changed."""
+        paginator = self.s3_client.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            for o in page.get('Contents', []):
+                if parse_key(o['Key']) and self.state.get(o['Key']) != o['ETag']:
+                    yield o['Key'], o['ETag']
+
+    def path_for(self, key):
+        run, worker, phase, iteration = parse_key(key)
+        return os.path.join(self.store, 'run={}'.format(run.replace('/', '__')), 'worker={}'.format(worker),
+                            'iteration={}'.format(iteration),
+                            '{}.{}'.format(phase, 'parquet' if self.file_format == 'parquet' else 'arrow'))
+
+    def ingest(self, key, etag):
+        import pyarrow.csv as pv
+
+        body = self.s3_client.get_object(Bucket=self.bucket, Key=key)['Body'].read()
+        table = pv.read_csv(io.BytesIO(body))
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Hidden from dataset discovery while it is written.
+        tmp_path = os.path.join(os.path.dirname(path), '.' + os.path.basename(path) + '.tmp')
+
+        if self.file_format == 'parquet':
+            import pyarrow.parquet as pq
+            pq.write_table(table, tmp_path, compression='zstd')
+        else:
+            import pyarrow.ipc as ipc
+            with ipc.new_file(tmp_path, table.schema,
+                              options=ipc.IpcWriteOptions(compression='zstd')) as writer:
+                writer.write_table(table)
+        os.replace(tmp_path, path)
+
+        from drfc import episodes
+        episodes.write_partition(table, path)
+
+        self.state[key] = etag
+        return table.num_rows
+
+    def poll(self, prefix):
+        """Ingests all new or changed simtrace objects. Returns (files, rows)."""
+        files, rows = 0, 0
+        for key, etag in list(self.pending(prefix)):
+            rows += self.ingest(key, etag)
+            files += 1
+            if files % 20 == 0:
+                self._save_state()
+        if files:
+            self._save_state()
+        return files, rows
+
+
+def read(store, columns=None, run=None, worker=None, iterations=None, file_format='parquet'):
+    """
+    Reads the selected columns from the store; only the partitions matching
+    run / worker / iterations are opened.
+    """
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(store, format='parquet' if file_format == 'parquet' else 'ipc',
+                         partitioning='hive')
+    expr = None
+
+    def _and(a, b):
+        return b if a is None else a & b
+
+    if run is not None:
+        expr = _and(expr, ds.field('run') == run.replace('/', '__'))
+    if worker is not None:
+        expr = _and(expr, ds.field('worker') == worker)
+    if iterations is not None:
+        expr = _and(expr, ds.field('iteration').isin(list(iterations)))
+    return dataset.to_table(columns=columns, filter=expr)
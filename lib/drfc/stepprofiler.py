@@ -0,0 +1,157 @@
+"""
+Step profiler for reward functions running inside Robomaker.
+
+StepProfiler wraps a reward function and records, per call, the wall time,
+the simulation time (rospy.get_time(), when available) and the latency of
+the call into fixed size ring buffers. Every `interval` seconds it emits one
+aggregate line with the real-time factor, sim FPS and the p50 / p99 reward
+latency over the buffered window to a sink:
+
+* `stdout` prints a `TIME: s: <steps>, rtf: <rtf>, fps:<fps>, ...` line, as
+  parsed by dr-monitor-training,
+* `file:<path>` appends a JSON line to path,
+* `udp:<host>:<port>` sends the JSON line as a datagram.
+
+This module only uses the standard library, as bundle() pastes its source
+in front of the user's reward function to build the single
+reward_function.py that Robomaker downloads.
+"""
+
+import inspect
+import json
+import socket
+import sys
+import time
+
+DEFAULT_INTERVAL = 10.0
+DEFAULT_WINDOW = 256
+
+
+def sim_clock():
+    """Returns rospy.get_time if running inside ROS, otherwise None."""
+    try:
+        import rospy
+    except ImportError:
+        return None
+    return rospy.get_time
+
+
+def nan_if_none(value):
+    return 'nan' if value is None else value
+
+
+class Sink:
+    """Writes aggregates to stdout, a JSON lines file or a UDP socket, as given by a sink spec."""
+
+    def __init__(self, spec='stdout'):
+        self.spec = spec
+        self.path = None
+        self.address = None
+        self.socket = None
+        if spec.startswith('file:'):
+            self.path = spec[len('file:'):]
+        elif spec.startswith('udp:'):
+            host, port = spec[len('udp:'):].rsplit(':', 1)
+            self.address = (host, int(port))
+            self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        elif spec != 'stdout':
+            raise ValueError("Unknown sink '{}'. Use stdout, file:<path> or udp:<host>:<port>.".format(spec))
+
+    def write(self, stats):
+        if self.path is not None:
+            with open(self.path, 'a') as f:
+                f.write(json.dumps(stats) + '\n')
+        elif self.socket is not None:
+            try:
+                self.socket.sendto(json.dumps(stats).encode('utf-8'), self.address)
+            except OSError:
+                pass
+        else:
+            print("TIME: s: {}, rtf: {}, fps:{}, p50_ms: {}, p99_ms: {}, calls: {}".format(
+                stats['steps'], nan_if_none(stats['rtf']), nan_if_none(stats['fps']),
+                stats['p50_ms'], stats['p99_ms'], stats['calls']))
+            sys.stdout.flush()
+
+
+class StepProfiler:
+
+    def __init__(self, interval=DEFAULT_INTERVAL, sink='stdout', window=DEFAULT_WINDOW, clock=None):
+        self.interval = interval
+        self.sink = sink if isinstance(sink, Sink) else Sink(sink)
+        self.window = window
+        self.clock = clock if clock is not None else sim_clock()
+        self.wall = [0.0] * window
+        self.sim = [0.0] * window
+        self.latency = [0.0] * window
+        self.count = 0
+        self.steps = 0
+        self.next_emit = time.time() + interval
+
+    def record(self, wall, sim, latency, steps):
+        """Stores one call in the ring buffers and emits an aggregate if the interval has passed."""
+        i = self.count % self.window
+        self.wall[i] = wall
+        self.sim[i] = sim
+        self.latency[i] = latency
+        self.count += 1
+        self.steps = steps
+        if wall >= self.next_emit:
+            self.next_emit = wall + self.interval
+            self.sink.write(self.stats())
+
+    def stats(self):
+        """Returns the aggregates over the buffered window."""
+        n = min(self.count, self.window)
+        newest = (self.count - 1) % self.window
+        oldest = (self.count - n) % self.window
+        wall_span = self.wall[newest] - self.wall[oldest]
+        sim_span = self.sim[newest] - self.sim[oldest]
+        latencies = sorted(self.latency[:n])
+        if n:
+            p50 = latencies[int(0.50 * (n - 1))]
+            p99 = latencies[int(0.99 * (n - 1))]
+        else:
+            p50 = p99 = 0.0
+        return {
+            't': round(time.time(), 3),
+            'steps': int(self.steps),
+            'calls': self.count,
+            'rtf': round(sim_span / wall_span, 3) if wall_span > 0 and self.clock else None,
+            'fps': round((n - 1) / sim_span, 2) if sim_span > 0 else None,
+            'p50_ms': round(p50 * 1000.0, 3),
+            'p99_ms': round(p99 * 1000.0, 3),
+        }
+
+    def wrap(self, reward_function):
+        """Returns reward_function with every call recorded."""
+        clock = self.clock
+
+        def profiled_reward_function(params):
+            start = time.perf_counter()
+            reward = reward_function(params)
+            latency = time.perf_counter() - start
+            self.record(time.time(), clock() if clock else 0.0, latency, params.get('steps', 0))
+            return reward
+
+        profiled_reward_function.__wrapped__ = reward_function
+        return profiled_reward_function
+
+
+def bundle(reward_source, interval=DEFAULT_INTERVAL, sink='stdout', window=DEFAULT_WINDOW):
+    """
+    Returns the source of a single reward_function.py that contains this
+    module followed by reward_source, with its reward_function wrapped by a
+    StepProfiler. reward_source is executed in its own namespace, so that
+    its imports and globals do not mix with the profiler's.
+    """
+    Sink(sink)
+    footer = '\n'.join([
+        '',
+        '',
+        '_user_reward = {"__name__": "user_reward_function"}',
+        'exec(compile({!r}, "reward_function.py", "exec"), _user_reward)'.format(reward_source),
+        'reward_function = StepProfiler(interval={!r}, sink={!r}, window={!r}).wrap(_user_reward["reward_function"])'
+        .format(float(interval), sink, int(window)),
+        '',
+    ])
+    return inspect.getsource(sys.modules[__name__]) + footer
@@ -0,0 +1,116 @@
+"""
+Store of leaderboard submissions seen by submit-monitor.py.
+
+Submissions are rows of a SQLite table keyed by (leaderboard, submission
+time), so recording the latest submission is a single upsert and listing or
+aggregating lap times is a query over an index instead of loading the full
+history. The lap time and count columns are extracted for queries; the
+complete submission is kept as JSON.
+
+Summaries written by earlier versions (<leaderboard>/summary.pkl) are
+imported the first time their leaderboard is used, and renamed to
+summary.pkl.imported.
+"""
+
+import json
+import os
+import pickle
+import sqlite3
+import threading
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS submissions (
+    leaderboard TEXT NOT NULL,
+    submission_time INTEGER NOT NULL,
+    model TEXT,
+    job_id TEXT,
+    status TEXT,
+    total_lap_time INTEGER,
+    best_lap_time INTEGER,
+    reset_count INTEGER,
+    collision_count INTEGER,
+    off_track_count INTEGER,
+    submission TEXT NOT NULL,
+    PRIMARY KEY (leaderboard, submission_time)
+)
+'''
+
+COLUMNS = ['submission_time', 'model', 'job_id', 'status', 'total_lap_time', 'best_lap_time',
+           'reset_count', 'collision_count', 'off_track_count']
+
+
+def row(leaderboard, submission):
+    """Returns the column values of a LeaderboardSubmission."""
+    return (
+        leaderboard,
+        int(submission['SubmissionTime']),
+        submission.get('ModelArn', '').rsplit('/', 1)[-1],
+        submission.get('ActivityArn', '').split('/', 1)[-1],
+        submission.get('LeaderboardSubmissionStatusType'),
+        submission.get('TotalLapTime'),
+        submission.get('BestLapTime'),
+        submission.get('ResetCount'),
+        submission.get('CollisionCount'),
+        submission.get('OffTrackCount'),
+        json.dumps(submission, default=str),
+    )
+
+
+class SubmissionStore:
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.imported = set()
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute(SCHEMA)
+        self.db.commit()
+
+    def _import_pickle(self, leaderboard):
+        if leaderboard in self.imported:
+            return
+        self.imported.add(leaderboard)
+        pkl_f = os.path.join(os.path.dirname(self.path), leaderboard, 'summary.pkl')
+        if not os.path.isfile(pkl_f):
+            return
+        with open(pkl_f, 'rb') as f:
+            summary = pickle.load(f)
+        rows = [row(leaderboard, s) for s in summary.get('LeaderboardSubmissions', []) if 'SubmissionTime' in s]
+        self.db.executemany('INSERT OR REPLACE INTO submissions VALUES (?,?,?,?,?,?,?,?,?,?,?)', rows)
+        self.db.commit()
+        os.replace(pkl_f, pkl_f + '.imported')
+
+    def add(self, leaderboard, submission):
+        """Records a submission, replacing an earlier record of the same submission time."""
+        with self.lock:
+            self._import_pickle(leaderboard)
+            self.db.execute('INSERT OR REPLACE INTO submissions VALUES (?,?,?,?,?,?,?,?,?,?,?)',
+                            row(leaderboard, submission))
+            self.db.commit()
+
+    def latest(self, leaderboard, limit=20):
+        """Returns the last limit submissions as dicts of COLUMNS, oldest first."""
+        with self.lock:
+            self._import_pickle(leaderboard)
+            cursor = self.db.execute(
+                'SELECT {} FROM submissions WHERE leaderboard = ? ORDER BY submission_time DESC LIMIT ?'
+                .format(', '.join(COLUMNS)), (leaderboard, limit))
+            rows = cursor.fetchall()
+        return [dict(zip(COLUMNS, r)) for r in reversed(rows)]
+
+    def lap_time_stats(self, leaderboard):
+        """Returns per model the number of successful submissions, the best lap and the mean total lap time."""
+        with self.lock:
+            self._import_pickle(leaderboard)
+            cursor = self.db.execute(
+                "SELECT model, COUNT(*), MIN(best_lap_time), AVG(total_lap_time) FROM submissions "
+                "WHERE leaderboard = ? AND status = 'SUCCESS' GROUP BY model ORDER BY MIN(best_lap_time)",
+                (leaderboard,))
+            rows = cursor.fetchall()
+        return [{'model': m, 'submissions': n, 'best_lap_time': best, 'mean_total_lap_time': mean}
+                for m, n, best, mean in rows]
+
+    def close(self):
+        self.db.close()
@@ -0,0 +1,266 @@
+"""
+Training throughput collection across all Robomaker workers.
+
+Three sources are polled:
+
+* the TrainingMetrics JSON files below the metrics prefix (TrainingMetrics.json
+  for the first worker, TrainingMetrics_<n>.json for the others), of which
+  only the records appended since the last poll are read,
+* the `TIME: s: <steps>, rtf: <rtf>, fps:<fps>` lines printed into the
+  Robomaker logs by a timing reward function, read with `docker logs --since`
+  from the timestamp of the last line already read,
+* `gz stats` inside every Robomaker container.
+
+The containers are polled in parallel, as `gz stats` takes a few seconds
+per worker. Only the most recent TrainingMetrics records are kept.
+
+Samples are (name, labels, value, timestamp) tuples, and can be rendered in
+the Prometheus text format or appended to a JSON lines file.
+"""
+
+import collections
+import json
+import re
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from drfc import metrics
+
+TIME_RE = re.compile(r'TIME: s: *(?P<steps>[0-9]+), rtf: *(?P<rtf>[0-9.eE+-]+|nan|inf), fps: *(?P<fps>[0-9.eE+-]+|nan|inf)')
+GZ_FACTOR_RE = re.compile(r'Factor\[(?P<factor>[0-9.]+)\]')
+LOG_TIMESTAMP_RE = re.compile(r'^([0-9]{4}-[0-9]{2}-[0-9]{2}T[0-9]{2}:[0-9]{2}:[0-9]{2})(?:\.([0-9]+))?(?:Z|[+-][0-9:]+)$')
+MAX_RECORDS = 2000
+
+
+def docker(*args, timeout=10):
+    """Runs a docker CLI command, returning stdout and stderr combined ('' on failure)."""
+    try:
+        result = subprocess.run(('docker',) + args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                                timeout=timeout, check=False)
+    except (OSError, subprocess.TimeoutExpired):
+        return ''
+    return result.stdout.decode('utf-8', 'replace')
+
+
+def stack_name(run_id, evaluation=False):
+    return 'deepracer-{}{}'.format('eval-' if evaluation else '', run_id)
+
+
+def parse_robomaker_containers(out, stack):
+    """
+    Returns {worker: container id} from `docker ps --format '{{.Names}} {{.ID}}'`
+    output. The worker is the replica number in the container name:
+    <stack>_robomaker.<n>.<task> (swarm) or <stack>_robomaker_<n> (compose).
+    """
+    name_re = re.compile(re.escape(stack) + r'_robomaker[._]([0-9]+)(?:\.[^ ]*)?$')
+    containers = {}
+    for line in out.splitlines():
+        fields = line.split()
+        if len(fields) != 2:
+            continue
+        m = name_re.match(fields[0])
+        if m:
+            containers[int(m.group(1))] = fields[1]
+    return containers
+
+
+def robomaker_containers(run_id, evaluation=False):
+    """Returns {worker: container id} for the running Robomaker containers of a run."""
+    stack = stack_name(run_id, evaluation)
+    out = docker('ps', '--filter', 'name={}_robomaker'.format(stack), '--format', '{{.Names}} {{.ID}}')
+    return parse_robomaker_containers(out, stack)
+
+
+def parse_time_lines(text):
+    """Returns (steps, rtf, fps) of all TIME lines in text."""
+    return [(int(m.group('steps')), float(m.group('rtf')), float(m.group('fps'))) for m in TIME_RE.finditer(text)]
+
+
+def parse_gz_stats(text):
+    """
+    Returns the mean real-time factor from `gz stats` output, either in the
+    default Factor[...] format or the plain (-p) CSV format, or None.
+    """
+    factors = [float(f) for f in GZ_FACTOR_RE.findall(text)]
+    if not factors:
+        for line in text.splitlines():
+            fields = line.split(',')
+            if len(fields) == 4 and not line.startswith('#'):
+                try:
+                    factors.append(float(fields[0]) / 100.0)
+                except ValueError:
+                    pass
+    return sum(factors) / len(factors) if factors else None
+
+
+def log_timestamp(stamp):
+    """Returns a `docker logs --timestamps` timestamp in a form that sorts as text, or None."""
+    m = LOG_TIMESTAMP_RE.match(stamp)
+    if not m:
+        return None
+    return '{}.{:0<9}'.format(m.group(1), m.group(2) or '')
+
+
+class LogScraper:
+    """
+    Reads the TIME lines a container logged since the previous poll. The
+    lines are read with their timestamps from the last one seen; lines not
+    newer than that are dropped, so none is counted twice.
+    """
+
+    def __init__(self, container):
+        self.container = container
+        self.since = str(int(time.time()))
+        self.last = None
+
+    def new_lines(self, out):
+        """Returns the text of the timestamped lines of out that were not seen yet."""
+        lines = []
+        for line in out.splitlines():
+            stamp, _, text = line.partition(' ')
+            key = log_timestamp(stamp)
+            if key is None or (self.last is not None and key <= self.last):
+                continue
+            self.last = key
+            self.since = stamp
+            lines.append(text)
+        return lines
+
+    def poll(self):
+        out = docker('logs', '--timestamps', '--since', self.since, self.container)
+        return parse_time_lines('\n'.join(self.new_lines(out)))
+
+
+class MetricsPoller:
+    """
+    Keeps the last max_records TrainingMetrics records of every worker,
+    reading only what was appended to a file, and counts the iterations.
+    """
+
+    def __init__(self, s3_client, bucket, prefix, max_records=MAX_RECORDS):
+        self.tailer = metrics.PrefixTailer(s3_client, bucket, prefix, persist=False)
+        self.max_records = max_records
+        self.records = {}
+        self.iterations = {}
+        self._phase = {}
+
+    def add(self, worker, records):
+        kept = self.records.setdefault(worker, collections.deque(maxlen=self.max_records))
+        for r in records:
+            if r.get('phase') == 'training' and self._phase.get(worker) != 'training':
+                self.iterations[worker] = self.iterations.get(worker, 0) + 1
+            self._phase[worker] = r.get('phase')
+            kept.append(r)
+
+    def poll(self):
+        """Returns the workers whose metrics changed."""
+        from botocore.exceptions import ClientError
+
+        changed = []
+        try:
+            new_records = self.tailer.poll()
+        except ClientError:
+            return changed
+        for worker, records in new_records.items():
+            if records:
+                self.add(worker, records)
+                changed.append(worker)
+        return changed
+
+
+def episode_stats(records, now_ms, window_s=3600):
+    """
+    Returns episodes per hour over the last window_s seconds, the wall time
+    of the last completed iteration and the number of iterations in records.
+    An iteration is a run of training episodes, closed by the evaluation
+    episodes that follow it.
+    """
+    training = [r for r in records if r.get('phase') == 'training']
+    recent = [r for r in training if r.get('metric_time', 0) >= now_ms - window_s * 1000]
+    if len(recent) > 1:
+        span = (now_ms - min(r['start_time'] for r in recent)) / 1000.0
+        per_hour = len(recent) * 3600.0 / span if span > 0 else 0.0
+    else:
+        per_hour = 0.0
+
+    starts = []
+    previous = None
+    for r in records:
+        if r.get('phase') == 'training' and previous != 'training':
+            starts.append(r.get('start_time', 0))
+        previous = r.get('phase')
+    iteration_s = (starts[-1] - starts[-2]) / 1000.0 if len(starts) > 1 else None
+    return per_hour, iteration_s, len(starts)
+
+
+class Collector:
+
+    def __init__(self, run_id, metrics=None, gz_stats=True):
+        self.run_id = run_id
+        self.metrics = metrics
+        self.gz_stats = gz_stats
+        self.scrapers = {}
+
+    def _poll_worker(self, worker, scraper, now):
+        labels = {'worker': str(worker)}
+        samples = []
+        lines = scraper.poll()
+        if lines:
+            rtf = sum(line[1] for line in lines) / len(lines)
+            fps = sum(line[2] for line in lines) / len(lines)
+            samples.append(('deepracer_rtf', labels, rtf, now))
+            samples.append(('deepracer_sim_fps', labels, fps, now))
+            samples.append(('deepracer_steps_per_second', labels, rtf * fps, now))
+        if self.gz_stats:
+            factor = parse_gz_stats(docker('exec', scraper.container, 'timeout', '3', 'gz', 'stats', '-p', '-d', '2'))
+            if factor is not None:
+                samples.append(('deepracer_gz_rtf', labels, factor, now))
+        return samples
+
+    def collect(self):
+        """Polls all sources once and returns the resulting samples."""
+        now = time.time()
+        samples = []
+
+        containers = robomaker_containers(self.run_id)
+        for worker, cid in containers.items():
+            if worker not in self.scrapers or self.scrapers[worker].container != cid:
+                self.scrapers[worker] = LogScraper(cid)
+        for worker in list(self.scrapers):
+            if worker not in containers:
+                del self.scrapers[worker]
+
+        if self.scrapers:
+            with ThreadPoolExecutor(max_workers=len(self.scrapers)) as executor:
+                polls = [executor.submit(self._poll_worker, worker, scraper, now)
+                         for worker, scraper in sorted(self.scrapers.items())]
+                for poll in polls:
+                    samples.extend(poll.result())
+
+        if self.metrics is not None:
+            self.metrics.poll()
+            for worker, records in self.metrics.records.items():
+                labels = {'worker': str(worker)}
+                per_hour, iteration_s, iterations = episode_stats(records, now * 1000)
+                iterations = self.metrics.iterations.get(worker, iterations)
+                samples.append(('deepracer_episodes_per_hour', labels, per_hour, now))
+                samples.append(('deepracer_iterations', labels, iterations, now))
+                if iteration_s is not None:
+                    samples.append(('deepracer_iteration_seconds', labels, iteration_s, now))
+
+        return [(name, dict(labels, run=str(self.run_id)), value, ts) for name, labels, value, ts in samples]
+
+
+def prometheus_text(samples):
+    lines = []
+    for name, labels, value, _ in samples:
+        label_text = ','.join('{}="{}"'.format(k, v) for k, v in sorted(labels.items()))
+        lines.append('{}{{{}}} {}'.format(name, label_text, value))
+    return '\n'.join(lines) + '\n'
+
+
+def append_jsonl(path, samples):
+    with open(path, 'a') as f:
+        for name, labels, value, ts in samples:
+            f.write(json.dumps({'t': round(ts, 3), 'name': name, 'labels': labels, 'value': value}) + '\n')
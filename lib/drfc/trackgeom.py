@@ -0,0 +1,192 @@
+"""
+Track geometry for reward functions, computed once per world.
+
+Reward functions commonly derive segment headings, lengths and curvature
+from params['waypoints'] on every step. TrackGeometry computes them once as
+NumPy arrays, indexed like the waypoints, so that a step only needs lookups
+by params['closest_waypoints']:
+
+    from drfc.trackgeom import track_geometry
+
+    def reward_function(params):
+        track = track_geometry(params)
+        error = track.heading_error(params)
+        ...
+
+track_geometry() keeps one TrackGeometry per world (WORLD_NAME inside
+Robomaker, DR_WORLD_NAME otherwise) in memory, and stores the arrays in
+<cache_dir>/<world>-<digest>.npz, so that the workers and later runs of
+the same track load them instead of computing them again. The digest
+covers the waypoints and the settings, a changed track is not mixed up
+with a cached one.
+
+Robomaker only downloads one reward function file; dr-upload-custom-files
+therefore prepends the source of this module (see utils/reward-profile.py)
+when the reward function imports it, and uploads the result to the
+simulation-only DR_LOCAL_S3_SIMULATION_REWARD_KEY, so models keep the
+original. The host does not need NumPy for that.
+
+The lookahead point is on the racing line if one is given (one point per
+waypoint, e.g. from a track .npy file of a racing line), otherwise on the
+center line.
+"""
+
+import hashlib
+import math
+import os
+
+import numpy as np
+
+DEFAULT_LOOKAHEAD = 1.0
+CACHE_DIR = os.environ.get('DR_TRACK_GEOMETRY_CACHE', '/tmp/track-geometry')
+ARRAYS = ('x', 'y', 'length', 'distance', 'heading', 'curvature', 'ux', 'uy',
+          'lookahead_index', 'lookahead_x', 'lookahead_y', 'lookahead_heading', 'curvature_ahead')
+
+_tracks = {}
+
+
+def _wrap(degrees):
+    return (degrees + 180.0) % 360.0 - 180.0
+
+
+def world_name():
+    return os.environ.get('WORLD_NAME') or os.environ.get('DR_WORLD_NAME') or 'track'
+
+
+def digest(waypoints, lookahead=DEFAULT_LOOKAHEAD, racing_line=None):
+    h = hashlib.sha1(np.asarray(waypoints, dtype=np.float64).tobytes())
+    h.update(repr(float(lookahead)).encode())
+    if racing_line is not None:
+        h.update(np.asarray(racing_line, dtype=np.float64).tobytes())
+    return h.hexdigest()[:16]
+
+
+class TrackGeometry:
+    """
+    Per-waypoint arrays of a closed track. Entry i describes waypoint i and
+    the segment from waypoint i to the next one:
+
+        length, distance     segment length, distance from waypoint 0 (m)
+        heading, ux, uy      segment heading (degrees) and unit vector
+        curvature            signed curvature at the waypoint (1/m, left > 0)
+        lookahead_*          index, position and heading (from waypoint i)
+                             of the point `lookahead` meters ahead
+        curvature_ahead      largest |curvature| up to the lookahead point
+    """
+
+    def __init__(self, arrays, track_length):
+        for name in ARRAYS:
+            setattr(self, name, arrays[name])
+        self.track_length = float(track_length)
+
+    @classmethod
+    def compute(cls, waypoints, lookahead=DEFAULT_LOOKAHEAD, racing_line=None):
+        points = np.asarray(waypoints, dtype=np.float64)[:, :2]
+        n = len(points)
+        # DeepRacer tracks repeat the first waypoint at the end.
+        m = n - 1 if n > 1 and np.allclose(points[0], points[-1]) else n
+        p = points[:m]
+        line = p if racing_line is None else np.asarray(racing_line, dtype=np.float64)[:m, :2]
+
+        seg = np.roll(p, -1, axis=0) - p
+        length = np.hypot(seg[:, 0], seg[:, 1])
+        safe_length = np.where(length > 0, length, 1.0)
+        heading = np.degrees(np.arctan2(seg[:, 1], seg[:, 0]))
+        distance = np.concatenate([[0.0], np.cumsum(length)[:-1]])
+        track_length = length.sum()
+
+        turn = np.radians(_wrap(heading - np.roll(heading, 1)))
+        span = (length + np.roll(length, 1)) / 2
+        curvature = np.where(span > 0, turn / np.where(span > 0, span, 1.0), 0.0)
+
+        # Index of the first waypoint at least `lookahead` ahead, across the finish line.
+        doubled = np.concatenate([distance, distance + track_length])
+        ahead = np.searchsorted(doubled, distance + min(lookahead, track_length), side='left')
+        ahead = np.maximum(ahead, np.arange(m) + 1)
+        lookahead_index = ahead % m
+        target = line[lookahead_index]
+        lookahead_heading = np.degrees(np.arctan2(target[:, 1] - line[:, 1], target[:, 0] - line[:, 0]))
+
+        curvature_ahead = np.abs(curvature)
+        abs_curvature = np.abs(curvature)
+        for k in range(1, int((ahead - np.arange(m)).max()) + 1):
+            within = np.arange(m) + k <= ahead
+            curvature_ahead = np.where(within, np.maximum(curvature_ahead, np.roll(abs_curvature, -k)), curvature_ahead)
+
+        index = np.arange(n) % m
+        arrays = {
+            'x': points[:, 0], 'y': points[:, 1],
+            'length': length[index], 'distance': distance[index], 'heading': heading[index],
+            'curvature': curvature[index], 'ux': (seg[:, 0] / safe_length)[index], 'uy': (seg[:, 1] / safe_length)[index],
+            'lookahead_index': lookahead_index[index], 'lookahead_x': target[index, 0], 'lookahead_y': target[index, 1],
+            'lookahead_heading': lookahead_heading[index], 'curvature_ahead': curvature_ahead[index],
+        }
+        return cls(arrays, track_length)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls({name: data[name] for name in ARRAYS}, data['track_length'])
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+        with open(tmp_path, 'wb') as f:
+            np.savez(f, track_length=self.track_length, **{name: getattr(self, name) for name in ARRAYS})
+        os.replace(tmp_path, path)
+
+    # Lookups for a step, by params['closest_waypoints'].
+
+    def track_heading(self, params):
+        return float(self.heading[params['closest_waypoints'][0]])
+
+    def heading_error(self, params):
+        """Absolute difference (degrees) of the car's heading and the track's."""
+        return abs(_wrap(params['heading'] - self.heading[params['closest_waypoints'][0]]))
+
+    def target_heading(self, params):
+        """Heading (degrees) from the car to the lookahead point."""
+        i = params['closest_waypoints'][0]
+        return math.degrees(math.atan2(self.lookahead_y[i] - params['y'], self.lookahead_x[i] - params['x']))
+
+    def target_error(self, params):
+        """Absolute difference (degrees) of the car's heading and target_heading()."""
+        return abs(_wrap(params['heading'] - self.target_heading(params)))
+
+    def curvature_at(self, params):
+        return float(self.curvature[params['closest_waypoints'][1]])
+
+    def max_curvature_ahead(self, params):
+        return float(self.curvature_ahead[params['closest_waypoints'][1]])
+
+    def track_distance(self, params):
+        """Distance (m) of the car along the center line from waypoint 0."""
+        i = params['closest_waypoints'][0]
+        along = (params['x'] - self.x[i]) * self.ux[i] + (params['y'] - self.y[i]) * self.uy[i]
+        return float(self.distance[i] + min(max(along, 0.0), self.length[i]))
+
+
+def track_geometry(params, world=None, lookahead=DEFAULT_LOOKAHEAD, racing_line=None, cache_dir=None):
+    """
+    Returns the TrackGeometry of params['waypoints'], from memory, the disk
+    cache, or computed (and then cached).
+    """
+    waypoints = params['waypoints']
+    key = (world or world_name(), len(waypoints), tuple(waypoints[0]), float(lookahead),
+           None if racing_line is None else id(racing_line))
+    track = _tracks.get(key)
+    if track is not None:
+        return track
+
+    path = os.path.join(cache_dir or CACHE_DIR, '{}-{}.npz'.format(key[0], digest(waypoints, lookahead, racing_line)))
+    try:
+        track = TrackGeometry.load(path)
+    except (OSError, KeyError, ValueError):
+        track = TrackGeometry.compute(waypoints, lookahead, racing_line)
+        try:
+            track.save(path)
+        except OSError as e:
+            print('WARNING: Could not cache track geometry in {}: {}'.format(path, e))
+    _tracks[key] = track
+    return track
+
@@ -0,0 +1,96 @@
+"""
+Object transfers between two S3 locations without staging files on disk.
+
+If source and target can be reached with the same client (e.g. both in the
+local minio) objects are copied server-side. Otherwise the source object is
+streamed into a parallel multipart upload on the target.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+MB = 1024 * 1024
+
+
+def transfer_config(max_concurrency=10):
+    from boto3.s3.transfer import TransferConfig
+    return TransferConfig(multipart_threshold=8 * MB, multipart_chunksize=16 * MB,
+                          max_concurrency=max_concurrency)
+
+
+def s3_url(bucket, key):
+    return 's3://{}/{}'.format(bucket, key)
+
+
+class TransferEngine:
+
+    def __init__(self, source_client, target_client, server_side=False, dry_run=False, max_concurrency=10):
+        self.source = source_client
+        self.target = target_client
+        self.server_side = server_side
+        self.dry_run = dry_run
+        self.max_concurrency = max_concurrency
+        self.config = transfer_config(max_concurrency)
+
+    def _log(self, action, src, dst):
+        print('{}{}: {} to {}'.format('(dryrun) ' if self.dry_run else '', action, src, dst))
+
+    def exists(self, bucket, key):
+        from botocore.exceptions import ClientError
+        try:
+            self.source.head_object(Bucket=bucket, Key=key)
+            return True
+        except ClientError:
+            return False
+
+    def read(self, bucket, key):
+        """Returns the content of a (small) source object, or None if it does not exist."""
+        from botocore.exceptions import ClientError
+        try:
+            return self.source.get_object(Bucket=bucket, Key=key)['Body'].read()
+        except ClientError:
+            return None
+
+    def copy(self, src_bucket, src_key, dst_bucket, dst_key):
+        self._log('copy', s3_url(src_bucket, src_key), s3_url(dst_bucket, dst_key))
+        if self.dry_run:
+            return
+
+        if self.server_side:
+            # Managed copy; uses multipart UploadPartCopy for large objects.
+            self.target.copy({'Bucket': src_bucket, 'Key': src_key}, dst_bucket, dst_key, Config=self.config)
+        else:
+            body = self.source.get_object(Bucket=src_bucket, Key=src_key)['Body']
+            self.target.upload_fileobj(body, dst_bucket, dst_key, Config=self.config)
+
+    def put(self, body, dst_bucket, dst_key):
+        self._log('upload', '<memory>', s3_url(dst_bucket, dst_key))
+        if self.dry_run:
+            return
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        self.target.put_object(Bucket=dst_bucket, Key=dst_key, Body=body)
+
+    def copy_many(self, jobs):
+        """Runs (src_bucket, src_key, dst_bucket, dst_key) copies in parallel."""
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+            futures = [executor.submit(self.copy, *job) for job in jobs]
+            for f in futures:
+                f.result()
+
+    def list_target(self, bucket, prefix):
+        keys = []
+        paginator = self.target.get_paginator('list_objects_v2')
+        for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+            keys.extend(o['Key'] for o in page.get('Contents', []))
+        return keys
+
+    def delete(self, bucket, keys):
+        """Deletes keys in the target bucket in batches of 1000."""
+        keys = list(keys)
+        for key in keys:
+            print('{}delete: {}'.format('(dryrun) ' if self.dry_run else '', s3_url(bucket, key)))
+        if self.dry_run:
+            return
+        for i in range(0, len(keys), 1000):
+            batch = [{'Key': k} for k in keys[i:i + 1000]]
+            self.target.delete_objects(Bucket=bucket, Delete={'Objects': batch, 'Quiet': True})
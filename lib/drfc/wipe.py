@@ -0,0 +1,94 @@
+"""
+Fast deletion of everything below an S3 prefix.
+
+The prefix is listed page by page (1000 keys per page) and every page is
+deleted with one DeleteObjects request, while the next pages are still
+being listed. Up to max_workers batches are in flight at a time.
+
+After a wipe, forget_prefix() removes what is kept locally about the
+prefix: the checkpoint index cache, the training policy state and the
+download manifest entries of its objects.
+"""
+
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+BATCH = 1000
+
+
+class WipeError(Exception):
+    pass
+
+
+def wipe_prefix(s3_client, bucket, prefix, dry_run=False, max_workers=8, progress=None):
+    """
+    Deletes all objects below prefix/ (the prefix itself is treated as a
+    folder). Returns the number of objects deleted, or found if dry_run.
+    Calls progress(deleted, elapsed seconds) after every batch. Raises
+    WipeError if any object could not be deleted.
+    """
+    prefix = prefix.rstrip('/') + '/'
+    start = time.time()
+    deleted = 0
+    errors = []
+
+    def delete(keys):
+        if dry_run:
+            return len(keys), []
+        response = s3_client.delete_objects(Bucket=bucket, Delete={
+            'Objects': [{'Key': k} for k in keys], 'Quiet': True})
+        failed = response.get('Errors', [])
+        return len(keys) - len(failed), failed
+
+    def collect(done):
+        nonlocal deleted
+        for f in done:
+            n, failed = f.result()
+            deleted += n
+            errors.extend(failed)
+            if progress:
+                progress(deleted, time.time() - start)
+
+    paginator = s3_client.get_paginator('list_objects_v2')
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = set()
+        for page in paginator.paginate(Bucket=bucket, Prefix=prefix, PaginationConfig={'PageSize': BATCH}):
+            keys = [o['Key'] for o in page.get('Contents', [])]
+            if not keys:
+                continue
+            if len(pending) >= max_workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            pending.add(executor.submit(delete, keys))
+        collect(wait(pending).done)
+
+    if errors:
+        raise WipeError('{} objects could not be deleted, e.g. {}: {}'.format(
+            len(errors), errors[0].get('Key'), errors[0].get('Message')))
+    return deleted
+
+
+def forget_prefix(s3_client, bucket, prefix):
+    """Removes the local caches of a wiped prefix; returns the removed files."""
+    from drfc import policy
+    from drfc.checkpoints import CheckpointIndex
+    from drfc.objectstore import LocalManifest
+
+    prefix = prefix.strip('/')
+    removed = []
+    for path in (CheckpointIndex(s3_client, bucket, prefix).cache_file,
+                 policy.state_file(bucket, prefix)):
+        try:
+            os.remove(path)
+            removed.append(path)
+        except FileNotFoundError:
+            pass
+    LocalManifest(bucket).forget_prefix(prefix)
+    return removed
+
+
+def print_progress(deleted, elapsed):
+    sys.stdout.write('\r{} objects deleted ({:.0f}/s)'.format(deleted, deleted / elapsed if elapsed > 0 else 0))
+    sys.stdout.flush()
@@ -5,6 +5,8 @@ docker run --rm -d -p "8888:8888" \
 -v `pwd`/../../docker/volumes/.aws:/root/.aws \
 -v `pwd`/../../data/analysis:/workspace/analysis \
 -v `pwd`/../../data/minio:/workspace/minio \
+-v `pwd`/../../lib:/workspace/lib:ro \
+-e PYTHONPATH=/workspace/lib \
 --name loganalysis \
 --network sagemaker-local \
  awsdeepracercommunity/deepracer-analysis:$DR_ANALYSIS_IMAGE
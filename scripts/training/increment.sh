@@ -93,5 +93,5 @@ then
             exit 1
         fi
     fi
-    aws ${DR_LOCAL_PROFILE_ENDPOINT_URL} s3 rm s3://${DR_LOCAL_S3_BUCKET}/${NEW_RUN_MODEL} --recursive
+    python3 $DR_DIR/utils/wipe-prefix.py ${NEW_RUN_MODEL} || exit 1
 fi
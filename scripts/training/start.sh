@@ -69,7 +69,7 @@ then
     exit 1
   else
     echo "Wiping path $S3_PATH."
-    aws ${DR_LOCAL_PROFILE_ENDPOINT_URL} s3 rm --recursive ${S3_PATH}
+    python3 $DR_DIR/utils/wipe-prefix.py ${DR_LOCAL_S3_MODEL_PREFIX} || exit 1
   fi
 fi
 
@@ -162,6 +162,13 @@ else
   DISPLAY=$ROBO_DISPLAY docker-compose $COMPOSE_FILES -p $STACK_NAME --log-level ERROR up -d --scale robomaker=$DR_WORKERS
 fi
 
+# Pin Sagemaker and each Robomaker worker to their own cores once they are up
+if [[ "${DR_TRAIN_CPU_PINNING,,}" == "true" ]]; then
+  echo "Pinning Sagemaker and Robomaker to disjoint CPU sets, see $DR_DIR/tmp/placement-$DR_RUN_ID.log"
+  mkdir -p $DR_DIR/tmp
+  nohup python3 $DR_DIR/utils/worker-placement.py --apply --wait 300 > $DR_DIR/tmp/placement-$DR_RUN_ID.log 2>&1 &
+fi
+
 # Viewer
 if [ -n "$OPT_VIEWER" ]; then
   (sleep 5; dr-update-viewer) 
@@ -183,6 +190,8 @@ if [[ "${OPT_DISPLAY,,}" == "all" && -n "${DISPLAY}" && "${DR_HOST_X,,}" == "tru
   else
     dr-logs-robomaker -w 15
   fi
+elif [[ "${OPT_DISPLAY,,}" == "all" ]]; then
+  dr-logs-all -w 15
 elif [[ "${OPT_DISPLAY,,}" == "robomaker" ]]; then
   dr-logs-robomaker -w 15 -n $OPT_ROBOMAKER
 elif [[ "${OPT_DISPLAY,,}" == "sagemaker" ]]; then
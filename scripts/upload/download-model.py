@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+
+"""
+Copies a model from a remote S3 location into the local bucket; files
+already in another local model are copied server-side instead of downloaded
+again (see drfc.objectstore). Called from download-model.sh.
+"""
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'lib'))
+from drfc import s3
+from drfc.objectstore import ModelDownload
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Download a model into the local S3 bucket.')
+    parser.add_argument('--source', help='s3://bucket/prefix of the model.')
+    parser.add_argument('--target-prefix')
+    parser.add_argument('--dryrun', action='store_true')
+    parser.add_argument('--wipe', action='store_true', help='Delete other files in the target prefix.')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    env = os.environ
+
+    if not args.source or not args.source.startswith('s3://') or not args.target_prefix:
+        print("Requires --source s3://bucket/prefix and --target-prefix.")
+        return 1
+    source_bucket, _, source_prefix = args.source[len('s3://'):].partition('/')
+
+    if env.get('DR_LOCAL_S3_AUTH_MODE', 'profile') == 'profile':
+        upload_profile = env.get('DR_UPLOAD_S3_PROFILE', 'default')
+    else:
+        upload_profile = None
+    source_client = s3.client(profile=upload_profile, region=env.get('DR_AWS_APP_REGION', 'us-east-1'),
+                              max_pool_connections=20)
+    target_client = s3.local_client(max_pool_connections=20)
+
+    download = ModelDownload(source_client, target_client, dry_run=args.dryrun)
+    download.run(source_bucket, source_prefix, env.get('DR_LOCAL_S3_BUCKET', 'bucket'), args.target_prefix,
+                 delete=args.wipe)
+    print("{downloaded} downloaded, {copied} copied from local models, {skipped} unchanged.".format(**download.counts))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
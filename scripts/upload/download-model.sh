@@ -66,7 +66,7 @@ SOURCE_HYPERPARAM_FILE_S3_KEY="${SOURCE_S3_URL}/ip/hyperparameters.json"
 SOURCE_METADATA_S3_KEY="${SOURCE_S3_URL}/model/model_metadata.json"
 
 WORK_DIR=${DR_DIR}/tmp/download
-mkdir -p ${WORK_DIR} && rm -rf ${WORK_DIR} && mkdir -p ${WORK_DIR}/config ${WORK_DIR}/full
+mkdir -p ${WORK_DIR} && rm -rf ${WORK_DIR} && mkdir -p ${WORK_DIR}/config
 
 # Check if metadata-files are available
 REWARD_FILE=$(aws ${DR_UPLOAD_PROFILE} s3 cp "${SOURCE_REWARD_FILE_S3_KEY}" ${WORK_DIR}/config/ --no-progress | awk '/reward/ {print $4}'| xargs readlink -f 2> /dev/null)
@@ -93,9 +93,12 @@ then
     fi
 fi
 
-cd ${WORK_DIR}
-aws ${DR_UPLOAD_PROFILE} s3 sync "${SOURCE_S3_URL}" ${WORK_DIR}/full/ ${OPT_DRYRUN}
-aws ${DR_LOCAL_PROFILE_ENDPOINT_URL} s3 sync ${WORK_DIR}/full/ s3://${TARGET_S3_BUCKET}/${TARGET_S3_PREFIX}/ ${OPT_DRYRUN} ${OPT_WIPE}
+# Files already present in the target are skipped, files of other local
+# models are copied within the local bucket instead of downloaded again.
+DOWNLOAD_ARGS="--source ${SOURCE_S3_URL} --target-prefix ${TARGET_S3_PREFIX}"
+[[ -n "${OPT_DRYRUN}" ]] && DOWNLOAD_ARGS="$DOWNLOAD_ARGS --dryrun"
+[[ -n "${OPT_WIPE}" ]] && DOWNLOAD_ARGS="$DOWNLOAD_ARGS --wipe"
+python3 $DR_DIR/scripts/upload/download-model.py $DOWNLOAD_ARGS || exit 1
 
 if [[ -n "${OPT_CONFIG}" ]];
 then
@@ -1,21 +1,12 @@
 #!/usr/bin/env python3
 
-import boto3
 import sys
 import os 
-import time
-import json
-import io
-import yaml
 from botocore.loaders import UnknownServiceError
 
-try:
-    import pandas as pd
-    import deepracer
-    from deepracer import boto3_enhancer
-except ImportError:
-    print("You need to install pandas and deepracer-utils to use the import function.")
-    exit(1)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'lib'))
+
+from drfc import console
 
 # Read in command 
 aws_profile = sys.argv[1]
@@ -28,29 +19,22 @@ if not aws_s3_role:
     print("You must configure an IAM role with access to the S3 bucket in variable DR_UPLOAD_S3_ROLE ")
     exit(1)
 
-if len(aws_profile) > 1:
-    session = boto3.session.Session(region_name='us-east-1', profile_name=aws_profile)
-else:
-    session = boto3.session.Session(region_name='us-east-1')
+if len(aws_profile) <= 1:
+    aws_profile = None
 
-global dr 
 try:
-    dr = boto3_enhancer.deepracer_client(session=session)
+    dr = console.deepracer_client(aws_profile)
+except ImportError:
+    print("You need to install deepracer-utils to use the import function.")
+    exit(1)
 except UnknownServiceError:
     print ("Boto3 service 'deepracer' is not installed. Cannot import model.")
     print ("Install with 'pip install deepracer-utils' and 'python -m deepracer install-cli --force'")
     exit(1)
 
-# Load model to check if it already exists
-a = dr.list_models(ModelType='REINFORCEMENT_LEARNING', MaxResults=25)
-model_dict = a['Models']
-while "NextToken" in a:
-    a = dr.list_models(ModelType='REINFORCEMENT_LEARNING', MaxResults=25, NextToken=a["NextToken"])
-    model_dict.extend(a['Models'])
-
-models = pd.DataFrame.from_dict(model_dict)
-
-if models[models['ModelName']==dr_model_name].size > 0:
+# Check if the model already exists; not from cache, it may have been deleted since
+lookup = console.ConsoleLookup(dr, aws_profile)
+if lookup.model_arn(dr_model_name, fresh=True) is not None:
     sys.exit('Model {} already exists.'.format(dr_model_name))
 
 # Import from S3
@@ -58,6 +42,7 @@ print('Importing from s3://{}/{}'.format(aws_s3_bucket,aws_s3_prefix))
 response = dr.import_model(Name=dr_model_name, ModelArtifactsS3Path='s3://{}/{}'.format(aws_s3_bucket,aws_s3_prefix), RoleArn=aws_s3_role, Type='REINFORCEMENT_LEARNING')
 
 if response['ResponseMetadata']['HTTPStatusCode'] == 200:
+    lookup.add_model(dr_model_name, response['ModelArn'])
     print('Model importing as {}'.format(response['ModelArn']))
 else:
     sys.exit('Error occcured when uploading')
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+
+"""
+Copies a locally trained model (metadata, one checkpoint and the generated
+training_params.yaml) to the upload target. Called from upload-model.sh.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'lib'))
+from drfc import config as drconfig
+from drfc import s3
+from drfc.checkpoints import CheckpointIndex, checkpoint_arg
+from drfc.transfer import TransferEngine
+
+
+def checkpoint_type(value):
+    try:
+        return str(checkpoint_arg(value))
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Upload a model checkpoint to the DeepRacer upload bucket.')
+    parser.add_argument('--source-prefix', required=True)
+    parser.add_argument('--target-bucket', required=True)
+    parser.add_argument('--target-prefix', required=True)
+    parser.add_argument('--checkpoint', default='last', type=checkpoint_type, help="'last', 'best' or a checkpoint number.")
+    parser.add_argument('--local', action='store_true', help='Target is in the local S3 bucket.')
+    parser.add_argument('--dryrun', action='store_true')
+    parser.add_argument('--wipe', action='store_true', help='Delete other files in the target model folder.')
+    parser.add_argument('--force', action='store_true', help='Do not ask for confirmation.')
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    env = os.environ
+
+    source_bucket = env.get('DR_LOCAL_S3_BUCKET', 'bucket')
+    source_prefix = args.source_prefix
+    source_model = '{}/model'.format(source_prefix)
+    target_bucket = args.target_bucket
+    target_prefix = args.target_prefix
+
+    source_client = s3.local_client(max_pool_connections=20)
+    if args.local:
+        target_client = source_client
+    else:
+        if env.get('DR_LOCAL_S3_AUTH_MODE', 'profile') == 'profile':
+            upload_profile = env.get('DR_UPLOAD_S3_PROFILE', 'default')
+        else:
+            upload_profile = None
+        target_client = s3.client(profile=upload_profile,
+                                  region=env.get('DR_AWS_APP_REGION', 'us-east-1'),
+                                  max_pool_connections=20)
+
+    engine = TransferEngine(source_client, target_client, server_side=args.local, dry_run=args.dryrun)
+
+    # Check if metadata-files are available
+    reward_key = '{}/reward_function.py'.format(source_prefix)
+    if not engine.exists(source_bucket, reward_key):
+        reward_key = env.get('DR_LOCAL_S3_REWARD_KEY', 'custom_files/reward_function.py')
+        print("Looking for Reward Function in s3://{}/{}".format(source_bucket, reward_key))
+
+    files = [
+        (reward_key, '{}/reward_function.py'.format(target_prefix)),
+        ('{}/model_metadata.json'.format(source_model), '{}/model/model_metadata.json'.format(target_prefix)),
+        ('{}/ip/hyperparameters.json'.format(source_prefix), '{}/ip/hyperparameters.json'.format(target_prefix)),
+        ('{}/TrainingMetrics.json'.format(env.get('DR_LOCAL_S3_METRICS_PREFIX', source_prefix + '/metrics')),
+         '{}/TrainingMetrics.json'.format(target_prefix)),
+    ]
+
+    if all(engine.exists(source_bucket, src) for src, _ in files):
+        print("All meta-data files found. Looking for checkpoint.")
+    else:
+        print("Meta-data files are not found. Exiting.")
+        return 1
+
+    # Find checkpoint
+    print("Looking for model to upload from s3://{}/{}/".format(source_bucket, source_prefix))
+    checkpoints = CheckpointIndex(source_client, source_bucket, source_prefix).refresh()
+    if not checkpoints.index:
+        print("No checkpoint file available at s3://{}/{}. Exiting.".format(source_bucket, source_model))
+        return 1
+
+    if args.checkpoint not in ('last', 'best'):
+        print("Checking for checkpoint {}".format(args.checkpoint))
+    else:
+        print("Checking for {} checkpoint".format('best' if args.checkpoint == 'best' else 'latest tested'))
+    checkpoint_file = checkpoints.get(args.checkpoint)
+    if not checkpoint_file:
+        print("Checkpoint not found. Exiting.")
+        return 1
+
+    checkpoint = checkpoints.index.get('{}_checkpoint'.format(args.checkpoint))
+    if not isinstance(checkpoint, dict) or checkpoint.get('name') != checkpoint_file:
+        checkpoint = {'name': checkpoint_file, 'time_stamp': int(time.time()), 'avg_comp_pct': 50.0}
+    checkpoint_num = checkpoint_file.split('_')[0]
+    print("Checkpoint: {}".format(checkpoint_num))
+
+    # Find checkpoint & model files
+    checkpoint_keys = []
+    paginator = source_client.get_paginator('list_objects_v2')
+    for prefix in ('{}/{}_Step-'.format(source_model, checkpoint_num), '{}/model_{}.pb'.format(source_model, checkpoint_num)):
+        for page in paginator.paginate(Bucket=source_bucket, Prefix=prefix):
+            checkpoint_keys.extend(o['Key'] for o in page.get('Contents', []))
+    if not checkpoint_keys:
+        print("No model files found. Files possibly deleted. Try again.")
+        return 1
+
+    for key in checkpoint_keys:
+        files.append((key, '{}/model/{}'.format(target_prefix, os.path.basename(key))))
+
+    if not args.force:
+        print("Ready to upload model {} to s3://{}/{}/".format(source_prefix, target_bucket, target_prefix))
+        response = input("Are you sure? [y/N] ")
+        if response.lower() not in ('y', 'yes'):
+            print("Aborting.")
+            return 1
+
+    generated = {
+        '{}/model/deepracer_checkpoints.json'.format(target_prefix):
+            json.dumps({'last_checkpoint': checkpoint, 'best_checkpoint': checkpoint}),
+        '{}/model/.coach_checkpoint'.format(target_prefix): checkpoint_file + '\n',
+        '{}/training_params.yaml'.format(target_prefix):
+            drconfig.dump(drconfig.DeepRacerConfig().upload(target_bucket, target_prefix)),
+    }
+
+    if args.wipe:
+        keep = set(dst for _, dst in files) | set(generated)
+        stale = [k for k in engine.list_target(target_bucket, '{}/model/'.format(target_prefix)) if k not in keep]
+        engine.delete(target_bucket, stale)
+
+    engine.copy_many([(source_bucket, src, target_bucket, dst) for src, dst in files])
+    for key, body in generated.items():
+        engine.put(body, target_bucket, key)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+import io
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lib'))
+
+from drfc.checkpoints import CheckpointIndex, retained
+
+ClientError = pytest.importorskip('botocore.exceptions').ClientError
+
+PREFIX = 'rl-deepracer-sagemaker'
+MODEL = PREFIX + '/model/'
+
+
+class FakeBucket:
+    """Enough of an S3 client for CheckpointIndex: one bucket, listed two keys per page."""
+
+    def __init__(self):
+        self.objects = {}
+        self.listings = []
+
+    def checkpoint(self, n, step):
+        for suffix in ('.index', '.meta', '.data-00000-of-00001'):
+            self.objects['{}{}_Step-{}.ckpt{}'.format(MODEL, n, step, suffix)] = b''
+        self.objects['{}model_{}.pb'.format(MODEL, n)] = b''
+
+    def index(self, best, last):
+        self.objects[MODEL + 'deepracer_checkpoints.json'] = json.dumps({
+            'best_checkpoint': {'name': best}, 'last_checkpoint': {'name': last}}).encode()
+
+    def wipe(self):
+        self.objects = {}
+
+    def _missing(self, operation):
+        return ClientError({'Error': {'Code': 'NoSuchKey', 'Message': ''}}, operation)
+
+    def get_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise self._missing('GetObject')
+        return {'Body': io.BytesIO(self.objects[Key])}
+
+    def head_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise ClientError({'Error': {'Code': '404', 'Message': ''}}, 'HeadObject')
+        return {}
+
+    def put_object(self, Bucket, Key, Body):
+        self.objects[Key] = Body
+
+    def delete_objects(self, Bucket, Delete):
+        for o in Delete['Objects']:
+            self.objects.pop(o['Key'], None)
+        return {}
+
+    def get_paginator(self, name):
+        return self
+
+    def paginate(self, Bucket, Prefix, StartAfter=None):
+        self.listings.append(StartAfter)
+        keys = sorted(k for k in self.objects if k.startswith(Prefix) and (StartAfter is None or k > StartAfter))
+        for i in range(0, len(keys), 2):
+            yield {'Contents': [{'Key': k} for k in keys[i:i + 2]]}
+
+
+@pytest.fixture
+def bucket():
+    b = FakeBucket()
+    for n in range(1, 4):
+        b.checkpoint(n, n * 100)
+    b.index('2_Step-200.ckpt', '3_Step-300.ckpt')
+    return b
+
+
+def test_refresh_lists_incrementally(bucket, tmp_path):
+    index = CheckpointIndex(bucket, 'bucket', PREFIX, cache_dir=str(tmp_path)).refresh()
+    assert index.numbers() == [1, 2, 3]
+    assert (index.get('best'), index.get('last'), index.get(1)) == ('2_Step-200.ckpt', '3_Step-300.ckpt', '1_Step-100.ckpt')
+    assert index.by_step(300) == '3_Step-300.ckpt'
+
+    bucket.checkpoint(4, 400)
+    bucket.index('2_Step-200.ckpt', '4_Step-400.ckpt')
+    index = CheckpointIndex(bucket, 'bucket', PREFIX, cache_dir=str(tmp_path)).refresh()
+    assert index.numbers() == [1, 2, 3, 4]
+    assert bucket.listings == [None, MODEL + '3_Step-300.ckpt.index']
+
+
+def test_refresh_relists_when_checkpoint_number_gains_a_digit(bucket, tmp_path):
+    for n in range(4, 10):
+        bucket.checkpoint(n, n * 100)
+    bucket.index('2_Step-200.ckpt', '9_Step-900.ckpt')
+    CheckpointIndex(bucket, 'bucket', PREFIX, cache_dir=str(tmp_path)).refresh()
+
+    bucket.checkpoint(10, 1000)
+    bucket.index('2_Step-200.ckpt', '10_Step-1000.ckpt')
+    index = CheckpointIndex(bucket, 'bucket', PREFIX, cache_dir=str(tmp_path)).refresh()
+    assert index.numbers() == list(range(1, 11))
+    assert bucket.listings[-1] is None
+
+
+def test_refresh_drops_checkpoints_of_a_wiped_prefix(bucket, tmp_path):
+    CheckpointIndex(bucket, 'bucket', PREFIX, cache_dir=str(tmp_path)).refresh()
+
+    bucket.wipe()
+    bucket.checkpoint(1, 50)
+    bucket.index('1_Step-50.ckpt', '1_Step-50.ckpt')
+    index = CheckpointIndex(bucket, 'bucket', PREFIX, cache_dir=str(tmp_path)).refresh()
+    assert index.numbers() == [1]
+    assert index.get(1) == '1_Step-50.ckpt'
+    assert index.get(3) is None
+    assert index.by_step(300) is None
+
+
+def test_refresh_drops_checkpoints_gone_after_restart(bucket, tmp_path):
+    CheckpointIndex(bucket, 'bucket', PREFIX, cache_dir=str(tmp_path)).refresh()
+
+    # Restarted training got past the old last checkpoint before the next refresh.
+    bucket.wipe()
+    for n in range(1, 5):
+        bucket.checkpoint(n, n * 10)
+    bucket.index('4_Step-40.ckpt', '4_Step-40.ckpt')
+    index = CheckpointIndex(bucket, 'bucket', PREFIX, cache_dir=str(tmp_path)).refresh()
+    assert index.numbers() == [1, 2, 3, 4]
+    assert index.get(3) == '3_Step-30.ckpt'
+
+
+@pytest.mark.parametrize('which', ['foo', '', None, '1.5'])
+def test_get_rejects_invalid_checkpoint(bucket, tmp_path, which):
+    index = CheckpointIndex(bucket, 'bucket', PREFIX, cache_dir=str(tmp_path)).refresh()
+    with pytest.raises(ValueError):
+        index.get(which)
+
+
+def test_by_step_rejects_invalid_step(bucket, tmp_path):
+    index = CheckpointIndex(bucket, 'bucket', PREFIX, cache_dir=str(tmp_path)).refresh()
+    with pytest.raises(ValueError):
+        index.by_step('last')
+
+
+def test_retained_keeps_newest_and_every_mth():
+    assert retained(range(1, 11), keep_last=3) == {8, 9, 10}
+    assert retained(range(1, 11), keep_last=2, keep_every=4) == {4, 8, 9, 10}
+    assert retained([5, 3, 1], keep_last=0) == set()
+    assert retained([], keep_last=3, keep_every=2) == set()
+
+
+def test_delete_spares_referenced_and_pinned_checkpoints(bucket, tmp_path):
+    for n in range(4, 7):
+        bucket.checkpoint(n, n * 100)
+    bucket.index('2_Step-200.ckpt', '6_Step-600.ckpt')
+    index = CheckpointIndex(bucket, 'bucket', PREFIX, cache_dir=str(tmp_path)).refresh()
+    index.write_pinned({4})
+
+    numbers = index.numbers()
+    deleted = index.delete(set(numbers) - retained(numbers, keep_last=1))
+    assert deleted == [1, 3, 5]
+    assert index.numbers() == [2, 4, 6]
+    assert not any(k.startswith(MODEL + '1_Step-') or k == MODEL + 'model_1.pb' for k in bucket.objects)
+    assert MODEL + 'model_4.pb' in bucket.objects
+    assert CheckpointIndex(bucket, 'bucket', PREFIX, cache_dir=str(tmp_path)).refresh().numbers() == [2, 4, 6]
+
+
+def test_get_without_best_checkpoint(bucket, tmp_path):
+    bucket.objects[MODEL + 'deepracer_checkpoints.json'] = json.dumps({
+        'best_checkpoint': None, 'last_checkpoint': {'name': '3_Step-300.ckpt'}}).encode()
+    index = CheckpointIndex(bucket, 'bucket', PREFIX, cache_dir=str(tmp_path)).refresh()
+    assert index.get('best') is None
+    assert index.get('last') == '3_Step-300.ckpt'
@@ -0,0 +1,28 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lib'))
+
+from drfc import config
+
+
+def test_upload_sets_car_color_only_for_deepracer_shell():
+    env = {'DR_CAR_COLOR': 'Blue'}
+    assert config.DeepRacerConfig(env).upload()['CAR_COLOR'] == 'Blue'
+    env['DR_CAR_BODY_SHELL_TYPE'] = 'f1_car'
+    params = config.DeepRacerConfig(env).upload()
+    assert params['BODY_SHELL_TYPE'] == 'f1_car'
+    assert 'CAR_COLOR' not in params
+
+
+def test_training_always_sets_car_color():
+    env = {'DR_CAR_COLOR': 'Blue', 'DR_CAR_BODY_SHELL_TYPE': 'f1_car'}
+    assert config.DeepRacerConfig(env).training()['CAR_COLOR'] == 'Blue'
+
+
+def test_simulation_reward_key_is_separate_from_reward_key():
+    env = {'DR_LOCAL_S3_REWARD_KEY': 'files/reward_function.py'}
+    assert config.simulation_reward_key(env) == 'files/reward_function_simulation.py'
+    assert config.DeepRacerConfig(env).training()['REWARD_FILE_S3_KEY'] == 'files/reward_function.py'
+    env['DR_LOCAL_S3_SIMULATION_REWARD_KEY'] = 'files/sim.py'
+    assert config.simulation_reward_key(env) == 'files/sim.py'
@@ -0,0 +1,39 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lib'))
+
+from drfc.console import ConsoleLookup
+
+
+class FakeConsole:
+
+    def __init__(self, models):
+        self.models = models
+        self.listings = 0
+
+    def list_models(self, MaxResults, ModelType):
+        self.listings += 1
+        return {'Models': [{'ModelName': n, 'ModelArn': a} for n, a in self.models.items()]}
+
+
+def test_fresh_lookup_sees_deleted_model(tmp_path):
+    dr = FakeConsole({'model': 'arn:1'})
+    lookup = ConsoleLookup(dr, cache_dir=str(tmp_path))
+    assert lookup.model_arn('model') == 'arn:1'
+
+    del dr.models['model']
+    assert ConsoleLookup(dr, cache_dir=str(tmp_path)).model_arn('model') == 'arn:1'
+    assert ConsoleLookup(dr, cache_dir=str(tmp_path)).model_arn('model', fresh=True) is None
+
+
+def test_forgotten_model_is_looked_up_again(tmp_path):
+    dr = FakeConsole({'model': 'arn:1'})
+    lookup = ConsoleLookup(dr, cache_dir=str(tmp_path))
+    assert lookup.model_arn('model') == 'arn:1'
+    assert dr.listings == 1
+
+    dr.models['model'] = 'arn:2'
+    lookup.forget_model('model')
+    assert ConsoleLookup(dr, cache_dir=str(tmp_path)).model_arn('model') == 'arn:2'
+    assert dr.listings == 2
@@ -0,0 +1,62 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lib'))
+
+from drfc import envfile
+
+
+@pytest.mark.parametrize('raw, parts', [
+    ('plain', [('text', 'plain')]),
+    ('"two words"', [('text', 'two words')]),
+    ("'$NOT ${EXPANDED}'", [('text', '$NOT ${EXPANDED}')]),
+    ('a=b=c', [('text', 'a=b=c')]),
+    ('value # comment', [('text', 'value')]),
+    ('s3://$BUCKET/${PREFIX}-1', [('text', 's3://'), ('var', 'BUCKET'), ('text', '/'), ('var', 'PREFIX'),
+                                  ('text', '-1')]),
+    ('"\\"quoted\\" \\$HOME"', [('text', '"quoted" $HOME')]),
+    ('cost$', [('text', 'cost$')]),
+    ('', []),
+])
+def test_parse_value(raw, parts):
+    assert envfile.parse_value(raw) == parts
+
+
+@pytest.mark.parametrize('raw', ['"open', "'open", '${BAD-NAME}'])
+def test_parse_value_rejects_malformed(raw):
+    with pytest.raises(ValueError):
+        envfile.parse_value(raw)
+
+
+def test_read_env_expands_in_file_order(tmp_path):
+    path = tmp_path / 'run.env'
+    path.write_text('# comment\n\nDR_RUN_ID=1\nexport DR_PREFIX="model-$DR_RUN_ID"\nDR_PATH=$HOME/${DR_PREFIX}\n')
+    assert envfile.read_env(str(path), {'HOME': '/home/dr'}) == {
+        'DR_RUN_ID': '1', 'DR_PREFIX': 'model-1', 'DR_PATH': '/home/dr/model-1'}
+
+
+def test_parse_reports_line_of_bad_assignment(tmp_path):
+    path = tmp_path / 'run.env'
+    path.write_text('A=1\nnot an assignment\n')
+    with pytest.raises(ValueError, match=':2:'):
+        list(envfile.parse(str(path)))
+
+
+def test_render_matches_bash(tmp_path):
+    system = tmp_path / 'system.env'
+    system.write_text('DR_BUCKET=bucket\nDR_NOTE=\'cost $5 "each"\'\n')
+    run = tmp_path / 'run.env'
+    run.write_text('DR_PREFIX=${DR_BUCKET}/model\\ 1\nDR_CMD="back\\\\slash \\"quoted\\" \\$1"\n')
+    script = tmp_path / 'env.sh'
+    script.write_text(envfile.render([str(system), str(run)]))
+
+    names = ('DR_BUCKET', 'DR_NOTE', 'DR_PREFIX', 'DR_CMD')
+    show = 'printf "%s\\n" ' + ' '.join('"${}"'.format(n) for n in names)
+    rendered = subprocess.run(['bash', '-c', 'source {} && {}'.format(script, show)],
+                              stdout=subprocess.PIPE, check=True).stdout.decode().splitlines()
+    sourced = subprocess.run(['bash', '-c', 'set -a; source {}; source {}; {}'.format(system, run, show)],
+                             stdout=subprocess.PIPE, check=True).stdout.decode().splitlines()
+    assert rendered == sourced == ['bucket', 'cost $5 "each"', 'bucket/model 1', 'back\\slash "quoted" $1']
@@ -0,0 +1,35 @@
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lib'))
+
+from drfc import logs, throughput
+
+
+def test_stack_sources_are_named_by_replica(monkeypatch):
+    ps = {
+        'deepracer-eval-0_robomaker': 'deepracer-eval-0_robomaker.1.abc e1\n',
+        'deepracer-0_robomaker': 'deepracer-0_robomaker.10.abc c10\ndeepracer-0_robomaker.2.abc c2\n',
+    }
+    monkeypatch.setattr(throughput, 'docker', lambda *args: ps[args[2].split('=', 1)[1]])
+    sources = logs.stack_sources('0')
+    assert [(s.name, s.container) for s in sources] == [('robomaker-2', 'c2'), ('robomaker-10', 'c10')]
+    sources = logs.stack_sources('0', evaluation=True)
+    assert [(s.name, s.container) for s in sources] == [('robomaker-1', 'e1')]
+
+
+def test_expected_sources():
+    assert logs.expected_sources(2, 'model') == ['sagemaker', 'robomaker-1', 'robomaker-2']
+    assert logs.expected_sources(2) == ['robomaker-1', 'robomaker-2']
+    assert logs.expected_sources(1, 'model', evaluation=True) == ['robomaker-1']
+
+
+def test_aggregator_filters_with_context(tmp_path):
+    log = tmp_path / 'robomaker.log'
+    log.write_text('start\nstep 1\nTraceback (most recent call last)\nstep 2\n')
+    out = io.StringIO()
+    aggregator = logs.LogAggregator([logs.FileLogSource('robomaker-1', str(log))], include=['errors'], context=1)
+    assert aggregator.run(out) == 1
+    assert out.getvalue() == 'robomaker-1 | step 1\nrobomaker-1 | Traceback (most recent call last)\n--\n'
+    assert aggregator.recent('robomaker-1', 2) == ['Traceback (most recent call last)', 'step 2']
@@ -0,0 +1,96 @@
+import hashlib
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lib'))
+
+from drfc.objectstore import LocalManifest, ModelDownload
+
+ClientError = pytest.importorskip('botocore.exceptions').ClientError
+
+
+class FakeBucket:
+    """One bucket of an S3 client; objects are {key: bytes}, ETags are MD5s."""
+
+    def __init__(self, objects=None):
+        self.objects = dict(objects or {})
+        self.gets = []
+        self.copies = []
+
+    @staticmethod
+    def etag(body):
+        return '"{}"'.format(hashlib.md5(body).hexdigest())
+
+    def get_paginator(self, name):
+        return self
+
+    def paginate(self, Bucket, Prefix):
+        yield {'Contents': [{'Key': k, 'ETag': self.etag(v), 'Size': len(v)}
+                            for k, v in sorted(self.objects.items()) if k.startswith(Prefix)]}
+
+    def head_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise ClientError({'Error': {'Code': '404', 'Message': ''}}, 'HeadObject')
+        return {'ETag': self.etag(self.objects[Key])}
+
+    def get_object(self, Bucket, Key):
+        self.gets.append(Key)
+        return {'Body': io.BytesIO(self.objects[Key])}
+
+    def upload_fileobj(self, body, Bucket, Key, Config=None):
+        self.objects[Key] = body.read()
+
+    def copy(self, source, Bucket, Key, Config=None):
+        self.copies.append((source['Key'], Key))
+        self.objects[Key] = self.objects[source['Key']]
+
+
+@pytest.fixture
+def remote():
+    return FakeBucket({
+        'model-1/model/model_1.pb': b'one',
+        'model-1/model/model_metadata.json': b'{}',
+        'model-2/model/model_1.pb': b'one',
+        'model-2/model/model_2.pb': b'two',
+        'model-2/model/model_metadata.json': b'{}',
+    })
+
+
+def download(remote, local, manifest, prefix):
+    pytest.importorskip('boto3')
+    return ModelDownload(remote, local, manifest).run('remote', prefix, 'bucket', prefix)
+
+
+def test_shared_files_are_copied_within_the_local_bucket(remote, tmp_path):
+    local = FakeBucket()
+    manifest = LocalManifest('bucket', str(tmp_path))
+    assert download(remote, local, manifest, 'model-1') == {'skipped': 0, 'copied': 0, 'downloaded': 2}
+    assert download(remote, local, manifest, 'model-2') == {'skipped': 0, 'copied': 2, 'downloaded': 1}
+    assert remote.gets == ['model-1/model/model_1.pb', 'model-1/model/model_metadata.json',
+                           'model-2/model/model_2.pb']
+    assert local.objects['model-2/model/model_1.pb'] == b'one'
+    assert not [f for f in os.listdir(str(tmp_path)) if not f.endswith('.json')]
+
+
+def test_stale_manifest_entries_are_not_used(remote, tmp_path):
+    local = FakeBucket()
+    manifest = LocalManifest('bucket', str(tmp_path))
+    download(remote, local, manifest, 'model-1')
+    local.objects['model-1/model/model_1.pb'] = b'changed'
+    del local.objects['model-1/model/model_metadata.json']
+
+    assert download(remote, local, LocalManifest('bucket', str(tmp_path)), 'model-2')['downloaded'] == 3
+    assert local.copies == []
+
+
+def test_forget_prefix(tmp_path):
+    manifest = LocalManifest('bucket', str(tmp_path))
+    manifest.add('"a"', 1, 'model-1/model/model_1.pb', '"a"')
+    manifest.add('b', 2, 'model-10/model/model_1.pb', 'b')
+    assert manifest.forget_prefix('model-1/') == 1
+    reloaded = LocalManifest('bucket', str(tmp_path))
+    assert reloaded.lookup('a', 1) is None
+    assert reloaded.lookup('b', 2) == {'key': 'model-10/model/model_1.pb', 'etag': 'b'}
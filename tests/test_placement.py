@@ -0,0 +1,110 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lib'))
+
+from drfc import placement
+
+GB = placement.GB
+
+
+def two_nodes():
+    # 2 nodes of 4 physical cores with 2 hyperthreads each.
+    return [[[c, c + 16] for c in range(node * 4, node * 4 + 4)] for node in range(2)]
+
+
+def test_parse_and_format_cpulist():
+    assert placement.parse_cpulist('0-3,8,10-11\n') == [0, 1, 2, 3, 8, 10, 11]
+    assert placement.parse_cpulist('') == []
+    assert placement.format_cpulist([3, 1, 2]) == '1,2,3'
+
+
+def test_plan_spreads_workers_over_nodes():
+    layout = placement.plan(two_nodes(), 3, 1, 24 * GB, sagemaker_cores=2)
+    assert layout['sagemaker']['cpuset'] == '0,1,16,17'
+    assert [(r['node'], r['cpuset']) for r in layout['robomaker']] == [(0, '2,18'), (1, '4,20'), (0, '3,19')]
+    assert [r['memory'] for r in layout['robomaker']] == [4 * GB] * 3
+    assert layout['sagemaker']['memory'] == 8 * GB
+
+
+def test_plan_gives_workers_at_least_worker_memory():
+    layout = placement.plan(two_nodes(), 3, 1, 16 * GB, sagemaker_cores=2, worker_memory=3 * GB)
+    assert [r['memory'] for r in layout['robomaker']] == [3 * GB] * 3
+    assert layout['sagemaker']['memory'] == 6 * GB
+
+
+def test_plan_skips_full_nodes():
+    layout = placement.plan(two_nodes(), 3, 2, 24 * GB, sagemaker_cores=2)
+    assert [r['node'] for r in layout['robomaker']] == [0, 1, 1]
+
+
+def test_plan_rejects_too_many_workers():
+    with pytest.raises(ValueError):
+        placement.plan(two_nodes(), 4, 2, 24 * GB, sagemaker_cores=2)
+
+
+def test_max_workers_by_cores_and_memory():
+    assert placement.max_workers(two_nodes(), 64 * GB, sagemaker_cores=2, target_rtf=1.0, rtf_per_core=0.5) == (3, 2)
+    assert placement.max_workers(two_nodes(), 10 * GB, sagemaker_cores=2, target_rtf=1.0, rtf_per_core=0.5) == (2, 2)
+
+
+def test_read_topology_groups_hyperthreads(tmp_path):
+    for node, cpus in (('node0', '0-1,4-5'), ('node1', '2-3,6-7')):
+        os.makedirs(str(tmp_path / 'node' / node))
+        (tmp_path / 'node' / node / 'cpulist').write_text(cpus)
+    for cpu in range(8):
+        topology = tmp_path / 'cpu' / 'cpu{}'.format(cpu) / 'topology'
+        os.makedirs(str(topology))
+        (topology / 'thread_siblings_list').write_text('{},{}'.format(cpu % 4, cpu % 4 + 4))
+    assert placement.read_topology(str(tmp_path)) == [[[0, 4], [1, 5]], [[2, 6], [3, 7]]]
+
+
+def test_available_memory(tmp_path):
+    meminfo = tmp_path / 'meminfo'
+    meminfo.write_text('MemTotal:       16384 kB\nMemAvailable:    8192 kB\n')
+    assert placement.available_memory(str(meminfo)) == 8192 * 1024
+    assert placement.total_memory(str(meminfo)) == 16384 * 1024
+
+
+def test_parse_size():
+    assert placement.parse_size('1.5GiB ') == 3 * GB // 2
+    assert placement.parse_size('512MB') == 512 * 1000 ** 2
+    assert placement.parse_size('0B') == 0
+    with pytest.raises(ValueError):
+        placement.parse_size('--')
+
+
+class FakeDocker:
+
+    def __init__(self, usage):
+        self.usage = usage
+        self.updates = []
+
+    def __call__(self, args, **kwargs):
+        if args[1] == 'stats':
+            return subprocess.CompletedProcess(args, 0, '{} / 31.2GiB\n'.format(self.usage).encode())
+        self.updates.append(args[2:-1])
+        return subprocess.CompletedProcess(args, 0, b'')
+
+
+def test_docker_update_limits_memory_only_when_asked(monkeypatch):
+    docker = FakeDocker('5GiB')
+    monkeypatch.setattr(placement.subprocess, 'run', docker)
+    assert placement.docker_update('c1', '2,18') == 0
+    assert placement.docker_update('c1', '2,18', 4 * GB) == 6 * GB
+    assert placement.docker_update('c1', '2,18', 8 * GB) == 8 * GB
+    assert docker.updates == [
+        ['--cpuset-cpus', '2,18'],
+        ['--cpuset-cpus', '2,18', '--memory', str(6 * GB), '--memory-swap', str(6 * GB)],
+        ['--cpuset-cpus', '2,18', '--memory', str(8 * GB), '--memory-swap', str(8 * GB)],
+    ]
+
+
+def test_docker_update_skips_limit_without_usage(monkeypatch):
+    docker = FakeDocker('--')
+    monkeypatch.setattr(placement.subprocess, 'run', docker)
+    assert placement.docker_update('c1', '2,18', 4 * GB) == 0
+    assert docker.updates == [['--cpuset-cpus', '2,18']]
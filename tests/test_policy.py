@@ -0,0 +1,115 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lib'))
+
+from drfc import policy
+from drfc.metrics import IterationStats
+
+
+def merged(scores):
+    # Iteration i runs from i * 100s to i * 100s + 90s, evaluation starts at i * 100s + 60s.
+    return {i: {'episodes': 1, 'progress': s, 'reward': 0.0, 'window': (i * 100000, i * 100000 + 60000)}
+            for i, s in scores.items()}
+
+
+def written(*iterations):
+    """Checkpoint times as if checkpoint i was written by iteration i, 50s into it."""
+    return {i: i * 100000 + 50000 for i in iterations}
+
+
+def test_select_keeps_mapping_after_pruning(tmp_path):
+    state = str(tmp_path / 'state.json')
+    engine = policy.PlateauPolicy(keep_best=1, keep_last=1, state_file=state)
+
+    engine.update(merged({1: 90.0, 2: 50.0, 3: 60.0}))
+    assert engine.assign(written(1, 2, 3, 4)) == [1, 2, 3]
+    engine.save()
+    assert engine.select([1, 2, 3, 4]) == ({1}, {2, 3})
+
+    # 2 and 3 were pruned; iterations 4 and 5 wrote checkpoints 4 and 5.
+    engine.update(merged({4: 40.0, 5: 30.0}))
+    assert engine.assign(written(1, 4, 5, 6)) == [4, 5]
+    assert engine.select([1, 4, 5, 6]) == ({1}, {4, 5})
+
+    # A restarted policy continues from the recorded mapping.
+    restarted = policy.PlateauPolicy(keep_best=1, keep_last=1, state_file=state)
+    restarted.update(merged({1: 90.0, 2: 50.0, 3: 60.0, 4: 40.0, 5: 95.0}))
+    assert restarted.assign(written(1, 4, 5, 6)) == [4, 5]
+    assert restarted.checkpoints == {1: 1, 2: 2, 3: 3, 4: 4, 5: 5}
+    assert restarted.select([1, 4, 5, 6]) == ({5}, {1, 4})
+
+
+def test_policy_started_mid_run_maps_by_time():
+    engine = policy.PlateauPolicy(keep_best=2, keep_last=0)
+    engine.update(merged({1: 10.0, 2: 90.0, 3: 20.0, 4: 30.0}))
+    # Checkpoints 1 and 2 were rotated away before the policy started.
+    assert engine.assign(written(3, 4)) == [3, 4]
+    assert engine.checkpoints == {3: 3, 4: 4}
+    # The best iteration's checkpoint is gone, the second best is pinned.
+    assert engine.select([3, 4]) == ({4}, {3})
+
+
+def test_select_never_prunes_unassigned_checkpoints():
+    engine = policy.PlateauPolicy(keep_best=1, keep_last=0)
+    engine.update(merged({1: 10.0, 2: 20.0, 3: 30.0}))
+    # Only iteration 1 has its checkpoint listed yet.
+    assert engine.assign(written(1)) == [1]
+    assert engine.select([1, 8]) == (set(), {1})
+    assert engine.assign(written(1, 2, 3)) == [2, 3]
+    assert engine.select([1, 2, 3]) == ({3}, {1, 2})
+
+
+def test_ambiguous_mapping_disables_pruning(tmp_path):
+    state = str(tmp_path / 'state.json')
+    engine = policy.PlateauPolicy(keep_best=1, keep_last=0, state_file=state)
+    engine.update(merged({1: 10.0, 2: 20.0}))
+    times = written(1, 2)
+    times[7] = times[1] + 1000
+    assert engine.assign(times) == [2]
+    assert engine.ambiguous
+    assert engine.select([1, 2, 7]) == ({2}, set())
+    engine.save()
+    assert policy.PlateauPolicy(state_file=state).ambiguous
+
+
+def test_iterations_without_times_are_not_assigned():
+    engine = policy.PlateauPolicy(keep_best=1, keep_last=0)
+    engine.update({1: {'episodes': 1, 'progress': 10.0, 'reward': 0.0, 'window': None}})
+    assert engine.assign(written(1)) == []
+    assert engine.select([1]) == (set(), set())
+
+
+def test_plateaued_after_patience():
+    engine = policy.PlateauPolicy(patience=3, min_delta=1.0, min_iterations=2)
+    engine.update(merged({1: 10.0, 2: 20.0, 3: 20.5, 4: 19.0}))
+    assert not engine.plateaued()
+    engine.update(merged({5: 20.9}))
+    assert engine.plateaued()
+    assert engine.best()[0] == 5
+
+
+class Tailer:
+
+    def __init__(self, records):
+        self.stats = IterationStats()
+        for r in records:
+            self.stats.add(r)
+
+
+def episodes(offset):
+    records = []
+    for i in range(1, 4):
+        t = i * 100000 + offset
+        records.append({'phase': 'training', 'start_time': t, 'metric_time': t + 10000})
+        records.append({'phase': 'evaluation', 'start_time': t + 60000, 'metric_time': t + 70000,
+                        'completion_percentage': 50})
+    return records
+
+
+def test_merge_iterations_spans_workers():
+    merged = policy.merge_iterations({0: Tailer(episodes(0)), 1: Tailer(episodes(1000))})
+    assert sorted(merged) == [1, 2]
+    assert merged[1]['episodes'] == 2
+    assert merged[1]['progress'] == 100.0
+    assert merged[2]['window'] == (200000, 261000)
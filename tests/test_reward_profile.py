@@ -0,0 +1,56 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'utils', 'reward-profile.py')
+
+REWARD = '''from drfc.trackgeom import track_geometry
+
+
+def reward_function(params):
+    return float(track_geometry(params, cache_dir={cache!r}).heading_error(params))
+'''
+
+
+def profile(tmp_path, source, *args):
+    reward_file = tmp_path / 'reward_function.py'
+    reward_file.write_text(source)
+    output = tmp_path / 'bundled.py'
+    # Without PYTHONPATH, as on a host that may lack NumPy.
+    env = {k: v for k, v in os.environ.items() if k != 'PYTHONPATH'}
+    result = subprocess.run([sys.executable, SCRIPT, str(reward_file), '-o', str(output)] + list(args),
+                            stdout=subprocess.PIPE, stderr=subprocess.STDOUT, env=env)
+    return result.returncode, output
+
+
+def test_syntax_error_fails_without_output(tmp_path):
+    returncode, output = profile(tmp_path, 'def reward_function(params):\n    return (\n')
+    assert returncode != 0
+    assert not output.exists()
+
+
+def test_trackgeom_is_bundled_from_source(tmp_path):
+    returncode, output = profile(tmp_path, REWARD.format(cache=str(tmp_path / 'cache')), '--no-profiler')
+    assert returncode == 0
+
+    pytest.importorskip('numpy')
+    namespace = {}
+    exec(compile(output.read_text(), str(output), 'exec'), namespace)
+    params = {'waypoints': [(0, 0), (1, 0), (1, 1), (0, 1), (0, 0)], 'closest_waypoints': [0, 1],
+              'heading': 10.0, 'x': 0.5, 'y': 0.0}
+    assert namespace['reward_function'](params) == pytest.approx(10.0)
+
+
+@pytest.mark.parametrize('source, uses', [
+    (REWARD.format(cache='cache'), True),
+    ('import drfc.trackgeom as tg\n', True),
+    ('from drfc import episodes, trackgeom\n', True),
+    ('# see drfc.trackgeom for faster headings\ndef reward_function(params):\n    return 1.0\n', False),
+    ('"""Could use trackgeom."""\nimport math\n', False),
+])
+def test_uses_trackgeom_checks_imports_only(tmp_path, source, uses):
+    returncode, output = profile(tmp_path, source, '--uses-trackgeom')
+    assert (returncode == 0) == uses
+    assert not output.exists()
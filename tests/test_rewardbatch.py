@@ -0,0 +1,63 @@
+import os
+import sys
+import types
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lib'))
+
+np = pytest.importorskip('numpy')
+
+from drfc import rewardbatch
+
+DEFAULT_REWARD = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'defaults', 'reward_function.py')
+
+
+def make_batch(n=500):
+    rng = np.random.default_rng(0)
+    return {
+        'steps': np.arange(n, dtype=float),
+        'distance_from_center': rng.uniform(0, 0.6, n),
+        'steering_angle': rng.uniform(-30, 30, n),
+        'closest_waypoints': np.stack([np.arange(n) % 10, (np.arange(n) + 1) % 10], axis=1),
+        'track_width': 1.0,
+    }
+
+
+def reward_module(batch_function=None):
+    module = types.ModuleType('reward_function')
+    module.reward_function = lambda params: 1.0 if params['distance_from_center'] < 0.3 else 0.1
+    if batch_function:
+        module.reward_function_batch = batch_function
+    return module
+
+
+def test_default_reward_is_scored_per_step():
+    module = rewardbatch.load_reward_module(DEFAULT_REWARD)
+    assert not hasattr(module, 'reward_function_batch')
+    rewards = rewardbatch.score(module, make_batch())
+    assert rewards.shape == (500,)
+    assert set(np.round(rewards, 4)) <= {1.0, 0.8, 0.5, 0.4, 0.1, 0.08, 0.001, 0.0008}
+
+
+def test_batch_function_is_opt_in():
+    module = reward_module(lambda batch: np.zeros(rewardbatch.batch_size(batch)))
+    rewards = rewardbatch.score(module, make_batch())
+    assert rewards.max() == 1.0
+
+
+def test_matching_batch_function_is_used():
+    module = reward_module(lambda batch: np.where(batch['distance_from_center'] < 0.3, 1.0, 0.1))
+    batch = make_batch()
+    assert np.array_equal(rewardbatch.score(module, batch, vectorized=True), rewardbatch.score(module, batch))
+
+
+def test_stale_batch_function_is_rejected():
+    module = reward_module(lambda batch: np.where(batch['distance_from_center'] < 0.25, 1.0, 0.1))
+    with pytest.raises(ValueError, match='differs'):
+        rewardbatch.score(module, make_batch(), vectorized=True)
+
+
+def test_missing_batch_function_is_rejected():
+    with pytest.raises(ValueError):
+        rewardbatch.score(reward_module(), make_batch(), vectorized=True)
@@ -0,0 +1,46 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lib'))
+
+from drfc import s3
+
+ClientError = pytest.importorskip('botocore.exceptions').ClientError
+
+
+class FakeClient:
+
+    def __init__(self, head_error=None, etag=None):
+        self.head_error = head_error
+        self.etag = etag
+        self.puts = []
+
+    def head_object(self, Bucket, Key):
+        if self.head_error:
+            raise ClientError({'Error': {'Code': self.head_error, 'Message': ''}}, 'HeadObject')
+        return {'ETag': '"{}"'.format(self.etag)}
+
+    def put_object(self, Bucket, Key, Body):
+        self.puts.append((Key, Body))
+
+
+def test_put_if_changed_uploads_missing_object():
+    client = FakeClient(head_error='404')
+    assert s3.put_if_changed(client, 'bucket', 'key', b'body')
+    assert client.puts == [('key', b'body')]
+
+
+def test_put_if_changed_skips_unchanged_object():
+    client = FakeClient(etag='841a2d689ad86bd1611447453c22c6fc')  # md5(b'body')
+    assert not s3.put_if_changed(client, 'bucket', 'key', b'body')
+    assert client.puts == []
+
+
+@pytest.mark.parametrize('code', ['AccessDenied', 'SlowDown', '403'])
+def test_put_if_changed_raises_other_errors(code):
+    client = FakeClient(head_error=code)
+    with pytest.raises(ClientError):
+        s3.put_if_changed(client, 'bucket', 'key', b'body')
+    assert client.puts == []
@@ -0,0 +1,78 @@
+import io
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lib'))
+
+pytest.importorskip('numpy')
+pytest.importorskip('pyarrow')
+
+from drfc import episodes, simtrace
+
+CSV = (b'episode,steps,X,Y,yaw,steer,throttle,action,reward,done,all_wheels_on_track,progress,'
+       b'closest_waypoint,track_len,tstamp,episode_status\n'
+       b'0,1,0.1,0.2,0,0,1,0,1.0,False,True,1.0,1,17.7,10.0,in_progress\n'
+       b'0,2,0.2,0.2,0,0,1,0,1.0,True,True,2.0,1,17.7,10.1,lap_complete\n'
+       b'1,1,0.1,0.2,0,0,1,0,0.5,True,True,1.5,1,17.7,11.0,off_track\n')
+
+
+class FakeBucket:
+
+    def __init__(self, objects):
+        self.objects = objects
+
+    def get_paginator(self, name):
+        return self
+
+    def paginate(self, Bucket, Prefix):
+        yield {'Contents': [{'Key': k, 'ETag': '"{}"'.format(len(v))}
+                            for k, v in sorted(self.objects.items()) if k.startswith(Prefix)]}
+
+    def get_object(self, Bucket, Key):
+        return {'Body': io.BytesIO(self.objects[Key])}
+
+
+@pytest.fixture
+def store(tmp_path):
+    client = FakeBucket({
+        'model/0/training-simtrace/0-iteration.csv': CSV,
+        'model/1/training-simtrace/0-iteration.csv': CSV,
+        'model/training-simtrace/1-iteration.csv': CSV,
+    })
+    ingester = simtrace.SimtraceIngester(client, 'bucket', str(tmp_path))
+    assert ingester.poll('model/') == (3, 9)
+    return str(tmp_path)
+
+
+def test_sidecars_are_hidden_from_the_dataset(store):
+    for dirpath, _, filenames in os.walk(store):
+        for name in filenames:
+            assert name.endswith('.parquet') or name.startswith('_'), name
+    table = simtrace.read(store, columns=['episode', 'reward'], worker=1)
+    assert table.num_rows == 3
+
+
+def test_episode_index_returns_episode_steps(store):
+    index = episodes.EpisodeIndex(store)
+    assert len(index) == 6
+    steps = index.get('model', 1, 0, 1, columns=['steps', 'reward'])
+    assert steps.tolist() == [[1.0, 0.5]]
+    assert len(index.episodes(iteration=0)) == 4
+
+
+def test_episode_index_stores_strings_once(store):
+    index = episodes.EpisodeIndex(store)
+    assert index.runs == ['model']
+    assert index.index.dtype == episodes.INDEX_DTYPE
+    assert index.run_name(index.episodes(run='model', worker=0, iteration=1)[0]) == 'model'
+    assert len(index.episodes(run='other')) == 0
+    with pytest.raises(KeyError):
+        index.get('model', 0, 0, 5)
+    with pytest.raises(KeyError):
+        index.get('other', 0, 0, 0)
+
+    # Loaded from disk rather than rebuilt.
+    reloaded = episodes.EpisodeIndex(store)
+    assert reloaded.get('model', 0, 1, 0).shape == (2, len(episodes.STEP_COLUMNS))
@@ -0,0 +1,86 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lib'))
+
+from drfc import throughput
+
+
+def test_parse_swarm_containers_by_replica_number():
+    out = '\n'.join([
+        'deepracer-0_robomaker.10.k2j3h4g5f6d7 c10',
+        'deepracer-0_robomaker.2.a1b2c3d4e5f6 c2',
+        'deepracer-0_robomaker.1.z9y8x7w6v5u4 c1',
+        '',
+    ])
+    assert throughput.parse_robomaker_containers(out, 'deepracer-0') == {1: 'c1', 2: 'c2', 10: 'c10'}
+
+
+def test_parse_compose_containers_with_missing_replica():
+    out = 'deepracer-0_robomaker_1 c1\ndeepracer-0_robomaker_3 c3\n'
+    assert throughput.parse_robomaker_containers(out, 'deepracer-0') == {1: 'c1', 3: 'c3'}
+
+
+def test_parse_ignores_other_stacks():
+    out = '\n'.join([
+        'deepracer-eval-0_robomaker.1.abc e1',
+        'deepracer-01_robomaker.1.abc x1',
+        'deepracer-0_robomaker.2.abc c2',
+        'deepracer-0_rl_coach.1.abc r1',
+    ])
+    assert throughput.parse_robomaker_containers(out, 'deepracer-0') == {2: 'c2'}
+    assert throughput.parse_robomaker_containers(out, throughput.stack_name(0, evaluation=True)) == {1: 'e1'}
+
+
+def test_parse_time_lines():
+    text = 'x\nTIME: s: 120, rtf: 0.95, fps:15.0\nTIME: s: 240, rtf: nan, fps: 14.5\n'
+    steps = throughput.parse_time_lines(text)
+    assert [s[0] for s in steps] == [120, 240]
+    assert steps[0][1:] == (0.95, 15.0)
+
+
+def test_log_scraper_drops_lines_already_read():
+    scraper = throughput.LogScraper('c1')
+    first = ('2024-05-01T10:00:00.5Z TIME: s: 1, rtf: 1.0, fps: 15.0\n'
+             '2024-05-01T10:00:00.75Z TIME: s: 2, rtf: 0.9, fps: 15.0\n')
+    assert scraper.new_lines(first) == ['TIME: s: 1, rtf: 1.0, fps: 15.0', 'TIME: s: 2, rtf: 0.9, fps: 15.0']
+    assert scraper.since == '2024-05-01T10:00:00.75Z'
+    # --since returns the boundary line again.
+    second = ('2024-05-01T10:00:00.75Z TIME: s: 2, rtf: 0.9, fps: 15.0\n'
+              '2024-05-01T10:00:00.8Z TIME: s: 3, rtf: 0.8, fps: 15.0\n')
+    assert scraper.new_lines(second) == ['TIME: s: 3, rtf: 0.8, fps: 15.0']
+
+
+def test_log_timestamp_sorts_as_text():
+    assert throughput.log_timestamp('2024-05-01T10:00:00.8Z') > throughput.log_timestamp('2024-05-01T10:00:00.75Z')
+    assert throughput.log_timestamp('2024-05-01T10:00:01Z') > throughput.log_timestamp('2024-05-01T10:00:00.999Z')
+    assert throughput.log_timestamp('garbage') is None
+
+
+def test_metrics_poller_keeps_recent_records_and_counts_iterations():
+    poller = throughput.MetricsPoller(None, 'bucket', 'metrics', max_records=5)
+    phases = ['training'] * 4 + ['evaluation'] * 2
+    for _ in range(3):
+        poller.add(1, [{'phase': p} for p in phases])
+    assert len(poller.records[1]) == 5
+    assert poller.iterations[1] == 3
+
+
+def test_collector_polls_workers_in_parallel(monkeypatch):
+    import time
+
+    monkeypatch.setattr(throughput, 'robomaker_containers', lambda run_id: {1: 'c1', 2: 'c2', 3: 'c3'})
+    active = []
+    peak = []
+
+    def docker(*args, timeout=10):
+        active.append(1)
+        peak.append(len(active))
+        time.sleep(0.05)
+        active.pop()
+        return 'Factor[0.9]' if args[0] == 'exec' else ''
+
+    monkeypatch.setattr(throughput, 'docker', docker)
+    samples = throughput.Collector('0').collect()
+    assert sorted(s[1]['worker'] for s in samples if s[0] == 'deepracer_gz_rtf') == ['1', '2', '3']
+    assert max(peak) > 1
@@ -0,0 +1,63 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lib'))
+
+from drfc import policy, wipe
+from drfc.checkpoints import CheckpointIndex
+from drfc.objectstore import LocalManifest
+
+
+class FakeBucket:
+
+    def __init__(self, keys):
+        self.keys = set(keys)
+        self.batches = []
+
+    def get_paginator(self, name):
+        return self
+
+    def paginate(self, Bucket, Prefix, PaginationConfig):
+        keys = sorted(k for k in self.keys if k.startswith(Prefix))
+        size = PaginationConfig['PageSize']
+        for i in range(0, len(keys), size):
+            yield {'Contents': [{'Key': k} for k in keys[i:i + size]]}
+
+    def delete_objects(self, Bucket, Delete):
+        self.batches.append(len(Delete['Objects']))
+        for o in Delete['Objects']:
+            self.keys.discard(o['Key'])
+        return {}
+
+
+def test_wipe_prefix_deletes_only_below_prefix():
+    keys = ['model/{}'.format(i) for i in range(2500)] + ['model-2/x', 'other/y']
+    client = FakeBucket(keys)
+    assert wipe.wipe_prefix(client, 'bucket', 'model', dry_run=True) == 2500
+    assert client.batches == []
+    assert wipe.wipe_prefix(client, 'bucket', 'model/', max_workers=2) == 2500
+    assert sorted(client.batches) == [500, 1000, 1000]
+    assert client.keys == {'model-2/x', 'other/y'}
+
+
+def test_forget_prefix_removes_local_caches(tmp_path, monkeypatch):
+    monkeypatch.setenv('DR_DIR', str(tmp_path))
+    client = FakeBucket([])
+    index = CheckpointIndex(client, 'bucket', 'model')
+    index.save()
+    engine = policy.PlateauPolicy(state_file=policy.state_file('bucket', 'model'))
+    engine.save()
+    manifest = LocalManifest('bucket')
+    manifest.add('a', 1, 'model/model_1.pb', 'a')
+    manifest.add('b', 1, 'model-2/model_1.pb', 'b')
+    manifest.save()
+    other = CheckpointIndex(client, 'bucket', 'model-2')
+    other.save()
+
+    removed = wipe.forget_prefix(client, 'bucket', 'model/')
+    assert len(removed) == 2
+    assert not any(os.path.exists(p) for p in removed)
+    assert os.path.exists(other.cache_file)
+    assert LocalManifest('bucket').lookup('a', 1) is None
+    assert LocalManifest('bucket').lookup('b', 1)['key'] == 'model-2/model_1.pb'
+    assert wipe.forget_prefix(client, 'bucket', 'model') == []
@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lib'))
+
+from drfc import s3
+from drfc.checkpoints import CheckpointIndex, retained
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Deletes old checkpoints below <prefix>/model/. The best and last checkpoint of '
+                    'deepracer_checkpoints.json and pinned checkpoints are always kept.')
+    parser.add_argument('-p', '--prefix', default=os.environ.get('DR_LOCAL_S3_MODEL_PREFIX'),
+                        help='Model prefix. Default is DR_LOCAL_S3_MODEL_PREFIX.')
+    parser.add_argument('-l', '--keep-last', type=int, default=5, help='Keep the newest K checkpoints.')
+    parser.add_argument('-e', '--keep-every', type=int, default=0, help='Keep every Mth checkpoint.')
+    parser.add_argument('-d', '--dry-run', action='store_true', help='Only print what would be deleted.')
+    args = parser.parse_args()
+
+    if not args.prefix:
+        print("No model prefix given, and DR_LOCAL_S3_MODEL_PREFIX is not set.")
+        return 1
+
+    bucket = os.environ.get('DR_LOCAL_S3_BUCKET', 'bucket')
+    checkpoints = CheckpointIndex(s3.local_client(), bucket, args.prefix).refresh()
+    numbers = checkpoints.numbers()
+    keep = retained(numbers, args.keep_last, args.keep_every)
+    deleted = checkpoints.delete(set(numbers) - keep, dry_run=args.dry_run)
+
+    print("{}Deleted {} of {} checkpoints in s3://{}/{}/model/".format(
+        '(dryrun) ' if args.dry_run else '', len(deleted), len(numbers), bucket, args.prefix))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lib'))
+
+from drfc import envfile
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Renders env files (e.g. system.env and run.env) into one shell script to be sourced.')
+    parser.add_argument('files', nargs='+')
+    parser.add_argument('-o', '--output', help='Output file. Default is stdout.')
+    args = parser.parse_args()
+
+    try:
+        script = envfile.render(args.files)
+    except (OSError, ValueError) as e:
+        print("Cannot render {}: {}".format(' '.join(args.files), e), file=sys.stderr)
+        return 1
+
+    if not args.output:
+        sys.stdout.write(script)
+        return 0
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    tmp_file = '{}.{}'.format(args.output, os.getpid())
+    with open(tmp_file, 'w') as f:
+        f.write(script)
+    os.replace(tmp_file, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+
+import argparse
+import csv
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lib'))
+
+from drfc import evalbatch
+from drfc import s3
+
+COLUMNS = ('prefix', 'checkpoint', 'world', 'reverse', 'trials', 'completed', 'mean_progress',
+           'mean_lap_ms', 'best_lap_ms', 'off_track', 'crashes')
+
+
+def rank(results):
+    """Sorts by mean progress (highest first), then mean lap time."""
+    return sorted(results, key=lambda r: (-(r['mean_progress'] or 0), r['mean_lap_ms'] or float('inf')))
+
+
+def print_table(results):
+    print(' '.join('{:>14}'.format(c) for c in COLUMNS))
+    for r in results:
+        print(' '.join('{:>14}'.format('-' if r.get(c) is None else str(r[c])[-14:]) for c in COLUMNS))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Evaluates a matrix of models, checkpoints and worlds, several evaluations at a time.')
+    parser.add_argument('-f', '--file', help="Jobs file, one '<model prefix> <checkpoint> <world> [reverse]' per line.")
+    parser.add_argument('-m', '--models', nargs='+', default=[os.environ.get('DR_LOCAL_S3_MODEL_PREFIX')],
+                        help='Model prefixes. Default is DR_LOCAL_S3_MODEL_PREFIX.')
+    parser.add_argument('-c', '--checkpoints', nargs='+', default=['last'], help="Checkpoint numbers, 'best' or 'last'.")
+    parser.add_argument('-w', '--worlds', nargs='+', default=[os.environ.get('DR_WORLD_NAME')])
+    parser.add_argument('-r', '--both-directions', action='store_true', help='Evaluate each job in both directions.')
+    parser.add_argument('-n', '--parallel', type=int, default=2, help='Number of evaluation stacks run at the same time.')
+    parser.add_argument('--first-run-id', type=int, default=10, help='DR_RUN_ID of the first evaluation stack.')
+    parser.add_argument('--timeout', type=int, default=3600, help='Seconds after which an evaluation is stopped.')
+    parser.add_argument('-o', '--output', help='Write the results to this .csv or .json file.')
+    parser.add_argument('-d', '--dry-run', action='store_true', help='Only show the jobs.')
+    args = parser.parse_args()
+
+    if args.file:
+        jobs = evalbatch.read_jobs(args.file)
+    else:
+        jobs = evalbatch.matrix(args.models, args.checkpoints, args.worlds,
+                                (False, True) if args.both_directions else (False,))
+    print("Running {} evaluations, {} at a time.".format(len(jobs), args.parallel))
+
+    scheduler = evalbatch.EvalScheduler(s3.local_client(), os.environ, args.parallel, args.first_run_id,
+                                        timeout=args.timeout, dry_run=args.dry_run)
+    results = rank(scheduler.run(jobs))
+    print_table(results)
+
+    if args.output:
+        if args.output.endswith('.json'):
+            with open(args.output, 'w') as f:
+                json.dump(results, f, indent=2)
+        else:
+            with open(args.output, 'w', newline='') as f:
+                writer = csv.DictWriter(f, fieldnames=COLUMNS + ('run_id', 'metrics_key', 'error'), extrasaction='ignore')
+                writer.writeheader()
+                writer.writerows(results)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
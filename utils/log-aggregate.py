@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lib'))
+
+from drfc import logs
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Follows the logs of all containers of a DR_RUN_ID stack at once, tagged by container.')
+    parser.add_argument('-e', '--evaluation', action='store_true', help='Follow the evaluation stack.')
+    parser.add_argument('-a', '--all', action='store_true', help='Show the full logs, not only the last 5 minutes.')
+    parser.add_argument('-g', '--grep', action='append', default=[],
+                        help='Show only lines matching a regex or one of: {}. Repeatable.'.format(', '.join(logs.FILTERS)))
+    parser.add_argument('-x', '--exclude', action='append', default=[], help='Hide lines matching a regex or filter.')
+    parser.add_argument('-C', '--context', type=int, default=0, help='Show n lines before each match.')
+    parser.add_argument('-b', '--buffer', type=int, default=1000, help='Lines kept per container.')
+    parser.add_argument('-o', '--output', help='Also write the lines to this file, rotated and gzip-compressed.')
+    parser.add_argument('--max-size', type=float, default=50, help='MB at which the output file is rotated.')
+    parser.add_argument('--backups', type=int, default=5, help='Rotated files to keep.')
+    parser.add_argument('-w', '--wait', type=int, default=0, help='Seconds to wait for the containers to start.')
+    parser.add_argument('-n', '--workers', type=int,
+                        help='Robomaker workers to wait for. Default is DR_WORKERS, or 1 with -e.')
+    parser.add_argument('--no-follow', action='store_true', help='Print the logs and exit.')
+    parser.add_argument('--fixture', action='append', default=[], metavar='NAME=PATH',
+                        help='Read a recorded log file instead of the containers. Repeatable.')
+    args = parser.parse_args()
+
+    if args.fixture:
+        sources = [logs.FileLogSource(*f.split('=', 1)) if '=' in f else logs.FileLogSource(os.path.basename(f), f)
+                   for f in args.fixture]
+    else:
+        run_id = os.environ.get('DR_RUN_ID', '0')
+        model_prefix = os.environ.get('DR_LOCAL_S3_MODEL_PREFIX')
+        workers = args.workers or (1 if args.evaluation else int(os.environ.get('DR_WORKERS', 1)))
+        expected = logs.expected_sources(workers, model_prefix, args.evaluation)
+        deadline = time.time() + args.wait
+        while True:
+            sources = logs.stack_sources(run_id, model_prefix, args.evaluation,
+                                         None if args.all else '5m', not args.no_follow)
+            missing = [name for name in expected if name not in {s.name for s in sources}]
+            if not missing or time.time() >= deadline:
+                break
+            time.sleep(1)
+        if not sources:
+            print("No containers of deepracer-{}{} are running.".format('eval-' if args.evaluation else '', run_id))
+            return 1
+        if missing and args.wait:
+            print("WARNING: {} not running after {} seconds.".format(', '.join(missing), args.wait))
+        print("Following {}.".format(', '.join(s.name for s in sources)))
+
+    writer = logs.RotatingWriter(args.output, int(args.max_size * 1024 * 1024), args.backups) if args.output else None
+    aggregator = logs.LogAggregator(sources, args.grep, args.exclude, args.buffer, args.context)
+    try:
+        aggregator.run(writer=writer)
+    finally:
+        if writer:
+            writer.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+import argparse
+import http.server
+import json
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lib'))
+
+from drfc import metrics
+from drfc import s3
+
+latest = {'body': b'{}'}
+
+
+class JsonHandler(http.server.BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        body = latest['body']
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Reads new TrainingMetrics records and prints per-iteration aggregates as JSON.')
+    parser.add_argument('-p', '--prefix', default=os.environ.get('DR_LOCAL_S3_METRICS_PREFIX'),
+                        help='Metrics prefix in the local bucket. Default is DR_LOCAL_S3_METRICS_PREFIX.')
+    parser.add_argument('--file', nargs='+', help='Read local copies of the TrainingMetrics files instead of S3.')
+    parser.add_argument('-n', '--iterations', type=int, default=5, help='Number of recent iterations to show; 0 for all.')
+    parser.add_argument('-f', '--follow', type=int, metavar='SECONDS', help='Keep polling every SECONDS.')
+    parser.add_argument('--port', type=int, help='Serve the aggregates as JSON on this port (with -f).')
+    args = parser.parse_args()
+
+    if args.file:
+        tailers = {metrics.metrics_worker(path) or i + 1: metrics.MetricsTailer(
+                       metrics.FileSource(path), metrics.state_file('local', os.path.abspath(path)))
+                   for i, path in enumerate(args.file)}
+
+        def poll():
+            for tailer in tailers.values():
+                tailer.poll()
+            return tailers
+    else:
+        if not args.prefix:
+            print("No metrics prefix given, and DR_LOCAL_S3_METRICS_PREFIX is not set.")
+            return 1
+        prefix_tailer = metrics.PrefixTailer(s3.local_client(), os.environ.get('DR_LOCAL_S3_BUCKET', 'bucket'), args.prefix)
+
+        def poll():
+            prefix_tailer.poll()
+            return prefix_tailer.tailers
+
+    if args.port and args.follow:
+        server = http.server.ThreadingHTTPServer(('', args.port), JsonHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    while True:
+        tailers = poll()
+        result = {str(worker): {'records': t.records, 'iterations': t.stats.summary(args.iterations or None)}
+                  for worker, t in sorted(tailers.items())}
+        latest['body'] = json.dumps(result).encode('utf-8')
+        if not args.port:
+            print(json.dumps(result, indent=2 if not args.follow else None))
+            sys.stdout.flush()
+        if not args.follow:
+            return 0
+        time.sleep(args.follow)
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        sys.exit(0)
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+
+import argparse
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lib'))
+
+try:
+    from drfc import rewardbench
+except ImportError:
+    print("You need to install numpy to use this utility.")
+    sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmarks a reward function against a synthetic stream of Robomaker params.')
+    parser.add_argument('reward_file', nargs='?',
+                        default=os.path.join(os.environ.get('DR_DIR', '.'), 'custom_files', 'reward_function.py'))
+    parser.add_argument('-t', '--track', help='Track .npy file. Default is a synthetic oval.')
+    parser.add_argument('-w', '--track-width', type=float, default=0.76)
+    parser.add_argument('-n', '--steps', type=int, default=20000)
+    parser.add_argument('-s', '--seed', type=int, default=0)
+    parser.add_argument('-m', '--max-p99', type=float,
+                        help='Exit with status 1 if the p99 latency (in microseconds) is above this value.')
+    parser.add_argument('-j', '--json', action='store_true', help='Print result as JSON.')
+    args = parser.parse_args()
+
+    if args.track:
+        waypoints, track_width = rewardbench.load_track(args.track)
+    else:
+        waypoints, track_width = rewardbench.oval_track(), args.track_width
+
+    reward_function = rewardbench.load_reward_function(args.reward_file)
+    params = rewardbench.to_params(rewardbench.generate_steps(waypoints, track_width, args.steps, args.seed))
+    result = rewardbench.benchmark(reward_function, params)
+
+    if args.json:
+        print(json.dumps(result))
+    else:
+        print("Reward function: {}".format(args.reward_file))
+        print("Calls:           {}".format(result['calls']))
+        print("Calls/sec:       {:.0f}".format(result['calls_per_sec']))
+        print("Latency (us):    p50 {:.1f}, p90 {:.1f}, p99 {:.1f}, max {:.1f}".format(
+            result['p50_us'], result['p90_us'], result['p99_us'], result['max_us']))
+        print("Peak alloc:      {} bytes, {} blocks retained".format(
+            result['peak_alloc_bytes'], result['retained_blocks']))
+
+    if args.max_p99 is not None and result['p99_us'] > args.max_p99:
+        print("Rejected: p99 latency {:.1f}us is above {:.1f}us.".format(result['p99_us'], args.max_p99))
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+
+import argparse
+import ast
+import importlib.util
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lib'))
+
+from drfc import stepprofiler
+
+
+def uses_trackgeom(reward_source):
+    """True if reward_source imports drfc.trackgeom; comments and strings do not count."""
+    for node in ast.walk(ast.parse(reward_source)):
+        if isinstance(node, ast.Import):
+            if any(alias.name == 'drfc.trackgeom' for alias in node.names):
+                return True
+        elif isinstance(node, ast.ImportFrom) and node.level == 0:
+            if node.module == 'drfc.trackgeom':
+                return True
+            if node.module == 'drfc' and any(alias.name == 'trackgeom' for alias in node.names):
+                return True
+    return False
+
+
+def bundle_trackgeom(reward_source):
+    """
+    Returns the source of a single reward_function.py that registers
+    drfc.trackgeom and then contains reward_source. The module's source is
+    read as text, so the host does not need NumPy.
+    """
+    with open(importlib.util.find_spec('drfc.trackgeom').origin) as f:
+        module_source = f.read()
+    header = '\n'.join([
+        'import sys as _sys',
+        'import types as _types',
+        '_trackgeom = _types.ModuleType("drfc.trackgeom")',
+        'exec(compile({!r}, "drfc/trackgeom.py", "exec"), _trackgeom.__dict__)'.format(module_source),
+        '_sys.modules.setdefault("drfc", _types.ModuleType("drfc")).trackgeom = _trackgeom',
+        '_sys.modules["drfc.trackgeom"] = _trackgeom',
+        '',
+        '',
+    ])
+    return header + reward_source
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Wraps a reward function with the step profiler, for upload to Robomaker. '
+                    'Reward functions that use drfc.trackgeom get the module bundled.')
+    parser.add_argument('reward_file', nargs='?',
+                        default=os.path.join(os.environ.get('DR_DIR', '.'), 'custom_files', 'reward_function.py'))
+    parser.add_argument('-o', '--output', help='Output file. Default is stdout.')
+    parser.add_argument('-i', '--interval', type=float,
+                        default=float(os.environ.get('DR_DEBUG_REWARD_INTERVAL', stepprofiler.DEFAULT_INTERVAL)),
+                        help='Seconds between two aggregates.')
+    parser.add_argument('-s', '--sink', default=os.environ.get('DR_DEBUG_REWARD_SINK', 'stdout'),
+                        help='stdout, file:<path> or udp:<host>:<port>, as seen from inside Robomaker.')
+    parser.add_argument('-w', '--window', type=int, default=stepprofiler.DEFAULT_WINDOW,
+                        help='Number of steps kept for the aggregates.')
+    parser.add_argument('--no-profiler', action='store_true', help='Only bundle drfc.trackgeom, if used.')
+    parser.add_argument('--uses-trackgeom', action='store_true',
+                        help='Only check whether the reward function imports drfc.trackgeom; exits 0 if it does.')
+    args = parser.parse_args()
+
+    with open(args.reward_file) as f:
+        source = f.read()
+    try:
+        compile(source, args.reward_file, 'exec')
+        if args.uses_trackgeom:
+            return 0 if uses_trackgeom(source) else 1
+        bundled = source
+        if uses_trackgeom(source):
+            bundled = bundle_trackgeom(bundled)
+        if not args.no_profiler:
+            bundled = stepprofiler.bundle(bundled, args.interval, args.sink, args.window)
+    except (SyntaxError, ValueError) as e:
+        print("Cannot profile {}: {}".format(args.reward_file, e), file=sys.stderr)
+        return 1
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(bundled)
+    else:
+        sys.stdout.write(bundled)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+import argparse
+import csv
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lib'))
+
+try:
+    import numpy as np
+    from drfc import rewardbatch, rewardbench
+except ImportError:
+    print("You need to install numpy to use this utility.")
+    sys.exit(1)
+
+
+def read_simtrace(paths):
+    columns = {}
+    for path in paths:
+        with open(path, newline='') as f:
+            for row in csv.DictReader(f):
+                for key, value in row.items():
+                    columns.setdefault(key, []).append(value)
+    return columns
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Re-scores logged simtrace steps with a (new) reward function.')
+    parser.add_argument('simtrace', nargs='+', help='Simtrace CSV file(s) of one track.')
+    parser.add_argument('-r', '--reward', required=True, help='reward_function.py to score with.')
+    parser.add_argument('-t', '--track', required=True, help='Track .npy file the simtrace was recorded on.')
+    parser.add_argument('-b', '--batch', action='store_true',
+                        help='Use reward_function_batch(batch) of the reward file, after checking it against '
+                             'reward_function on a sample of the steps.')
+    args = parser.parse_args()
+
+    waypoints, track_width = rewardbench.load_track(args.track)
+    module = rewardbatch.load_reward_module(args.reward)
+    columns = read_simtrace(args.simtrace)
+    batch = rewardbatch.from_simtrace(columns, waypoints, track_width)
+
+    start = time.time()
+    try:
+        new_reward = rewardbatch.score(module, batch, vectorized=args.batch)
+    except ValueError as e:
+        print("ERROR: {}".format(e))
+        return 1
+    elapsed = time.time() - start
+
+    old_reward = np.asarray(columns['reward'], dtype=float)
+    episodes = np.asarray(columns['episode'], dtype=int)
+    uniq, inverse = np.unique(episodes, return_inverse=True)
+    old_sum = np.bincount(inverse, weights=old_reward)
+    new_sum = np.bincount(inverse, weights=new_reward)
+
+    print("Scored {} steps in {:.3f}s ({})".format(
+        len(new_reward), elapsed,
+        'batch' if args.batch else 'reward_function per step'))
+    print("{:>8} {:>12} {:>12}".format('episode', 'old reward', 'new reward'))
+    for e, o, n in zip(uniq, old_sum, new_sum):
+        print("{:>8} {:>12.2f} {:>12.2f}".format(e, o, n))
+    if len(uniq) > 1:
+        print("Correlation of episode rewards: {:.3f}".format(np.corrcoef(old_sum, new_sum)[0, 1]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lib'))
+
+from drfc import episodes
+from drfc import s3
+from drfc import simtrace
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Ingests simtrace CSV files from S3 into a partitioned Parquet / Arrow dataset.')
+    parser.add_argument('-p', '--prefix', default=os.environ.get('DR_LOCAL_S3_MODEL_PREFIX', 'rl-deepracer-sagemaker'),
+                        help='S3 prefix to scan (training and evaluation-* simtraces below it).')
+    parser.add_argument('-s', '--store', default=simtrace.default_store())
+    parser.add_argument('-f', '--follow', type=int, metavar='SECONDS',
+                        help='Keep polling for new simtrace files every SECONDS.')
+    parser.add_argument('--arrow', action='store_true', help='Write Arrow IPC files instead of Parquet.')
+    args = parser.parse_args()
+
+    try:
+        ingester = simtrace.SimtraceIngester(s3.local_client(), os.environ.get('DR_LOCAL_S3_BUCKET', 'bucket'),
+                                             args.store, 'arrow' if args.arrow else 'parquet')
+    except ImportError:
+        print("You need to install pyarrow to use this utility.")
+        return 1
+
+    while True:
+        files, rows = ingester.poll(args.prefix.rstrip('/') + '/')
+        if files:
+            episodes.build_index(args.store)
+            print("Ingested {} file(s), {} rows into {}".format(files, rows, args.store))
+        if not args.follow:
+            return 0
+        time.sleep(args.follow)
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        sys.exit(0)
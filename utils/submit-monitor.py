@@ -4,20 +4,24 @@ import sys
 import getopt
 import os
 import traceback
-import pickle
-import urllib.request
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
-import boto3
 from botocore.exceptions import ClientError
 
-try:
-    import pandas as pd
-    from deepracer import boto3_enhancer
-except ImportError:
-    print("You need to install pandas and deepracer-utils to use this utility.")
-    sys.exit(1)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lib'))
+
+from drfc import console
+from drfc.download import Downloader
+from drfc.submissions import SubmissionStore
 
 dr = None
+lookup = None
+lookup_lock = threading.Lock()
+downloader = Downloader(max_workers=4)
+store = None
+store_lock = threading.Lock()
 
 
 def main():
@@ -26,8 +30,8 @@ def main():
     try:
         opts, _ = getopt.getopt(
             sys.argv[1:],
-            "lvsghm:b:",
-            ["logs", "verbose", "summary", "graphics", "help", "model=", "board="],
+            "lvsghm:b:d:i:",
+            ["logs", "verbose", "summary", "graphics", "help", "model=", "board=", "daemon=", "interval="],
         )
     except getopt.GetoptError as err:
         # print help information and exit:
@@ -35,88 +39,166 @@ def main():
         usage()
         sys.exit(2)
 
-    logs_path = "{}/data/logs/leaderboards".format(os.environ.get("DR_DIR", None))
-
-    download_logs = False
-    download_videos = False
-    verbose = False
-    create_summary = False
+    options = {
+        "logs_path": "{}/data/logs/leaderboards".format(os.environ.get("DR_DIR", None)),
+        "download_logs": False,
+        "download_videos": False,
+        "verbose": False,
+        "create_summary": False,
+    }
     model_name = None
     leaderboard_guid = None
-    leaderboard_arn = None
+    pairs_file = None
+    interval = 300
 
     for opt, arg in opts:
         if opt in ("-l", "--logs"):
-            download_logs = True
+            options["download_logs"] = True
         elif opt in ("-g", "--graphics"):
-            download_videos = True
+            options["download_videos"] = True
         elif opt in ("-v", "--verbose"):
-            verbose = True
+            options["verbose"] = True
         elif opt in ("-s", "--summary"):
-            create_summary = True
+            options["create_summary"] = True
         elif opt in ("-m", "--model"):
             model_name = arg.strip()
         elif opt in ("-b", "--board"):
             leaderboard_guid = arg.strip()
+        elif opt in ("-d", "--daemon"):
+            pairs_file = arg.strip()
+        elif opt in ("-i", "--interval"):
+            interval = int(arg)
         elif opt in ("-h", "--help"):
             usage()
             sys.exit()
 
+    if pairs_file is None and (model_name is None or leaderboard_guid is None):
+        usage()
+
     # Prepare Boto3
     profile_name=os.environ.get("DR_UPLOAD_S3_PROFILE", None)
 
-    if (profile_name is None or len(profile_name) == 0):
-        session = boto3.session.Session(
-            region_name="us-east-1"
-        )
-    else:
-        session = boto3.session.Session(
-            region_name="us-east-1",
-            profile_name=profile_name
-        )
+    global dr, lookup
+    try:
+        dr = console.deepracer_client(profile_name)
+    except ImportError:
+        print("You need to install deepracer-utils to use this utility.")
+        sys.exit(1)
+    lookup = console.ConsoleLookup(dr, profile_name)
+
+    if pairs_file is None:
+        pair = resolve_pair(lookup, model_name, leaderboard_guid, options["verbose"])
+        if pair is None:
+            sys.exit(1)
+        check_submission(pair, options)
+        downloader.close()
+        return
+
+    pairs = []
+    for model_name, leaderboard_guid in read_pairs(pairs_file):
+        pair = resolve_pair(lookup, model_name, leaderboard_guid, options["verbose"])
+        if pair is not None:
+            pairs.append(pair)
+    if not pairs:
+        print("No model / leaderboard pairs to monitor in {}".format(pairs_file))
+        sys.exit(1)
+    run_daemon(pairs, options, interval)
+
+
+def read_pairs(pairs_file):
+    """Reads '<model-name> <leaderboard guid or arn>' lines, ignoring blank lines and comments."""
+    pairs = []
+    with open(pairs_file) as f:
+        for line in f:
+            fields = line.split("#", 1)[0].split()
+            if len(fields) == 2:
+                pairs.append((fields[0], fields[1]))
+            elif fields:
+                print("Ignoring line '{}' in {}".format(line.strip(), pairs_file))
+    return pairs
 
-    global dr
-    dr = boto3_enhancer.deepracer_client(session=session)
+
+def resolve_pair(lookup, model_name, leaderboard_guid, verbose=False):
 
     # Find the ARN for my model
-    my_model = find_model(model_name)
+    my_model_arn = lookup.model_arn(model_name)
 
-    if my_model is not None:
-        my_model_arn = my_model["ModelArn"].values[0]
+    if my_model_arn is not None:
         if verbose:
             print("Found ModelARN for model {}: {}".format(model_name, my_model_arn))
     else:
         print("Did not find model with name {}".format(model_name))
-        sys.exit(1)
+        return None
 
+    # Find the leaderboard
     if leaderboard_guid.startswith('arn'):
         leaderboard_arn = leaderboard_guid
-
-    # Find the leaderboard
-    if not leaderboard_arn:
-        leaderboard_arn = find_leaderboard(leaderboard_guid)
+    else:
+        leaderboard_arn = lookup.leaderboard_arn(leaderboard_guid)
 
     if leaderboard_arn is not None:
         if verbose:
             print("Found Leaderboard with ARN {}".format(leaderboard_arn))
     else:
         print("Did not find Leaderboard with ARN {}".format(leaderboard_arn))
-        sys.exit(1)
-
-    # Load summary from file if we are interested in it!
-    if create_summary:
+        return None
+
+    return {
+        "model_name": model_name,
+        "model_arn": my_model_arn,
+        "leaderboard_guid": leaderboard_guid,
+        "leaderboard_arn": leaderboard_arn,
+    }
+
+
+def run_daemon(pairs, options, interval, max_workers=8, max_backoff=3600):
+    """
+    Checks all pairs every interval seconds on a thread pool sharing the one
+    client. A pair whose check fails is retried after 30s, doubling up to
+    max_backoff, before it returns to the normal interval.
+    """
+    due = {i: 0.0 for i in range(len(pairs))}
+    failures = {i: 0 for i in range(len(pairs))}
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(pairs))) as executor:
+        while True:
+            now = time.time()
+            for i in due:
+                if i not in running and due[i] <= now:
+                    running[i] = executor.submit(check_submission, pairs[i], options)
+
+            timeout = max(1.0, min(due[i] for i in due if i not in running) - now) if len(running) < len(due) else None
+            if not running:
+                time.sleep(timeout)
+                continue
+            done, _ = wait(list(running.values()), timeout=timeout, return_when=FIRST_COMPLETED)
+            for i, future in list(running.items()):
+                if future not in done:
+                    continue
+                del running[i]
+                try:
+                    future.result()
+                    failures[i] = 0
+                    due[i] = time.time() + interval
+                except Exception:
+                    failures[i] += 1
+                    backoff = min(30 * 2 ** (failures[i] - 1), max_backoff)
+                    print("WARNING: Checking {} on {} failed, retrying in {}s.".format(
+                        pairs[i]["model_name"], pairs[i]["leaderboard_guid"], backoff))
+                    traceback.print_exc()
+                    due[i] = time.time() + backoff
 
-        pkl_f = "{}/{}/summary.pkl".format(logs_path, leaderboard_guid)
-        if os.path.isfile(pkl_f):
-            infile = open(pkl_f, "rb")
-            my_submissions = pickle.load(infile)
-            infile.close()
-        else:
-            my_submissions = {}
-            my_submissions["LeaderboardSubmissions"] = []
 
-            dir_path = os.path.dirname(pkl_f)
-            os.makedirs(dir_path, exist_ok=True)
+def check_submission(pair, options):
+    model_name = pair["model_name"]
+    leaderboard_guid = pair["leaderboard_guid"]
+    leaderboard_arn = pair["leaderboard_arn"]
+    logs_path = options["logs_path"]
+    download_logs = options["download_logs"]
+    download_videos = options["download_videos"]
+    verbose = options["verbose"]
+    create_summary = options["create_summary"]
 
     # Collect data about latest submission
     submission_response = dr.get_latest_user_submission(LeaderboardArn=leaderboard_arn)
@@ -124,8 +206,8 @@ def main():
     if latest_submission:
         jobid = latest_submission["ActivityArn"].split("/", 1)[1]
         print(
-            "Job {} has status {}".format(
-                jobid, latest_submission["LeaderboardSubmissionStatusType"]
+            "Job {} of {} has status {}".format(
+                jobid, model_name, latest_submission["LeaderboardSubmissionStatusType"]
             )
         )
 
@@ -161,10 +243,7 @@ def main():
                 )
 
             # Submit again
-            _ = dr.create_leaderboard_submission(
-                ModelArn=my_model_arn, LeaderboardArn=leaderboard_arn
-            )
-            print("Submitted {} to {}.".format(model_name, leaderboard_arn))
+            submit(pair)
 
         elif latest_submission["LeaderboardSubmissionStatusType"] == "ERROR" or latest_submission["LeaderboardSubmissionStatusType"] == "FAILED":
             print("Error in previous submission")
@@ -188,142 +267,98 @@ def main():
                     traceback.print_exc()
 
             # Submit again
-            _ = dr.create_leaderboard_submission(
-                ModelArn=my_model_arn, LeaderboardArn=leaderboard_arn
-            )
-            print("Submitted {} to {}.".format(model_name, leaderboard_arn))
+            submit(pair)
 
     # Maintain our summary
-    if create_summary:
-        for idx, i in enumerate(my_submissions["LeaderboardSubmissions"]):
-            if "SubmissionTime" in i:
-                if i["SubmissionTime"] == latest_submission["SubmissionTime"]:
-                    del my_submissions["LeaderboardSubmissions"][idx]
-            else:
-                del my_submissions["LeaderboardSubmissions"][idx]
-        my_submissions["LeaderboardSubmissions"].append(latest_submission)
-
-        # Save summary
-        outfile = open(pkl_f, "wb")
-        pickle.dump(my_submissions, outfile)
-        outfile.close()
+    if create_summary and latest_submission:
+        store = submission_store(logs_path)
+        store.add(leaderboard_guid, latest_submission)
 
         # Display summary
         if verbose:
-            display_submissions(my_submissions)
+            display_submissions(store, leaderboard_guid)
 
 
-def download_file(f_name, url):
-
-    dir_path = os.path.dirname(f_name)
-    os.makedirs(dir_path, exist_ok=True)
-    if not os.path.isfile(f_name):
-        print("Downloading {}".format(os.path.basename(f_name)))
-        urllib.request.urlretrieve(url, f_name)
-
-
-def find_model(model_name):
-
-    m_response = dr.list_models(ModelType="REINFORCEMENT_LEARNING", MaxResults=25)
-    model_dict = m_response["Models"]
-    models = pd.DataFrame.from_dict(model_dict)
-    my_model = models[models["ModelName"] == model_name]
-
-    if my_model.size > 0:
-        return my_model
-
-    while "NextToken" in m_response:
-        m_response = dr.list_models(
-            ModelType="REINFORCEMENT_LEARNING",
-            MaxResults=50,
-            NextToken=m_response["NextToken"],
-        )
-        model_dict = m_response["Models"]
-
-        models = pd.DataFrame.from_dict(model_dict)
-        my_model = models[models["ModelName"] == model_name]
-        if my_model.size > 0:
-            return my_model
-
-    return None
+def submit(pair):
+    """
+    Submits the pair's model again. If that fails, the cached model ARN may
+    be stale (model deleted or re-created in the console): it is dropped and
+    looked up again for the next attempt.
+    """
+    try:
+        dr.create_leaderboard_submission(ModelArn=pair["model_arn"], LeaderboardArn=pair["leaderboard_arn"])
+    except ClientError:
+        with lookup_lock:
+            lookup.forget_model(pair["model_name"])
+            model_arn = lookup.model_arn(pair["model_name"])
+        if model_arn is not None:
+            pair["model_arn"] = model_arn
+        raise
+    print("Submitted {} to {}.".format(pair["model_name"], pair["leaderboard_arn"]))
 
 
-def find_leaderboard(leaderboard_guid):
-    leaderboard_arn = "arn:aws:deepracer:::leaderboard/{}".format(leaderboard_guid)
+def submission_store(logs_path):
+    global store
+    with store_lock:
+        if store is None:
+            store = SubmissionStore("{}/submissions.db".format(logs_path))
+    return store
 
-    l_response = dr.list_leaderboards(MaxResults=25)
-    lboards_dict = l_response["Leaderboards"]
-    leaderboards = pd.DataFrame.from_dict(l_response["Leaderboards"])
-    if leaderboards[leaderboards["Arn"] == leaderboard_arn].size > 0:
-        return leaderboard_arn
 
-    while "NextToken" in l_response:
-        l_response = dr.list_leaderboards(
-            MaxResults=50, NextToken=l_response["NextToken"]
-        )
-        lboards_dict = l_response["Leaderboards"]
+def download_file(f_name, url):
+    # Runs in the background; main() waits for all downloads before exiting.
+    downloader.submit(url, f_name)
 
-        leaderboards = pd.DataFrame.from_dict(lboards_dict)
-        if leaderboards[leaderboards["Arn"] == leaderboard_arn].size > 0:
-            return leaderboard_arn
 
-    return None
+def format_lap_time(ms):
+    if ms is None:
+        return "-"
+    return "{:02d}:{:06.3f}".format(int(ms) // 60000, (ms % 60000) / 1000.0)
 
 
-def display_submissions(submissions_dict):
+def display_submissions(store, leaderboard_guid, limit=20):
     # Display status
-    my_columns = [
-        "SubmissionTime",
-        "TotalLapTime",
-        "BestLapTime",
-        "ResetCount",
-        "CollisionCount",
-        "OffTrackCount",
-        "Model",
-        "JobId",
-        "Status",
-    ]
-    my_submissions_df = pd.DataFrame.from_dict(
-        submissions_dict["LeaderboardSubmissions"]
-    )
-    my_submissions_df["SubmissionTime"] = (
-        my_submissions_df["SubmissionTime"]
-        .values.astype(dtype="datetime64[ms]")
-        .astype(dtype="datetime64[s]")
-    )
-    my_submissions_df["TotalLapTime"] = my_submissions_df["TotalLapTime"].values.astype(
-        dtype="datetime64[ms]"
-    )
-    my_submissions_df["TotalLapTime"] = (
-        my_submissions_df["TotalLapTime"].dt.strftime("%M:%S.%f").str[:-4]
-    )
-    my_submissions_df["BestLapTime"] = my_submissions_df["BestLapTime"].values.astype(
-        dtype="datetime64[ms]"
-    )
-    my_submissions_df["BestLapTime"] = (
-        my_submissions_df["BestLapTime"].dt.strftime("%M:%S.%f").str[:-4]
-    )
-    my_submissions_df["JobId"] = my_submissions_df["ActivityArn"].str.split("/").str[1]
-    my_submissions_df["Status"] = my_submissions_df["LeaderboardSubmissionStatusType"]
-    my_submissions_df[[None, None, "Model"]] = my_submissions_df.ModelArn.str.split(
-        "/", expand=True,
-    )
-
-    # Display
+    rows = store.latest(leaderboard_guid, limit)
     print("")
-    print(my_submissions_df[my_columns])
+    print("{:<19}  {:>9}  {:>9}  {:>6}  {:>9}  {:>8}  {:<24}  {:<36}  {}".format(
+        "SubmissionTime", "TotalLap", "BestLap", "Resets", "Collision", "OffTrack", "Model", "JobId", "Status"))
+    for r in rows:
+        print("{:<19}  {:>9}  {:>9}  {:>6}  {:>9}  {:>8}  {:<24}  {:<36}  {}".format(
+            time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(r["submission_time"] / 1000)),
+            format_lap_time(r["total_lap_time"]),
+            format_lap_time(r["best_lap_time"]),
+            r["reset_count"] if r["reset_count"] is not None else "-",
+            r["collision_count"] if r["collision_count"] is not None else "-",
+            r["off_track_count"] if r["off_track_count"] is not None else "-",
+            r["model"],
+            r["job_id"],
+            r["status"],
+        ))
+
+    # Aggregates over all successful submissions
+    print("")
+    for m in store.lap_time_stats(leaderboard_guid):
+        print("{}: {} submissions, best lap {}, mean total {}".format(
+            m["model"], m["submissions"], format_lap_time(m["best_lap_time"]),
+            format_lap_time(m["mean_total_lap_time"])))
 
 
 def usage():
     print(
         "Usage: submit-monitor.py [-v] [-s] [-l] [-g] -m <model-name> -b <leaderboard guid>"
     )
+    print(
+        "       submit-monitor.py [-v] [-s] [-l] [-g] -d <pairs file> [-i <seconds>]"
+    )
     print("        -v                Verbose output.")
-    print("        -s                Store a summary of all submissions.")
+    print("        -s                Store a summary of all submissions in submissions.db.")
     print("        -l                Download robomaker logfiles.")
     print("        -g                Download video recordings.")
     print("        -m                Display name of the model to submit.")
     print("        -b                GUID or ARN of the leaderboard to submit to.")
+    print("        -d                Keep running, monitoring all pairs in the file; one")
+    print("                          '<model-name> <leaderboard guid>' per line.")
+    print("        -i                Seconds between two checks of a pair in daemon mode (default 300).")
     sys.exit(1)
 
 
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+
+import argparse
+import http.server
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lib'))
+
+from drfc import s3
+from drfc import throughput
+
+latest = {'text': ''}
+
+
+class MetricsHandler(http.server.BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        body = latest['text'].encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def print_table(samples):
+    workers = {}
+    for name, labels, value, _ in samples:
+        workers.setdefault(labels['worker'], {})[name.replace('deepracer_', '')] = value
+    columns = ('rtf', 'gz_rtf', 'sim_fps', 'steps_per_second', 'episodes_per_hour', 'iteration_seconds')
+    print(time.strftime('%H:%M:%S') + '  worker ' + ' '.join('{:>18}'.format(c) for c in columns))
+    for worker in sorted(workers, key=int):
+        values = workers[worker]
+        print('          {:>6} '.format(worker) + ' '.join(
+            '{:>18.2f}'.format(values[c]) if c in values else '{:>18}'.format('-') for c in columns))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Collects real-time factor, steps/sec, episodes/hour and iteration time of all Robomaker workers.')
+    parser.add_argument('-i', '--interval', type=int, default=30, help='Seconds between polls.')
+    parser.add_argument('-p', '--port', type=int, help='Serve the latest samples in Prometheus format on this port.')
+    parser.add_argument('-o', '--output', help='Append all samples to this JSON lines file.')
+    parser.add_argument('--no-gz', action='store_true', help='Do not run gz stats inside the containers.')
+    parser.add_argument('-q', '--quiet', action='store_true', help='Do not print the per-worker table.')
+    args = parser.parse_args()
+
+    env = os.environ
+    metrics = None
+    metrics_prefix = env.get('DR_LOCAL_S3_METRICS_PREFIX')
+    if metrics_prefix:
+        metrics = throughput.MetricsPoller(s3.local_client(), env.get('DR_LOCAL_S3_BUCKET', 'bucket'), metrics_prefix)
+    collector = throughput.Collector(env.get('DR_RUN_ID', '0'), metrics, gz_stats=not args.no_gz)
+
+    if args.port:
+        server = http.server.ThreadingHTTPServer(('', args.port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    while True:
+        samples = collector.collect()
+        latest['text'] = throughput.prometheus_text(samples)
+        if args.output:
+            throughput.append_jsonl(args.output, samples)
+        if not args.quiet:
+            print_table(samples)
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        sys.exit(0)
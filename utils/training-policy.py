@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lib'))
+
+from drfc import metrics
+from drfc import policy
+from drfc import s3
+from drfc.checkpoints import CheckpointIndex
+
+
+def stop_training(env):
+    """Stops the run the same way as dr-stop-training."""
+    subprocess.run(['./stop.sh'], cwd=os.path.join(env['DR_DIR'], 'scripts', 'training'),
+                   env=dict(env, ROBOMAKER_COMMAND=''), check=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Watches the training metrics; stops the run when evaluation results plateau, '
+                    'pins the best checkpoints and prunes the others.')
+    parser.add_argument('-i', '--interval', type=int, default=60, help='Seconds between polls.')
+    parser.add_argument('--metric', choices=('progress', 'reward'),
+                        default=os.environ.get('DR_TRAIN_BEST_MODEL_METRIC', 'progress'))
+    parser.add_argument('--patience', type=int, default=10,
+                        help='Stop after this many iterations without improvement.')
+    parser.add_argument('--min-delta', type=float, default=1.0,
+                        help='Smallest increase of the score that counts as improvement.')
+    parser.add_argument('--min-iterations', type=int, default=5)
+    parser.add_argument('--keep-best', type=int, default=3, help='Number of best checkpoints to pin.')
+    parser.add_argument('--keep-last', type=int, default=2, help='Number of newest checkpoints never pruned.')
+    parser.add_argument('--no-stop', action='store_true', help='Only report a plateau, do not stop the run.')
+    parser.add_argument('--prune', action='store_true', help='Delete checkpoints that are not pinned or kept.')
+    parser.add_argument('-d', '--dry-run', action='store_true', help='Do not stop, pin or delete anything.')
+    args = parser.parse_args()
+
+    env = os.environ
+    bucket = env.get('DR_LOCAL_S3_BUCKET', 'bucket')
+    model_prefix = env.get('DR_LOCAL_S3_MODEL_PREFIX')
+    metrics_prefix = env.get('DR_LOCAL_S3_METRICS_PREFIX')
+    if not model_prefix or not metrics_prefix:
+        print("DR_LOCAL_S3_MODEL_PREFIX and DR_LOCAL_S3_METRICS_PREFIX must be set.")
+        return 1
+
+    client = s3.local_client()
+    tailer = metrics.PrefixTailer(client, bucket, metrics_prefix)
+    checkpoints = CheckpointIndex(client, bucket, model_prefix)
+    engine = policy.PlateauPolicy(args.metric, args.patience, args.min_delta, args.min_iterations,
+                                  args.keep_best, args.keep_last, policy.state_file(bucket, model_prefix))
+    pinned = None
+
+    while True:
+        tailer.poll()
+        for i in engine.update(policy.merge_iterations(tailer.tailers)):
+            print("Iteration {}: evaluation {} {:.2f}".format(i, args.metric, engine.scores[i]))
+
+        if engine.scores:
+            checkpoints.refresh()
+            ambiguous = engine.ambiguous
+            if engine.assign(checkpoints.times()) or engine.ambiguous != ambiguous:
+                engine.save()
+            if engine.ambiguous and not ambiguous and args.prune:
+                print("WARNING: Cannot tell which checkpoint each iteration wrote; not pruning. "
+                      "Remove {} to map them again.".format(engine.state_file))
+            new_pinned, prunable = engine.select(checkpoints.numbers())
+            if new_pinned != pinned:
+                print("Pinned checkpoints: {}".format(', '.join(str(n) for n in sorted(new_pinned))))
+                if not args.dry_run:
+                    checkpoints.write_pinned(new_pinned)
+                pinned = new_pinned
+            if args.prune and prunable:
+                deleted = checkpoints.delete(prunable, dry_run=args.dry_run)
+                if deleted:
+                    print("Pruned checkpoints: {}".format(', '.join(str(n) for n in deleted)))
+
+        if engine.plateaued():
+            best = engine.best()[0]
+            print("No improvement of more than {} in {} since iteration {} ({:.2f}).".format(
+                args.min_delta, args.metric, best, engine.scores[best]))
+            if args.no_stop:
+                return 0
+            if not args.dry_run:
+                print("Stopping training.")
+                stop_training(env)
+            return 0
+
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except KeyboardInterrupt:
+        sys.exit(0)
@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import sys
+
+from botocore.exceptions import ClientError
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lib'))
+
+from drfc import s3
+from drfc.wipe import WipeError, forget_prefix, print_progress, wipe_prefix
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Deletes everything below a prefix of the local bucket with batched DeleteObjects requests.')
+    parser.add_argument('prefix', nargs='?', default=os.environ.get('DR_LOCAL_S3_MODEL_PREFIX'))
+    parser.add_argument('-b', '--bucket', default=os.environ.get('DR_LOCAL_S3_BUCKET', 'bucket'))
+    parser.add_argument('-n', '--workers', type=int, default=8, help='Concurrent DeleteObjects batches.')
+    parser.add_argument('-d', '--dryrun', action='store_true', help='Only count the objects.')
+    args = parser.parse_args()
+
+    if not args.prefix or not args.prefix.strip('/'):
+        print("No prefix given. Exiting.")
+        return 1
+
+    s3_client = s3.local_client(max_pool_connections=args.workers)
+    try:
+        deleted = wipe_prefix(s3_client, args.bucket, args.prefix, args.dryrun, args.workers,
+                              print_progress if sys.stdout.isatty() else None)
+    except (WipeError, ClientError) as e:
+        print("\nERROR: {}".format(e))
+        return 1
+    if not args.dryrun:
+        forget_prefix(s3_client, args.bucket, args.prefix)
+    print("\r{}{} objects deleted from s3://{}/{}/".format(
+        '(dryrun) ' if args.dryrun else '', deleted, args.bucket, args.prefix.strip('/')))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lib'))
+
+from drfc import placement
+from drfc import throughput
+
+GB = placement.GB
+
+
+def describe(cpuset, memory):
+    return "CPUs {}, {:.1f} GB".format(cpuset, memory / GB) if memory else "CPUs {}".format(cpuset)
+
+
+def apply(layout, run_id, workers, wait, memory_limits=False):
+    """
+    Waits up to wait seconds for the containers to appear and pins them;
+    Robomaker #n gets layout['robomaker'][n - 1]. Memory limits are only
+    set with memory_limits.
+    """
+    deadline = time.time() + wait
+    pinned_robomaker = {}
+    pinned_sagemaker = False
+    while True:
+        for worker, cid in throughput.robomaker_containers(run_id).items():
+            if pinned_robomaker.get(worker) == cid:
+                continue
+            pinned_robomaker[worker] = cid
+            if worker > len(layout['robomaker']):
+                print("WARNING: No placement planned for Robomaker #{} ({}).".format(worker, cid))
+                continue
+            r = layout['robomaker'][worker - 1]
+            limit = placement.docker_update(cid, r['cpuset'], r['memory'] if memory_limits else None)
+            if limit is not None:
+                print("Robomaker #{} ({}): {}".format(worker, cid, describe(r['cpuset'], limit)))
+        if not pinned_sagemaker:
+            containers = placement.sagemaker_containers()
+            if len(containers) > 1:
+                print("WARNING: {} Sagemaker containers are running; not pinning Sagemaker.".format(len(containers)))
+                pinned_sagemaker = True
+            elif containers:
+                s = layout['sagemaker']
+                limit = placement.docker_update(containers[0], s['cpuset'], s['memory'] if memory_limits else None)
+                if limit is not None:
+                    print("Sagemaker ({}): {}".format(containers[0], describe(s['cpuset'], limit)))
+                pinned_sagemaker = True
+        if (all(w in pinned_robomaker for w in range(1, workers + 1)) and pinned_sagemaker) \
+                or time.time() > deadline:
+            return
+        time.sleep(5)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Plans disjoint CPU sets and memory limits for Sagemaker and the Robomaker workers.')
+    parser.add_argument('-w', '--workers', type=int, default=int(os.environ.get('DR_WORKERS', 1)))
+    parser.add_argument('--target-rtf', type=float, default=1.0, help='Real-time factor each worker should reach.')
+    parser.add_argument('--rtf-per-core', type=float, default=float(os.environ.get('DR_TRAIN_RTF_PER_CORE', 0.5)),
+                        help='Real-time factor one physical core delivers, as measured with dr-monitor-training.')
+    parser.add_argument('--sagemaker-cores', type=int, default=4, help='Physical cores reserved for Sagemaker.')
+    parser.add_argument('--worker-memory', type=float, default=3.0, help='GB of memory a worker needs at least.')
+    parser.add_argument('--apply', action='store_true', help='Pin the running containers of DR_RUN_ID.')
+    parser.add_argument('--memory-limits', action='store_true',
+                        help='With --apply, also limit the memory of the containers (never below their usage).')
+    parser.add_argument('--wait', type=int, default=0, help='With --apply, seconds to wait for the containers.')
+    args = parser.parse_args()
+
+    nodes = placement.read_topology()
+    memory = placement.total_memory()
+    worker_memory = int(args.worker_memory * GB)
+    best, cores_per_worker = placement.max_workers(nodes, memory, args.sagemaker_cores, args.target_rtf,
+                                                   args.rtf_per_core, worker_memory)
+
+    print("NUMA nodes: {}, physical cores: {}, memory: {:.1f} GB".format(
+        len(nodes), sum(len(n) for n in nodes), memory / GB))
+    print("At {} core(s) per worker for RTF {}: at most {} worker(s).".format(cores_per_worker, args.target_rtf, best))
+    if args.workers > best:
+        print("WARNING: {} workers requested; RTF will likely drop below {}.".format(args.workers, args.target_rtf))
+        cores_per_worker = max(1, (sum(len(n) for n in nodes) - args.sagemaker_cores) // max(1, args.workers))
+
+    try:
+        layout = placement.plan(nodes, args.workers, cores_per_worker, memory, args.sagemaker_cores, worker_memory)
+    except ValueError as e:
+        print("Cannot pin workers: {}".format(e))
+        return 1
+
+    s = layout['sagemaker']
+    print("Sagemaker: {}".format(describe(s['cpuset'], s['memory'])))
+    for i, r in enumerate(layout['robomaker']):
+        print("Robomaker #{}: node {}, {}".format(i + 1, r['node'], describe(r['cpuset'], r['memory'])))
+
+    if args.apply:
+        apply(layout, os.environ.get('DR_RUN_ID', '0'), args.workers, args.wait, args.memory_limits)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())